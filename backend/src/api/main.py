@@ -1,8 +1,67 @@
+import asyncio
+import logging
+import signal
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from src.api import views
 from src.api.urls import router
 
-app = FastAPI(title="Network Coverage API", version="1.0.0")
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Open the geocoding client, warm the coverage data up in the background and resume
+    unfinished coverage jobs when the application starts; stop the jobs, the lookup
+    pool and the client on shutdown
+
+    The server accepts connections (and answers /health) while the dataset and indexes
+    load; /ready tells when lookups can be served at full speed.
+    """
+    await views.coverage_service.geocoding_service.start()
+    await views.job_runner.start()
+    app.state.warmup = asyncio.create_task(
+        asyncio.to_thread(views.coverage_service.warmup)
+    )
+    app.state.warmup.add_done_callback(_log_warmup_failure)
+    reload_on_hangup = _add_hangup_handler()
+    yield
+    if reload_on_hangup:
+        asyncio.get_running_loop().remove_signal_handler(signal.SIGHUP)
+    # A load in progress runs in a thread and cannot be cancelled: let it finish
+    await asyncio.gather(app.state.warmup, return_exceptions=True)
+    await views.job_runner.stop()
+    views.coverage_service.close()
+    await views.coverage_service.geocoding_service.aclose()
+
+
+def _add_hangup_handler() -> bool:
+    """
+    Reload the coverage dataset when the process receives SIGHUP
+
+    Returns:
+        Whether the handler was installed: SIGHUP does not exist on Windows, and only
+        the main thread may handle signals
+    """
+    try:
+        asyncio.get_running_loop().add_signal_handler(
+            signal.SIGHUP, lambda: views.coverage_service.start_reload()
+        )
+    except (AttributeError, NotImplementedError, RuntimeError, ValueError):
+        return False
+    return True
+
+
+def _log_warmup_failure(task: asyncio.Task) -> None:
+    """Log the error of a failed warmup, which would otherwise go unnoticed"""
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Coverage data warmup failed", exc_info=task.exception())
+
+
+app = FastAPI(title="Network Coverage API", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -18,3 +77,22 @@ app.include_router(router)
 @app.get("/health")
 def health():
     return {"status": "ok"}
+
+
+@app.get("/metrics")
+def metrics():
+    """Cache hit and miss counters of the running process"""
+    return views.coverage_service.metrics()
+
+
+@app.get("/ready")
+def ready():
+    """Readiness probe: 200 once the coverage dataset and indexes are loaded, else 503"""
+    if views.coverage_service.ready:
+        return {"status": "ready"}
+
+    warmup = getattr(app.state, "warmup", None)
+    if warmup is not None and warmup.done() and not warmup.cancelled():
+        if warmup.exception() is not None:
+            return JSONResponse(status_code=503, content={"status": "failed"})
+    return JSONResponse(status_code=503, content={"status": "loading"})
@@ -3,4 +3,6 @@ API Serializers - Pydantic models for request/response serialization
 Similar to Django REST Framework serializers
 """
 
+from .admin import *  # NOQA: F401
 from .coverage import *  # NOQA: F401
+from .jobs import *  # NOQA: F401
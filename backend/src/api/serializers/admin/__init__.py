@@ -0,0 +1,5 @@
+"""
+Administration serializers for dataset management responses
+"""
+
+from .responses import *  # NOQA: F401
@@ -0,0 +1,36 @@
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel, Field
+from src.data.coverage_dataset import CoverageDataset
+
+
+class DatasetResponse(BaseModel):
+    """API serializer for the coverage dataset currently served"""
+
+    version: str = Field(description="Content version of the tower dataset")
+    towers: int = Field(description="Number of towers in the dataset")
+    loaded_at: datetime = Field(description="When the dataset was loaded")
+    reloading: bool = Field(description="Whether a reload is in progress")
+
+    @classmethod
+    def from_domain(
+        cls, dataset: CoverageDataset, reloading: bool
+    ) -> "DatasetResponse":
+        """Convert the loaded dataset to API serializer"""
+        return cls(
+            version=dataset.version,
+            towers=len(dataset.store),
+            loaded_at=dataset.loaded_at,
+            reloading=reloading,
+        )
+
+
+class ReloadResponse(BaseModel):
+    """API serializer for an accepted dataset reload request"""
+
+    started: bool = Field(
+        description="False when a reload was already in progress and none was started"
+    )
+    dataset: Optional[DatasetResponse] = Field(
+        description="Dataset served until the reload completes, if loaded yet"
+    )
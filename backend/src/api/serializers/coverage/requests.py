@@ -1,4 +1,4 @@
-from typing import Annotated, Dict
+from typing import Annotated, Dict, Tuple
 from pydantic import Field
 
 
@@ -18,3 +18,20 @@ CoverageRequestBody = Annotated[
         ],
     ),
 ]
+
+Latitude = Annotated[float, Field(ge=-90.0, le=90.0)]
+Longitude = Annotated[float, Field(ge=-180.0, le=180.0)]
+
+CoordinatesRequestBody = Annotated[
+    Dict[str, Tuple[Latitude, Longitude]],
+    Field(
+        description="Dictionary mapping location IDs to [latitude, longitude] (WGS84)",
+        examples=[
+            {
+                "id1": [48.8853, 2.3833],
+                "id4": [48.8603, 2.3126],
+                "id6": [48.8049, 2.1204],
+            }
+        ],
+    ),
+]
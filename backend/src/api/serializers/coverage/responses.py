@@ -1,7 +1,15 @@
+from functools import lru_cache
 from typing import Annotated, Dict, Any, Optional
+import orjson
 from pydantic import BaseModel, Field
 from src.models import coverage
 
+# JSON of every NetworkCoverage value, by bitmask of its 2G, 3G and 4G flags
+_NETWORK_COVERAGE_JSON = tuple(
+    orjson.dumps({"2G": bool(mask & 1), "3G": bool(mask & 2), "4G": bool(mask & 4)})
+    for mask in range(8)
+)
+
 
 class NetworkCoverage(BaseModel):
     """API serializer for network coverage information"""
@@ -39,6 +47,91 @@ class LocationCoverageResponse(BaseModel):
     )
 
 
+class LocationCoverageLine(BaseModel):
+    """API serializer for one location of a streamed coverage response (NDJSON line)"""
+
+    id: str = Field(description="Location ID")
+    error: Optional[str] = Field(
+        description="Error message if location processing failed"
+    )
+    operators: Dict[str, NetworkCoverage] = Field(
+        description="Coverage data by operator"
+    )
+
+    @classmethod
+    def from_domain(
+        cls, location_id: str, location_data: coverage.LocationCoverageData
+    ) -> "LocationCoverageLine":
+        """Convert a location's domain coverage data to API serializer"""
+        return cls(
+            id=location_id,
+            error=location_data.error,
+            operators={
+                operator: NetworkCoverage.from_model(network_coverage)
+                for operator, network_coverage in location_data.operators.items()
+            },
+        )
+
+    def to_ndjson(self) -> str:
+        """Serialize as one line of newline-delimited JSON"""
+        return self.model_dump_json(by_alias=True) + "\n"
+
+    @staticmethod
+    def ndjson_from_domain(
+        location_id: str, location_data: coverage.LocationCoverageData
+    ) -> bytes:
+        """NDJSON line of a location's domain coverage data, like `to_ndjson` of the
+        converted serializer but built from precomputed fragments"""
+        return b"".join(
+            (
+                b'{"id":',
+                orjson.dumps(location_id),
+                b",",
+                location_coverage_json(location_data)[1:],
+                b"\n",
+            )
+        )
+
+
+def location_coverage_json(location_data: coverage.LocationCoverageData) -> bytes:
+    """
+    JSON of a location's coverage, as serialized from `LocationCoverageResponse`
+
+    Built from precomputed fragments rather than through Pydantic models, which
+    dominates the CPU time of large responses otherwise.
+    """
+    operators = b",".join(
+        [
+            _operator_key_json(operator) + _network_coverage_json(network_coverage)
+            for operator, network_coverage in location_data.operators.items()
+        ]
+    )
+    return b"".join(
+        (
+            b'{"error":',
+            orjson.dumps(location_data.error),
+            b',"operators":{',
+            operators,
+            b"}}",
+        )
+    )
+
+
+@lru_cache(maxsize=256)
+def _operator_key_json(operator: str) -> bytes:
+    """JSON object key of an operator name, with its colon"""
+    return orjson.dumps(operator) + b":"
+
+
+def _network_coverage_json(network_coverage: coverage.NetworkCoverage) -> bytes:
+    """Pre-encoded orjson fragment of the coverage of one operator"""
+    return _NETWORK_COVERAGE_JSON[
+        network_coverage.network_2g
+        | network_coverage.network_3g << 1
+        | network_coverage.network_4g << 2
+    ]
+
+
 class CoverageResponse:
     """Coverage response handler with conversion and type annotation"""
 
@@ -64,6 +157,29 @@ class CoverageResponse:
                 )
         return converted
 
+    @staticmethod
+    def to_json(domain_results: coverage.LocationCoverageResults) -> bytes:
+        """
+        Serialize domain models straight to the JSON of `CoverageResponseType`
+
+        Equivalent to serializing the result of `from_domain`, without building a model
+        per location and operator.
+        """
+        return b"".join(
+            (
+                b"{",
+                b",".join(
+                    [
+                        orjson.dumps(location_id)
+                        + b":"
+                        + location_coverage_json(location_data)
+                        for location_id, location_data in domain_results.items()
+                    ]
+                ),
+                b"}",
+            )
+        )
+
 
 CoverageResponseType = Annotated[
     Dict[str, LocationCoverageResponse],
@@ -0,0 +1,6 @@
+"""
+Coverage job serializers for job submission, progress and results
+"""
+
+from .requests import *  # NOQA: F401
+from .responses import *  # NOQA: F401
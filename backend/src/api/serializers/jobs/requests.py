@@ -0,0 +1,40 @@
+import csv
+import io
+from typing import List, Tuple
+
+CSV_MEDIA_TYPE = "text/csv"
+
+
+def read_locations_csv(content: str) -> List[Tuple[str, str]]:
+    """
+    Locations of an uploaded CSV file, with a header naming its `id` and `address`
+    columns; the delimiter may be a comma, a semicolon or a tab
+
+    Args:
+        content: Decoded file content
+
+    Returns:
+        (location ID, address) pairs, in file order
+
+    Raises:
+        ValueError: If the header lacks a column or a row lacks a value
+    """
+    sample = content[:4096]
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.DictReader(io.StringIO(content), dialect=dialect)
+    columns = {name.strip().lower(): name for name in reader.fieldnames or []}
+    missing = [name for name in ("id", "address") if name not in columns]
+    if missing:
+        raise ValueError(f"CSV header lacks column(s): {', '.join(missing)}")
+
+    locations = []
+    for line, row in enumerate(reader, start=2):
+        location_id = (row[columns["id"]] or "").strip()
+        address = (row[columns["address"]] or "").strip()
+        if not location_id or not address:
+            raise ValueError(f"CSV line {line} lacks an id or an address")
+        locations.append((location_id, address))
+    return locations
@@ -0,0 +1,48 @@
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel, Field
+from src.api.serializers.coverage.responses import LocationCoverageLine
+from src.models import jobs
+from src.models.jobs import JobStatus
+
+
+class JobResponse(BaseModel):
+    """API serializer for the progress of a coverage job"""
+
+    id: str = Field(description="Job ID")
+    status: JobStatus = Field(description="queued, running, completed or failed")
+    total: int = Field(description="Number of locations submitted")
+    processed: int = Field(description="Number of locations with a result")
+    failed: int = Field(description="Number of processed locations with an error")
+    created_at: datetime = Field(description="When the job was submitted")
+    updated_at: datetime = Field(description="When the job last progressed")
+    error: Optional[str] = Field(description="Why the job failed, if it did")
+
+    @classmethod
+    def from_domain(cls, job: jobs.CoverageJob) -> "JobResponse":
+        """Convert a domain coverage job to API serializer"""
+        return cls(
+            id=job.id,
+            status=job.status,
+            total=job.total,
+            processed=job.processed,
+            failed=job.failed,
+            created_at=job.created_at,
+            updated_at=job.updated_at,
+            error=job.error,
+        )
+
+
+class JobResultsResponse(BaseModel):
+    """API serializer for a page of the results of a coverage job"""
+
+    status: JobStatus = Field(description="Status of the job when the page was read")
+    items: List[LocationCoverageLine] = Field(
+        description="Processed locations, in the order they were processed"
+    )
+    next_offset: Optional[int] = Field(
+        description=(
+            "Offset of the next page; null once the job is finished and every result "
+            "was returned"
+        )
+    )
@@ -0,0 +1,183 @@
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import time
+from typing import Dict, List, Optional
+import uvicorn
+
+logger = logging.getLogger(__name__)
+
+# A worker exiting sooner than this after its start is restarted after a pause, so a
+# worker failing at startup does not fork in a tight loop
+MIN_WORKER_UPTIME = 1.0
+
+# Seconds workers get to finish their requests on shutdown before being killed
+GRACEFUL_TIMEOUT = 30.0
+
+
+def preload() -> None:
+    """
+    Load the coverage data and lookup structures in the current process, ahead of
+    forking workers
+
+    Every object allocated so far is then moved out of reach of the garbage collector
+    (`gc.freeze`): collections in the workers would otherwise write to the headers of
+    the inherited objects, copying the pages holding them into each worker.
+    """
+    # Imported here so the application modules are loaded before freezing
+    from src.api import views
+
+    dataset = views.coverage_service.dataset
+    views.coverage_service.geocoding_service.local_index
+    gc.collect()
+    gc.freeze()
+    logger.info(
+        f"Preloaded coverage data version {dataset.version}, "
+        f"{gc.get_freeze_count()} objects frozen"
+    )
+
+
+class PreforkServer:
+    """
+    Serves the application from worker processes forked after preloading the data
+
+    The parent binds the listening socket, loads the dataset once and forks the
+    workers, which inherit both: the data pages stay shared copy-on-write between
+    them, unlike workers started from scratch by `uvicorn --workers`. The parent
+    restarts workers that die, forwards SIGHUP (dataset reload) to them, and stops
+    them gracefully on SIGTERM or SIGINT.
+    """
+
+    def __init__(self, host: str, port: int, workers: int, log_level: str = "info"):
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.log_level = log_level
+        self.socket: Optional[socket.socket] = None
+        # Worker number by process ID
+        self.children: Dict[int, int] = {}
+        self._started_at: Dict[int, float] = {}
+        self._stopping = False
+
+    def run(self) -> None:
+        """Bind, preload, fork the workers and supervise them until stopped"""
+        self.socket = self._bind()
+        preload()
+
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        if hasattr(signal, "SIGHUP"):
+            signal.signal(signal.SIGHUP, self._forward)
+
+        for number in range(self.workers):
+            self._spawn(number)
+        logger.info(
+            f"Serving on http://{self.host}:{self.port} with {self.workers} workers"
+        )
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            number = self.children.pop(pid, None)
+            if number is None or self._stopping:
+                continue
+
+            logger.warning(
+                f"Worker {number} (pid {pid}) exited with status "
+                f"{os.waitstatus_to_exitcode(status)}, restarting it"
+            )
+            if time.monotonic() - self._started_at.pop(pid, 0.0) < MIN_WORKER_UPTIME:
+                time.sleep(MIN_WORKER_UPTIME)
+            self._spawn(number)
+
+        self.socket.close()
+
+    def _bind(self) -> socket.socket:
+        """Listening socket shared by every worker"""
+        family = socket.AF_INET6 if ":" in self.host else socket.AF_INET
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(2048)
+        sock.set_inheritable(True)
+        return sock
+
+    def _spawn(self, number: int) -> None:
+        """Fork a worker, which serves until it receives SIGTERM or SIGINT"""
+        pid = os.fork()
+        if pid:
+            self.children[pid] = number
+            self._started_at[pid] = time.monotonic()
+            return
+
+        code = 0
+        try:
+            self._serve(number)
+        except BaseException:
+            logger.exception(f"Worker {number} failed")
+            code = 1
+        finally:
+            os._exit(code)
+
+    def _serve(self, number: int) -> None:
+        """Run the application in a forked worker"""
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, signal.SIG_DFL)
+        if hasattr(signal, "SIGHUP"):
+            # Until the application installs its reload handler
+            signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+        from src.api.main import app
+
+        config = uvicorn.Config(app, lifespan="on", log_level=self.log_level)
+        uvicorn.Server(config).run(sockets=[self.socket])
+
+    def _stop(self, signum: int, frame) -> None:
+        """Stop every worker gracefully, killing those still running after a delay"""
+        if self._stopping:
+            return
+        self._stopping = True
+        logger.info("Stopping workers")
+        self._signal_children(signal.SIGTERM)
+        signal.signal(signal.SIGALRM, lambda *_: self._signal_children(signal.SIGKILL))
+        signal.alarm(int(GRACEFUL_TIMEOUT))
+
+    def _forward(self, signum: int, frame) -> None:
+        """Forward a signal to every worker"""
+        self._signal_children(signum)
+
+    def _signal_children(self, signum: int) -> None:
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Serve the API from pre-forked workers sharing the preloaded coverage data"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.environ.get("WEB_CONCURRENCY", 0)) or os.cpu_count(),
+    )
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=args.log_level.upper(),
+        format="%(asctime)s %(process)d %(levelname)s %(name)s: %(message)s",
+    )
+    PreforkServer(args.host, args.port, args.workers, args.log_level).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 from src.api import views
 
 router = APIRouter(prefix="/api/v1")
@@ -8,5 +8,111 @@ router.add_api_route(
     views.get_coverage_for_locations,
     methods=["POST"],
     summary="Get network coverage for multiple locations",
-    description="Returns network coverage information for the provided locations",
+    description=(
+        "Returns network coverage information for the provided locations. With "
+        "`?stream=true` or `Accept: application/x-ndjson`, streams one JSON line per "
+        "location (with its `id`) as soon as it completes instead"
+    ),
+    responses={
+        200: {
+            "content": {
+                "application/x-ndjson": {
+                    "schema": {"type": "string"},
+                    "example": (
+                        '{"id": "id1", "error": null, "operators": '
+                        '{"orange": {"2G": true, "3G": true, "4G": false}}}\n'
+                    ),
+                }
+            }
+        }
+    },
+)
+
+router.add_api_route(
+    "/coverage/by-coordinates",
+    views.get_coverage_for_coordinates,
+    methods=["POST"],
+    summary="Get network coverage for locations given by their coordinates",
+    description=(
+        "Returns network coverage information for the provided [latitude, longitude] "
+        "points (WGS84), without geocoding: every point is looked up in one batch"
+    ),
+)
+
+router.add_api_route(
+    "/coverage/jobs",
+    views.create_coverage_job,
+    methods=["POST"],
+    status_code=202,
+    summary="Submit a coverage job for a large list of locations",
+    description=(
+        "Records the locations and computes their coverage in the background, in "
+        "chunks. Accepts the JSON object of the coverage endpoint or a CSV file with "
+        "`id` and `address` columns; poll the job URL given in the Location header"
+    ),
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {
+                        "type": "object",
+                        "additionalProperties": {"type": "string"},
+                        "description": "Dictionary mapping location IDs to addresses",
+                    }
+                },
+                "text/csv": {
+                    "schema": {"type": "string"},
+                    "example": "id,address\nid1,157 boulevard Mac Donald 75019 Paris\n",
+                },
+            },
+        }
+    },
+)
+
+router.add_api_route(
+    "/coverage/jobs/{job_id}",
+    views.get_coverage_job,
+    methods=["GET"],
+    summary="Get the progress of a coverage job",
+    responses={404: {"description": "Unknown job"}},
+)
+
+router.add_api_route(
+    "/coverage/jobs/{job_id}/results",
+    views.get_coverage_job_results,
+    methods=["GET"],
+    summary="Get the results of a coverage job",
+    description=(
+        "Returns a page of the locations processed so far, in processing order, with "
+        "the offset of the next page. With `?stream=true` or "
+        "`Accept: application/x-ndjson`, streams every processed location as one JSON "
+        "line instead"
+    ),
+    responses={
+        200: {"content": {"application/x-ndjson": {"schema": {"type": "string"}}}},
+        404: {"description": "Unknown job"},
+    },
+)
+
+router.add_api_route(
+    "/admin/dataset",
+    views.get_dataset,
+    methods=["GET"],
+    dependencies=[Depends(views.require_admin_token)],
+    summary="Get the coverage dataset being served",
+    description="Returns the version of the tower dataset and whether a reload is running",
+)
+
+router.add_api_route(
+    "/admin/reload",
+    views.reload_dataset,
+    methods=["POST"],
+    status_code=202,
+    dependencies=[Depends(views.require_admin_token)],
+    summary="Reload the coverage dataset",
+    description=(
+        "Reloads the tower dataset from its CSV file in the background and swaps it in "
+        "atomically once ready, without interrupting lookups"
+    ),
 )
@@ -1,17 +1,49 @@
-from fastapi import HTTPException
-from src.api.serializers import CoverageRequestBody
+import asyncio
+import hmac
+import logging
+from typing import Annotated, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from fastapi import Header, HTTPException, Query, Request, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter, ValidationError
+from src.api.serializers import CoordinatesRequestBody, CoverageRequestBody
+from src.api.serializers.admin import DatasetResponse, ReloadResponse
 from src.api.serializers.coverage.responses import (
     CoverageResponse,
     CoverageResponseType,
+    LocationCoverageLine,
 )
+from src.api.serializers.jobs import (
+    CSV_MEDIA_TYPE,
+    JobResponse,
+    JobResultsResponse,
+    read_locations_csv,
+)
+from src.config import get_settings
 from src.services.coverage_service import CoverageService
+from src.services.job_runner import CoverageJobRunner
 from src.models.coverage import LocationCoverageResults
+from src.models.jobs import CoverageJob
+
+logger = logging.getLogger(__name__)
+
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson")
 
 coverage_service = CoverageService()
+job_runner = CoverageJobRunner(coverage_service)
+
+_coverage_request_adapter = TypeAdapter(CoverageRequestBody)
 
 
 async def get_coverage_for_locations(
     request: CoverageRequestBody,
+    stream: Annotated[
+        bool,
+        Query(
+            description="Stream one NDJSON line per location as soon as it completes"
+        ),
+    ] = False,
+    accept: Annotated[Optional[str], Header()] = None,
 ) -> CoverageResponseType:
     """
     Handle HTTP request for network coverage information for multiple locations
@@ -22,16 +54,221 @@ async def get_coverage_for_locations(
     - Calling business logic service
     - Converting domain models to API serializers
     - Error handling and HTTP status codes
+
+    With `?stream=true` or an `Accept: application/x-ndjson` header, the response is
+    streamed as one JSON object per line and location, in completion order.
     """
+    if stream or _accepts_ndjson(accept):
+        return StreamingResponse(
+            _stream_coverage(request), media_type=NDJSON_MEDIA_TYPES[0]
+        )
+
     try:
         domain_results: LocationCoverageResults = (
             await coverage_service.get_coverage_for_locations(request)
         )
-        api_results = CoverageResponse.from_domain(domain_results)
-        return api_results
+        # Serialized here rather than validated against the response model again
+        return Response(
+            CoverageResponse.to_json(domain_results), media_type="application/json"
+        )
 
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Invalid request: {str(e)}")
 
     except Exception as e:
         raise HTTPException(status_code=500, detail="Internal server error")
+
+
+async def get_coverage_for_coordinates(
+    request: CoordinatesRequestBody,
+) -> CoverageResponseType:
+    """
+    Handle HTTP request for network coverage information for locations given by their
+    GPS coordinates
+
+    Geocoding is skipped: every point is looked up in a single batch.
+    """
+    try:
+        domain_results: LocationCoverageResults = (
+            await coverage_service.get_coverage_for_coordinates(request)
+        )
+        return Response(
+            CoverageResponse.to_json(domain_results), media_type="application/json"
+        )
+
+    except Exception:
+        logger.exception("Coverage lookup by coordinates failed")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+def _accepts_ndjson(accept: Optional[str]) -> bool:
+    """Whether an Accept header asks for newline-delimited JSON"""
+    if not accept:
+        return False
+    media_types = (
+        media_range.split(";")[0].strip() for media_range in accept.split(",")
+    )
+    return any(media_type in NDJSON_MEDIA_TYPES for media_type in media_types)
+
+
+async def _stream_coverage(locations: Dict[str, str]) -> AsyncIterator[bytes]:
+    """
+    NDJSON lines of the coverage of each location, as each one completes
+
+    The status code is sent before the first line: a failure midway is logged and ends
+    the stream early, which clients detect as a truncated response.
+    """
+    try:
+        async for (
+            location_id,
+            location_data,
+        ) in coverage_service.stream_coverage_for_locations(locations):
+            yield LocationCoverageLine.ndjson_from_domain(location_id, location_data)
+    except Exception:
+        logger.exception("Coverage stream failed")
+        raise
+
+
+async def create_coverage_job(request: Request, response: Response) -> JobResponse:
+    """
+    Handle HTTP request to compute the coverage of a large list of locations in the
+    background
+
+    The body is either the JSON object of the coverage endpoint, or a CSV file (sent
+    as `text/csv`) with `id` and `address` columns. The job is recorded before the
+    response is sent: poll its URL, given in the Location header, for progress.
+    """
+    locations = await _read_job_locations(request)
+    max_locations = get_settings().jobs_max_locations
+    if len(locations) > max_locations:
+        raise HTTPException(
+            status_code=413,
+            detail=f"A job accepts at most {max_locations} locations",
+        )
+
+    job = await job_runner.submit(locations)
+    response.headers["Location"] = f"{request.url.path}/{job.id}"
+    return JobResponse.from_domain(job)
+
+
+async def _read_job_locations(request: Request) -> List[Tuple[str, str]]:
+    """(location ID, address) pairs of a job submission, from JSON or CSV"""
+    body = await request.body()
+    content_type = request.headers.get("content-type", "")
+    if content_type.split(";")[0].strip() == CSV_MEDIA_TYPE:
+        try:
+            return read_locations_csv(body.decode("utf-8-sig"))
+        except (UnicodeDecodeError, ValueError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid request: {str(e)}")
+
+    try:
+        locations = _coverage_request_adapter.validate_json(body)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors(include_url=False))
+    return list(locations.items())
+
+
+async def get_coverage_job(job_id: str) -> JobResponse:
+    """Handle HTTP request for the progress of a coverage job"""
+    return JobResponse.from_domain(await _get_job(job_id))
+
+
+async def get_coverage_job_results(
+    job_id: str,
+    offset: Annotated[int, Query(ge=0)] = 0,
+    limit: Annotated[Optional[int], Query(ge=1)] = None,
+    stream: Annotated[
+        bool, Query(description="Stream every processed location as NDJSON")
+    ] = False,
+    accept: Annotated[Optional[str], Header()] = None,
+) -> JobResultsResponse:
+    """
+    Handle HTTP request for the results of a coverage job, available as they are
+    processed
+
+    Results are paged in the order the locations were processed: request the next
+    page from `next_offset` until it is null. With `?stream=true` or an
+    `Accept: application/x-ndjson` header, every result processed so far is streamed
+    as one JSON object per line instead.
+    """
+    job = await _get_job(job_id)
+    if stream or _accepts_ndjson(accept):
+        return StreamingResponse(
+            _stream_job_results(job_id), media_type=NDJSON_MEDIA_TYPES[0]
+        )
+
+    page_size = get_settings().jobs_page_size
+    limit = min(limit or page_size, page_size)
+    page = await asyncio.to_thread(job_runner.store.results, job_id, offset, limit)
+    next_offset = offset + len(page)
+    return JobResultsResponse(
+        status=job.status,
+        items=[
+            LocationCoverageLine.from_domain(location_id, location_data)
+            for location_id, location_data in page
+        ],
+        next_offset=(
+            None
+            if job.status.finished and next_offset >= job.processed
+            else next_offset
+        ),
+    )
+
+
+async def _get_job(job_id: str) -> CoverageJob:
+    """Coverage job by ID, or a 404 error"""
+    job = await asyncio.to_thread(job_runner.store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job
+
+
+def _stream_job_results(job_id: str) -> Iterator[bytes]:
+    """NDJSON lines of the processed locations of a job, read page by page"""
+    for location_id, location_data in job_runner.store.iter_results(job_id):
+        yield LocationCoverageLine.ndjson_from_domain(location_id, location_data)
+
+
+def require_admin_token(
+    x_admin_token: Annotated[Optional[str], Header()] = None,
+) -> None:
+    """
+    Guard administration endpoints with the configured ADMIN_TOKEN
+
+    Endpoints are disabled when no token is configured: a reload ties the service up
+    for as long as the dataset takes to build.
+    """
+    expected = get_settings().admin_token
+    if not expected:
+        raise HTTPException(
+            status_code=403, detail="Administration endpoints are disabled"
+        )
+    if not hmac.compare_digest(
+        (x_admin_token or "").encode("utf-8"), expected.encode("utf-8")
+    ):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+async def get_dataset() -> DatasetResponse:
+    """Handle HTTP request for the version of the coverage dataset being served"""
+    if not coverage_service.ready:
+        raise HTTPException(status_code=503, detail="Coverage data is loading")
+    return DatasetResponse.from_domain(
+        coverage_service.dataset, coverage_service.reloading
+    )
+
+
+async def reload_dataset() -> ReloadResponse:
+    """
+    Handle HTTP request to reload the coverage dataset from its CSV file
+
+    The reload runs in the background and the current dataset keeps serving lookups
+    until the new one is swapped in; poll the dataset endpoint for its version.
+    """
+    started = coverage_service.start_reload()
+    dataset = (
+        DatasetResponse.from_domain(coverage_service.dataset, True)
+        if coverage_service.ready
+        else None
+    )
+    return ReloadResponse(started=started, dataset=dataset)
@@ -0,0 +1,145 @@
+import os
+from dataclasses import dataclass, fields
+from functools import lru_cache
+from typing import Any, Mapping, Optional, Union, get_args, get_origin
+
+# Coverage lookup engines: exact spatial index, or precomputed grid with index fallback
+COVERAGE_ENGINES = ("index", "grid")
+# Where coverage lookups run: a thread pool, worker processes, or the event loop itself
+LOOKUP_EXECUTORS = ("thread", "process", "inline")
+# Distance approximations deciding coverage ranges, exact haversine near each radius
+DISTANCE_MODELS = ("equirectangular", "planar", "haversine")
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    Service settings
+
+    Every field can be overridden with the environment variable of the same name in
+    upper case, e.g. COVERAGE_ENGINE=grid.
+    """
+
+    coverage_csv_path: str = (
+        "src/data/2018_01_Sites_mobiles_2G_3G_4G_France_metropolitaine_L93_ver2.csv"
+    )
+    coverage_engine: str = "index"
+    coverage_grid_path: str = "src/data/coverage_grid.bin"
+    # Binary snapshot of the parsed dataset, written next to the CSV unless a directory
+    # is given
+    coverage_snapshot: bool = True
+    coverage_snapshot_dir: Optional[str] = None
+    # Lookups run off the event loop, in a pool of threads or of worker processes each
+    # loading the dataset snapshot (memory-mapped, so shared); by default the pool size
+    # follows the CPU count
+    coverage_lookup_executor: str = "thread"
+    coverage_lookup_workers: Optional[int] = None
+    # Model deciding whether towers are in range (see DistanceModel); every model gives
+    # the same answers, falling back to haversine near the radius
+    coverage_distance_model: str = "equirectangular"
+    # Coverage flags cached by cell of this many meters around the query points (0
+    # disables the cache), in an LRU of cells, saved to a SQLite file when a path is set
+    coverage_cache_resolution_m: float = 10.0
+    coverage_cache_size: int = 50_000
+    coverage_cache_path: Optional[str] = None
+    # Lambert93 -> GPS projections of single points kept in memory (LRU); 0 disables
+    coordinate_cache_size: int = 10_000
+    # Connection pool of the geocoding API client; HTTP/2 needs the h2 package
+    geocoding_timeout: float = 5.0
+    geocoding_max_connections: int = 100
+    geocoding_max_keepalive_connections: int = 20
+    geocoding_keepalive_expiry: float = 30.0
+    geocoding_http2: bool = False
+    # Geocoding results cache: in-memory LRU in front of a SQLite file (empty to
+    # disable), both expiring entries after the TTL in seconds
+    geocoding_cache_size: int = 10000
+    geocoding_cache_ttl: float = 30 * 24 * 3600.0
+    geocoding_cache_path: Optional[str] = "geocoding_cache.sqlite"
+    # Outbound request scheduling: concurrent requests, average rate in requests per
+    # second with its burst (the API allows 50/s per IP; 0 disables pacing), and
+    # retries of 429 and 5xx responses with backoff, in seconds
+    geocoding_max_in_flight: int = 20
+    geocoding_rate_limit: float = 50.0
+    geocoding_rate_burst: int = 50
+    geocoding_max_retries: int = 3
+    geocoding_retry_backoff: float = 0.5
+    geocoding_retry_max_delay: float = 30.0
+    # Offline geocoding index built from a BAN extract (python -m src.data.address_index),
+    # tried before the API; fuzzy matches need the minimum score. Without the remote
+    # API, addresses missing from the index are not geocoded
+    geocoding_local_index: Optional[str] = None
+    geocoding_local_min_score: float = 0.8
+    geocoding_remote: bool = True
+    # Batches of at least this many uncached addresses are geocoded through the bulk
+    # CSV endpoint, uploading up to geocoding_batch_size addresses per request
+    geocoding_batch_threshold: int = 20
+    geocoding_batch_size: int = 1000
+    # Asynchronous coverage jobs: SQLite store, locations per chunk, chunks processed
+    # at once across jobs, and the largest job and result page accepted
+    jobs_db_path: str = "coverage_jobs.sqlite"
+    jobs_chunk_size: int = 500
+    jobs_concurrency: int = 4
+    jobs_max_locations: int = 1_000_000
+    jobs_page_size: int = 1000
+    # Seconds a job stays reserved to the process running it without a renewal; jobs of
+    # a process that stopped are taken over by another one after this delay
+    jobs_lease_seconds: float = 60.0
+    # Required in the X-Admin-Token header of administration endpoints, which are
+    # disabled when unset
+    admin_token: Optional[str] = None
+
+    def __post_init__(self):
+        if self.coverage_engine not in COVERAGE_ENGINES:
+            raise ValueError(
+                f"Unknown coverage engine '{self.coverage_engine}', "
+                f"expected one of {', '.join(COVERAGE_ENGINES)}"
+            )
+        if self.coverage_lookup_executor not in LOOKUP_EXECUTORS:
+            raise ValueError(
+                f"Unknown lookup executor '{self.coverage_lookup_executor}', "
+                f"expected one of {', '.join(LOOKUP_EXECUTORS)}"
+            )
+        if self.coverage_distance_model not in DISTANCE_MODELS:
+            raise ValueError(
+                f"Unknown distance model '{self.coverage_distance_model}', "
+                f"expected one of {', '.join(DISTANCE_MODELS)}"
+            )
+
+    @classmethod
+    def from_env(cls, environ: Optional[Mapping[str, str]] = None) -> "Settings":
+        """
+        Build settings from environment variables, keeping defaults for unset ones
+
+        Args:
+            environ: Environment mapping, defaults to os.environ
+
+        Returns:
+            Settings instance
+        """
+        environ = os.environ if environ is None else environ
+        values = {}
+        for field in fields(cls):
+            raw = environ.get(field.name.upper())
+            if raw is not None:
+                values[field.name] = _parse(raw, field.type)
+        return cls(**values)
+
+
+@lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    """Settings of the running process, read from the environment once"""
+    return Settings.from_env()
+
+
+def _parse(raw: str, annotation: Any) -> Any:
+    """Convert an environment variable value to the type of a settings field"""
+    if get_origin(annotation) is Union:
+        if raw == "":
+            return None
+        annotation = next(arg for arg in get_args(annotation) if arg is not type(None))
+
+    if annotation is bool:
+        return raw.strip().lower() in ("1", "true", "yes", "on")
+    if annotation in (int, float):
+        return annotation(raw)
+    return raw
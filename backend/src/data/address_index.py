@@ -0,0 +1,337 @@
+import argparse
+import bisect
+import csv
+import gzip
+import math
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+from src.config import get_settings
+from src.data.column_file import read_column_file, write_column_file
+from src.services.address import normalize_address
+
+# Bumped whenever the file layout changes, so stale indexes are rejected
+ADDRESS_INDEX_FORMAT_VERSION = 1
+
+_MAGIC = b"NCCADDR\x00"
+_COLUMNS = (
+    "key_blob",
+    "key_offsets",
+    "lon",
+    "lat",
+    "token_counts",
+    "token_blob",
+    "token_offsets",
+    "posting_offsets",
+    "postings",
+)
+
+# Query tokens at least this long also match the longer tokens they start
+MIN_PREFIX_LENGTH = 4
+MAX_PREFIX_EXPANSIONS = 64
+# Addresses scored by a fuzzy search, taken from the postings of the rarest tokens
+MAX_CANDIDATES = 1024
+DEFAULT_MIN_SCORE = 0.8
+
+
+@dataclass(frozen=True)
+class AddressMatch:
+    """Address of the index matching a query"""
+
+    address: str
+    latitude: float
+    longitude: float
+    score: float
+
+
+class _Strings(Sequence):
+    """Sorted UTF-8 strings stored as one blob with offsets, searchable with bisect"""
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        # Plain views of the (possibly memory-mapped) arrays: slicing them is cheaper
+        self.blob = memoryview(np.ascontiguousarray(blob)).cast("B")
+        self.offsets = np.asarray(offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, position: int) -> bytes:
+        return self.blob[
+            self.offsets.item(position) : self.offsets.item(position + 1)
+        ].tobytes()
+
+    def find(self, value: bytes) -> Optional[int]:
+        """Position of a string, or None if absent"""
+        position = bisect.bisect_left(self, value)
+        if position < len(self) and self[position] == value:
+            return position
+        return None
+
+    def prefixed(self, prefix: bytes) -> range:
+        """Positions of the strings starting with a prefix"""
+        # 0xFF never occurs in UTF-8, so it sorts after every continuation
+        return range(
+            bisect.bisect_left(self, prefix), bisect.bisect_left(self, prefix + b"\xff")
+        )
+
+
+class AddressIndex:
+    """
+    Offline geocoder over a Base Adresse Nationale (BAN) extract
+
+    Addresses are stored by normalized form (see `normalize_address`), sorted, so that
+    an exact match is a binary search. Every word of the addresses is indexed with the
+    sorted rows containing it, for fuzzy matching: candidates are drawn from the rarest
+    words of the query, then scored by how much of the query they match, rare words
+    weighing more (inverse document frequency), and how much of the candidate is in the
+    query. Query words of at least `MIN_PREFIX_LENGTH` letters also match the words they
+    start, so truncated words are found.
+
+    Every array is a flat column, memory-mapped read-only from the file written by
+    `save`: loading is immediate and the pages are shared between processes.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        self.columns = columns
+        self.keys = _Strings(columns["key_blob"], columns["key_offsets"])
+        self.tokens = _Strings(columns["token_blob"], columns["token_offsets"])
+        self.lon = columns["lon"]
+        self.lat = columns["lat"]
+        self.token_counts = columns["token_counts"]
+        self.posting_offsets = columns["posting_offsets"]
+        self.postings = columns["postings"]
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @classmethod
+    def build(cls, addresses: Iterable[Tuple[str, float, float]]) -> "AddressIndex":
+        """
+        Build the index of a list of addresses
+
+        Args:
+            addresses: (address, longitude, latitude) triples; an address whose
+                normalized form was already seen is ignored
+
+        Returns:
+            AddressIndex instance
+        """
+        positions: Dict[str, Tuple[float, float]] = {}
+        for address, lon, lat in addresses:
+            key = normalize_address(address)
+            if key:
+                positions.setdefault(key, (lon, lat))
+
+        keys = sorted(positions)
+        coordinates = np.array(
+            [positions[key] for key in keys], dtype=np.float64
+        ).reshape(-1, 2)
+
+        rows_by_token: Dict[str, List[int]] = {}
+        token_counts = np.empty(len(keys), dtype=np.uint16)
+        for row, key in enumerate(keys):
+            tokens = set(key.split())
+            token_counts[row] = len(tokens)
+            for token in tokens:
+                rows_by_token.setdefault(token, []).append(row)
+        vocabulary = sorted(rows_by_token)
+
+        key_blob, key_offsets = _pack(keys)
+        token_blob, token_offsets = _pack(vocabulary)
+        posting_offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(
+            [len(rows_by_token[token]) for token in vocabulary],
+            out=posting_offsets[1:],
+        )
+        postings = np.fromiter(
+            (row for token in vocabulary for row in rows_by_token[token]),
+            dtype=np.int32,
+            count=int(posting_offsets[-1]),
+        )
+
+        return cls(
+            {
+                "key_blob": key_blob,
+                "key_offsets": key_offsets,
+                "lon": coordinates[:, 0].copy(),
+                "lat": coordinates[:, 1].copy(),
+                "token_counts": token_counts,
+                "token_blob": token_blob,
+                "token_offsets": token_offsets,
+                "posting_offsets": posting_offsets,
+                "postings": postings,
+            }
+        )
+
+    @classmethod
+    def from_ban_csv(cls, path: Path) -> "AddressIndex":
+        """Build the index of a BAN CSV extract (adresses-*.csv, optionally gzipped)"""
+        return cls.build(read_ban_csv(Path(path)))
+
+    @classmethod
+    def load(cls, path: Path) -> "AddressIndex":
+        """
+        Memory-map an index written by `save`
+
+        Raises:
+            FileNotFoundError: If the file does not exist
+            ValueError: If the file is not an address index of this version
+        """
+        index = read_column_file(Path(path), _MAGIC, ADDRESS_INDEX_FORMAT_VERSION)
+        if index is None:
+            raise ValueError(f"{path} was built by another version, rebuild it")
+        _, columns = index
+        return cls(columns)
+
+    def save(self, path: Path) -> None:
+        """Write the index to a file, replacing any previous one atomically"""
+        write_column_file(
+            Path(path),
+            _MAGIC,
+            {"version": ADDRESS_INDEX_FORMAT_VERSION},
+            {name: self.columns[name] for name in _COLUMNS},
+        )
+
+    def search(
+        self, address: str, min_score: float = DEFAULT_MIN_SCORE
+    ) -> Optional[AddressMatch]:
+        """
+        Find the indexed address best matching a query
+
+        Args:
+            address: Address string as typed by the user
+            min_score: Score between 0 and 1 a fuzzy match needs to be returned
+
+        Returns:
+            The exact match (score 1), else the best fuzzy match scoring at least
+            `min_score`, or None
+        """
+        key = normalize_address(address)
+        if not key or not len(self):
+            return None
+
+        row = self.keys.find(key.encode("utf-8"))
+        if row is not None:
+            return self._match(row, 1.0)
+        return self._fuzzy_search(key, min_score)
+
+    def _fuzzy_search(self, key: str, min_score: float) -> Optional[AddressMatch]:
+        """Best match of a normalized address by weighted word overlap"""
+        tokens = list(dict.fromkeys(key.split()))
+        postings = [self._postings(token) for token in tokens]
+        frequencies = [
+            sum(len(p) for p in token_postings) for token_postings in postings
+        ]
+        # Smoothed inverse document frequency: unknown words weigh the most
+        weights = [math.log((len(self) + 1) / (f + 1)) + 1 for f in frequencies]
+
+        candidates = []
+        budget = MAX_CANDIDATES
+        for position in np.argsort(frequencies, kind="stable"):
+            if not frequencies[position]:
+                continue
+            if budget <= 0:
+                break
+            for token_postings in postings[position]:
+                if budget <= 0:
+                    break
+                candidates.append(token_postings[:budget])
+                budget -= len(candidates[-1])
+        if not candidates:
+            return None
+        candidates = np.sort(np.concatenate(candidates))
+        candidates = candidates[np.append(True, candidates[1:] != candidates[:-1])]
+
+        matched_weight = np.zeros(len(candidates))
+        matched_count = np.zeros(len(candidates))
+        for token_postings, weight in zip(postings, weights):
+            found = np.zeros(len(candidates), dtype=bool)
+            for rows in token_postings:
+                positions = np.minimum(np.searchsorted(rows, candidates), len(rows) - 1)
+                found |= rows[positions] == candidates
+            matched_weight += found * weight
+            matched_count += found
+
+        recall = matched_weight / sum(weights)
+        precision = np.minimum(1.0, matched_count / self.token_counts[candidates])
+        scores = np.minimum(recall, precision)
+        best = int(np.argmax(scores))
+        if scores[best] < min_score:
+            return None
+        return self._match(int(candidates[best]), float(scores[best]))
+
+    def _postings(self, token: str) -> List[np.ndarray]:
+        """Sorted rows containing a word, or the words it starts when long enough"""
+        encoded = token.encode("utf-8")
+        if len(token) >= MIN_PREFIX_LENGTH:
+            positions = self.tokens.prefixed(encoded)[:MAX_PREFIX_EXPANSIONS]
+        else:
+            position = self.tokens.find(encoded)
+            positions = [] if position is None else [position]
+        return [
+            self.postings[self.posting_offsets[p] : self.posting_offsets[p + 1]]
+            for p in positions
+        ]
+
+    def _match(self, row: int, score: float) -> AddressMatch:
+        return AddressMatch(
+            address=self.keys[row].decode("utf-8"),
+            latitude=float(self.lat[row]),
+            longitude=float(self.lon[row]),
+            score=score,
+        )
+
+
+def read_ban_csv(path: Path) -> Iterator[Tuple[str, float, float]]:
+    """
+    Addresses of a BAN CSV extract, as published on adresse.data.gouv.fr
+
+    Yields:
+        (address, longitude, latitude) triples, the address being made of the number
+        with its suffix, street, postcode and city
+    """
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rt", encoding="utf-8", newline="") as file:
+        for row in csv.DictReader(file, delimiter=";"):
+            try:
+                lon, lat = float(row["lon"]), float(row["lat"])
+            except (TypeError, ValueError):
+                continue
+            parts = (
+                row["numero"],
+                row.get("rep"),
+                row["nom_voie"],
+                row["code_postal"],
+                row["nom_commune"],
+            )
+            yield " ".join(part for part in parts if part), lon, lat
+
+
+def _pack(strings: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Concatenate strings as UTF-8, with the offset of each one and the end"""
+    encoded = [string.encode("utf-8") for string in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Build the offline geocoding index from a BAN CSV extract"""
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("source", help="BAN CSV extract, e.g. adresses-75.csv.gz")
+    parser.add_argument(
+        "--output", default=settings.geocoding_local_index or "addresses.idx"
+    )
+    args = parser.parse_args(argv)
+
+    index = AddressIndex.from_ban_csv(Path(args.source))
+    index.save(Path(args.output))
+    print(
+        f"Wrote {len(index)} addresses and {len(index.tokens)} words to {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import json
+import os
+import struct
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, Optional, Tuple
+import numpy as np
+
+# Column data starts on a multiple of this, so memory-mapped arrays are aligned
+ALIGNMENT = 64
+
+
+def write_column_file(
+    path: Path, magic: bytes, header: dict, columns: Dict[str, np.ndarray]
+) -> None:
+    """
+    Write one-dimensional arrays as raw, aligned columns after a JSON header, replacing
+    any previous file atomically
+
+    Args:
+        path: File to write
+        magic: Bytes identifying the kind of file, checked on read
+        header: JSON serializable metadata, stored with the column layout
+        columns: Arrays by name
+    """
+    layout, offset = {}, 0
+    for name, column in columns.items():
+        layout[name] = [column.dtype.str, offset, len(column)]
+        offset = _aligned(offset + column.nbytes)
+    encoded = json.dumps({**header, "columns": layout}).encode("utf-8")
+
+    def write(file: BinaryIO) -> None:
+        file.write(magic + struct.pack("<I", len(encoded)) + encoded)
+        data_start = _aligned(file.tell())
+        for name, column in columns.items():
+            file.write(b"\0" * (data_start + layout[name][1] - file.tell()))
+            file.write(np.ascontiguousarray(column).tobytes())
+
+    write_atomically(path, write)
+
+
+def read_column_file(
+    path: Path, magic: bytes, version: int
+) -> Optional[Tuple[dict, Dict[str, np.ndarray]]]:
+    """
+    Memory-map the columns of a file written by `write_column_file`
+
+    The arrays are read-only views of the file: nothing is read until used, and
+    processes mapping the same file share its pages through the OS page cache.
+
+    Args:
+        path: File to read
+        magic: Bytes identifying the expected kind of file
+        version: Expected format version, from the "version" entry of the header
+
+    Returns:
+        Tuple of (header, arrays by name), or None when the file has another version
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+        ValueError: If the file is not of this kind, or truncated
+    """
+    with open(path, "rb") as file:
+        prefix = file.read(len(magic) + 4)
+        if len(prefix) < len(magic) + 4 or not prefix.startswith(magic):
+            raise ValueError(f"{path} is not a {magic.rstrip(bytes(1)).decode()} file")
+        (length,) = struct.unpack("<I", prefix[len(magic) :])
+        header = json.loads(file.read(length).decode("utf-8"))
+        data_start = _aligned(file.tell())
+
+    if header.get("version") != version:
+        return None
+
+    columns = {}
+    for name, (dtype, offset, length) in header.pop("columns").items():
+        columns[name] = (
+            np.memmap(
+                path, dtype=dtype, mode="r", offset=data_start + offset, shape=length
+            )
+            if length
+            else np.empty(0, dtype=dtype)
+        )
+    return header, columns
+
+
+def write_atomically(path: Path, write: Callable[[BinaryIO], None]) -> None:
+    """Write a file through a temporary file renamed over it once complete"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    descriptor, temporary = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            write(file)
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def _aligned(offset: int) -> int:
+    """Round an offset up to the column alignment"""
+    return -(-offset // ALIGNMENT) * ALIGNMENT
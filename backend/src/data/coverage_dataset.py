@@ -0,0 +1,23 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+from src.data.coverage_grid import CoverageGrid
+from src.data.tower_index import TowerIndex
+from src.data.tower_store import TowerStore
+
+
+@dataclass(frozen=True)
+class CoverageDataset:
+    """
+    One version of the tower data with its lookup structures
+
+    A lookup reads every structure from the dataset it started with, so replacing the
+    current dataset with a newly loaded one never mixes versions or exposes a partially
+    loaded state: in-flight lookups finish against the dataset they picked.
+    """
+
+    version: str
+    store: TowerStore
+    index: TowerIndex
+    grid: Optional[CoverageGrid]
+    loaded_at: datetime
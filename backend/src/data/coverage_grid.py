@@ -0,0 +1,240 @@
+import argparse
+import math
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+import numpy as np
+from src.data.column_file import read_column_file, write_column_file
+from src.data.tower_index import PLANAR_GUARD_BAND, TowerIndex
+from src.data.tower_store import TowerStore
+
+# Bumped whenever the file layout changes, so stale grids are rebuilt
+GRID_FORMAT_VERSION = 2
+
+_MAGIC = b"NCCGRID\x00"
+
+DEFAULT_CELL_SIZE_M = 500.0
+
+# Vectorized Lambert93 -> GPS projection (xs, ys) -> (lons, lats)
+UnprojectFunction = Callable[[np.ndarray, np.ndarray], Tuple[np.ndarray, np.ndarray]]
+
+
+@dataclass(frozen=True)
+class CoverageGrid:
+    """
+    Precomputed coverage flags on a regular Lambert93 grid
+
+    Each cell stores, for every slot of the tower index (operator x ANY_NETWORK/2G/3G/4G),
+    whether any point of the cell has a tower within the slot radius, bit-packed in
+    `flags`. Cells crossed by a radius boundary cannot be answered for the whole cell:
+    they are marked in `undecided` and looked up with the exact index instead, so the
+    grid gives the same answers as the index, with array indexing for most points.
+
+    Saved as raw columns and memory-mapped on load, so server processes share it.
+    """
+
+    origin_x: float
+    origin_y: float
+    cell_size_m: float
+    flags: np.ndarray
+    undecided: np.ndarray
+    slots: Tuple[str, ...]
+    radii_km: Tuple[float, ...]
+    fingerprint: str
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        """Number of (rows, columns) of the grid"""
+        return self.undecided.shape
+
+    @classmethod
+    def build(
+        cls,
+        store: TowerStore,
+        index: TowerIndex,
+        unproject: UnprojectFunction,
+        cell_size_m: float = DEFAULT_CELL_SIZE_M,
+        rows_per_chunk: int = 64,
+    ) -> "CoverageGrid":
+        """
+        Classify every cell of a grid covering the towers and their largest radius
+
+        Args:
+            store: Columnar tower data the index was built from
+            index: Tower index to classify cells with
+            unproject: Vectorized Lambert93 to GPS projection of cell centers
+            cell_size_m: Side of a cell in meters
+            rows_per_chunk: Number of grid rows classified at once
+
+        Returns:
+            CoverageGrid instance
+        """
+        # Cells beyond this margin are out of range of every tower
+        margin = index.max_radius_km * 1000 * (1 + PLANAR_GUARD_BAND) + cell_size_m
+        if len(store):
+            min_x, max_x = float(store.x.min()) - margin, float(store.x.max()) + margin
+            min_y, max_y = float(store.y.min()) - margin, float(store.y.max()) + margin
+        else:
+            min_x = max_x = min_y = max_y = 0.0
+        cols = max(math.ceil((max_x - min_x) / cell_size_m), 1)
+        rows = max(math.ceil((max_y - min_y) / cell_size_m), 1)
+
+        # Great circle bound of the distance between a cell center and its corners
+        half_diagonal_km = cell_size_m * math.sqrt(2) / 2 / 1000
+        disc_radius_km = half_diagonal_km * (1 + PLANAR_GUARD_BAND)
+
+        slot_count = len(index.slots)
+        flags = np.zeros((rows, cols, (slot_count + 7) // 8), dtype=np.uint8)
+        undecided = np.zeros((rows, cols), dtype=bool)
+        centers_x = min_x + (np.arange(cols) + 0.5) * cell_size_m
+
+        for start in range(0, rows, rows_per_chunk):
+            stop = min(start + rows_per_chunk, rows)
+            centers_y = min_y + (np.arange(start, stop) + 0.5) * cell_size_m
+            xs, ys = np.meshgrid(centers_x, centers_y)
+            lons, lats = unproject(xs.ravel(), ys.ravel())
+
+            within, unknown = index.classify_discs(lats, lons, disc_radius_km)
+            flags[start:stop] = np.packbits(within, axis=1, bitorder="little").reshape(
+                stop - start, cols, -1
+            )
+            undecided[start:stop] = unknown.any(axis=1).reshape(stop - start, cols)
+
+        return cls(
+            origin_x=min_x,
+            origin_y=min_y,
+            cell_size_m=float(cell_size_m),
+            flags=flags,
+            undecided=undecided,
+            slots=_slot_names(index),
+            radii_km=tuple(slot.radius_km for slot in index.slots),
+            fingerprint=store.fingerprint(),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "CoverageGrid":
+        """
+        Memory-map a grid saved with `save`
+
+        The cell arrays are read-only views of the file, shared by every process
+        serving from it.
+
+        Raises:
+            FileNotFoundError: If the file does not exist
+            ValueError: If the file is not a grid, or was written with another format
+                version
+        """
+        grid = read_column_file(Path(path), _MAGIC, GRID_FORMAT_VERSION)
+        if grid is None:
+            raise ValueError(
+                f"Coverage grid {path} was written with another format version, "
+                f"expected {GRID_FORMAT_VERSION}"
+            )
+        header, columns = grid
+        rows, cols = header["shape"]
+        return cls(
+            origin_x=header["origin_x"],
+            origin_y=header["origin_y"],
+            cell_size_m=header["cell_size_m"],
+            flags=columns["flags"].reshape(rows, cols, -1),
+            undecided=columns["undecided"].reshape(rows, cols),
+            slots=tuple(header["slots"]),
+            radii_km=tuple(header["radii_km"]),
+            fingerprint=header["fingerprint"],
+        )
+
+    def save(self, path: str) -> None:
+        """Write the grid as raw columns, replacing any previous one atomically"""
+        write_column_file(
+            Path(path),
+            _MAGIC,
+            {
+                "version": GRID_FORMAT_VERSION,
+                "origin_x": self.origin_x,
+                "origin_y": self.origin_y,
+                "cell_size_m": self.cell_size_m,
+                "shape": list(self.shape),
+                "slots": list(self.slots),
+                "radii_km": list(self.radii_km),
+                "fingerprint": self.fingerprint,
+            },
+            {"flags": self.flags.ravel(), "undecided": self.undecided.ravel()},
+        )
+
+    def matches(self, store: TowerStore, index: TowerIndex) -> bool:
+        """Whether the grid was built from these towers, radii and index layout"""
+        return (
+            self.fingerprint == store.fingerprint()
+            and self.slots == _slot_names(index)
+            and self.radii_km == tuple(slot.radius_km for slot in index.slots)
+        )
+
+    def lookup(self, xs: np.ndarray, ys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Per-slot coverage flags of the cells containing Lambert93 points
+
+        Args:
+            xs: Lambert93 x of each point, in meters
+            ys: Lambert93 y of each point, in meters
+
+        Returns:
+            Tuple of (flags of shape (points, slots), decided mask of shape (points,)).
+            Points outside the grid or in an undecided cell are not decided and their
+            flags must be looked up in the index.
+        """
+        xs = np.asarray(xs, dtype=np.float64)
+        ys = np.asarray(ys, dtype=np.float64)
+        rows_count, cols_count = self.shape
+        within = np.zeros((len(xs), len(self.slots)), dtype=bool)
+        decided = np.zeros(len(xs), dtype=bool)
+
+        cols = np.floor((xs - self.origin_x) / self.cell_size_m)
+        rows = np.floor((ys - self.origin_y) / self.cell_size_m)
+        inside = (cols >= 0) & (cols < cols_count) & (rows >= 0) & (rows < rows_count)
+        if not inside.any():
+            return within, decided
+
+        rows = rows[inside].astype(np.intp)
+        cols = cols[inside].astype(np.intp)
+        within[inside] = np.unpackbits(
+            self.flags[rows, cols], axis=1, count=len(self.slots), bitorder="little"
+        ).astype(bool)
+        decided[inside] = ~self.undecided[rows, cols]
+        return within, decided
+
+
+def _slot_names(index: TowerIndex) -> Tuple[str, ...]:
+    """Names of the index slots, as stored in the grid file"""
+    return tuple(f"{slot.operator}/{slot.key}" for slot in index.slots)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Build the coverage grid from the configured tower dataset"""
+    # Imported here: the coverage service itself loads grids from this module
+    from src.config import get_settings
+    from src.services.coverage_service import CoverageService
+
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--output", default=settings.coverage_grid_path)
+    parser.add_argument("--cell-size", type=float, default=DEFAULT_CELL_SIZE_M)
+    args = parser.parse_args(argv)
+
+    service = CoverageService(settings)
+    grid = CoverageGrid.build(
+        service.tower_store,
+        service.tower_index,
+        service.coordinate_service.lambert93_to_gps_many,
+        cell_size_m=args.cell_size,
+    )
+    grid.save(args.output)
+
+    rows, cols = grid.shape
+    print(
+        f"Wrote {rows}x{cols} cells of {grid.cell_size_m:g} m to {args.output}, "
+        f"{grid.undecided.mean():.1%} undecided"
+    )
+
+
+if __name__ == "__main__":
+    main()
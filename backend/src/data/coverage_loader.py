@@ -1,41 +1,171 @@
 import csv
+import logging
+import threading
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Optional
+from src.data.snapshot import DatasetSnapshot, SourceFingerprint
+from src.data.tower_index import TowerIndex
+from src.data.tower_store import TowerStore, network_bits
 from src.models.records import CoverageRecord
+from src.services.coordinate_service import CoordinateService
+
+logger = logging.getLogger(__name__)
 
 
 class CoverageDataLoader:
-    """Loads and manages coverage data from CSV file"""
+    """
+    Loads and manages coverage data from CSV file
+
+    When a snapshot directory is given, the parsed towers and their spatial index are
+    saved there as a binary snapshot, and later loads of the same CSV content map the
+    snapshot instead of parsing the file again. Loaders of several processes share the
+    mapped snapshot, and only one of them builds it when it is missing.
+    """
 
-    def __init__(self, csv_path: str):
+    def __init__(
+        self,
+        csv_path: str,
+        coordinate_service: Optional[CoordinateService] = None,
+        snapshot_dir: Optional[str] = None,
+    ):
         self.csv_path = Path(csv_path)
-        self._data: List[CoverageRecord] = []
+        self.coordinate_service = coordinate_service or CoordinateService()
+        self.snapshot = (
+            DatasetSnapshot(self.csv_path, Path(snapshot_dir))
+            if snapshot_dir is not None
+            else None
+        )
+        self._store: Optional[TowerStore] = None
+        self._records: Optional[List[CoverageRecord]] = None
         self._loaded = False
+        # Loads may race between a warmup thread and the first requests: parse once
+        self._lock = threading.RLock()
 
-    def load_data(self) -> List[CoverageRecord]:
-        """Load coverage data from CSV file"""
+    def load_store(self) -> TowerStore:
+        """Load coverage data from CSV file into columnar storage, projected to GPS"""
         if self._loaded:
-            return self._data
+            return self._store
+
+        with self._lock:
+            if self._loaded:
+                return self._store
+
+            self._store = self._read_store()
+            self._records = None
+            self._loaded = True
+            return self._store
+
+    def load_index(self, radii_km: Dict[str, float]) -> TowerIndex:
+        """
+        Spatial index over the loaded towers, restored from the snapshot when it was
+        built from the same towers and radii
+
+        Args:
+            radii_km: Coverage radius in kilometers by network generation
+
+        Returns:
+            TowerIndex instance
+        """
+        store = self.load_store()
+        distances = self.coordinate_service.calculate_distances
+        project = self.coordinate_service.gps_to_lambert93_many
+        model = self.coordinate_service.distance_model
+
+        if self.snapshot is None:
+            return TowerIndex.build(store, radii_km, distances, project, model)
+
+        index = self.snapshot.load_index(store, radii_km, distances, project, model)
+        if index is None:
+            with self.snapshot.lock():
+                # Another process may have built it while this one waited
+                index = self.snapshot.load_index(
+                    store, radii_km, distances, project, model
+                )
+                if index is None:
+                    index = TowerIndex.build(store, radii_km, distances, project, model)
+                    self._save_snapshot(self.snapshot.save_index, store, index)
+                    # Map the saved snapshot, shared with other processes
+                    index = (
+                        self.snapshot.load_index(
+                            store, radii_km, distances, project, model
+                        )
+                        or index
+                    )
+        return index
+
+    def load_data(self) -> List[CoverageRecord]:
+        """
+        Load coverage data as a list of records
+
+        Compatibility accessor for code iterating records: the list is materialized from
+        the columnar store on first access, prefer `load_store` for lookups.
+        """
+        store = self.load_store()
+        with self._lock:
+            if self._records is None:
+                self._records = list(store.records())
+            return self._records
+
+    def _read_store(self) -> TowerStore:
+        """Map the snapshot of the CSV file if it is current, parse the file otherwise"""
+        if self.snapshot is None:
+            return self._parse_csv()
+
+        # Fingerprint before parsing, so a CSV replaced meanwhile is not masked
+        source = SourceFingerprint.of(self.csv_path)
+        store = self.snapshot.load_store(source)
+        if store is None:
+            with self.snapshot.lock():
+                # Another process may have parsed it while this one waited
+                store = self.snapshot.load_store(source)
+                if store is None:
+                    store = self._parse_csv()
+                    self._save_snapshot(self.snapshot.save_store, store, source)
+                    # Map the saved snapshot, shared with other processes
+                    store = self.snapshot.load_store(source) or store
+        return store
+
+    def _parse_csv(self) -> TowerStore:
+        """Parse the CSV file into a tower store"""
+        operators = {}
+        operator_codes, x, y, networks = [], [], [], []
 
         with open(self.csv_path, "r", encoding="utf-8") as file:
             reader = csv.DictReader(file)
 
             for row in reader:
-                record = CoverageRecord(
-                    operator=row["Operateur"],
-                    x=int(row["x"]),
-                    y=int(row["y"]),
-                    network_2g=int(row["2G"]),
-                    network_3g=int(row["3G"]),
-                    network_4g=int(row["4G"]),
+                operator_codes.append(
+                    operators.setdefault(row["Operateur"], len(operators))
+                )
+                x.append(int(row["x"]))
+                y.append(int(row["y"]))
+                networks.append(
+                    network_bits(int(row["2G"]), int(row["3G"]), int(row["4G"]))
                 )
-                self._data.append(record)
 
-        self._loaded = True
-        return self._data
+        lon, lat = self.coordinate_service.lambert93_to_gps_many(x, y)
+        return TowerStore.from_columns(
+            operators, operator_codes, x, y, networks, lon, lat
+        )
+
+    def _save_snapshot(self, save, *args) -> None:
+        """Write part of the snapshot; the data stays usable if the directory is not"""
+        try:
+            save(*args)
+        except OSError as e:
+            logger.warning(f"Could not write dataset snapshot for {self.csv_path}: {e}")
 
     def reload(self) -> List[CoverageRecord]:
-        """Force reload data from CSV file, discarding any cached data"""
-        self._loaded = False
-        self._data.clear()
-        return self.load_data()
+        """
+        Force reload data from CSV file, discarding any cached data
+
+        The file is read before the cached data is replaced, so concurrent readers keep
+        getting the previous data until the new one is complete.
+        """
+        store = self._read_store()
+        records = list(store.records())
+        with self._lock:
+            self._store = store
+            self._records = records
+            self._loaded = True
+        return records
@@ -0,0 +1,268 @@
+import hashlib
+import logging
+import os
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+import numpy as np
+from scipy.spatial import cKDTree
+from src.data.column_file import read_column_file, write_column_file
+from src.data.tower_index import (
+    DistancesFunction,
+    ProjectFunction,
+    TowerIndex,
+    TowerSlot,
+)
+from src.data.tower_store import TowerStore
+from src.services.coordinate_service import EQUIRECTANGULAR, DistanceModel
+
+try:
+    import fcntl
+except ImportError:  # Windows: snapshots are built without coordination
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Bumped whenever the file layouts change, so stale snapshots are rebuilt
+SNAPSHOT_FORMAT_VERSION = 3
+
+_MAGIC = b"NCCSNAP\x00"
+_INDEX_MAGIC = b"NCCSIDX\x00"
+_STORE_COLUMNS = ("operator_codes", "x", "y", "networks", "lon", "lat")
+
+
+@dataclass(frozen=True)
+class SourceFingerprint:
+    """Size, modification time and content digest of the CSV a snapshot was parsed from"""
+
+    size: int
+    mtime_ns: int
+    sha256: str
+
+    @classmethod
+    def of(cls, path: Path) -> "SourceFingerprint":
+        """
+        Fingerprint a file
+
+        Raises:
+            FileNotFoundError: If the file does not exist
+        """
+        stat = os.stat(path)
+        digest = hashlib.sha256()
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(1 << 20), b""):
+                digest.update(chunk)
+        return cls(
+            size=stat.st_size, mtime_ns=stat.st_mtime_ns, sha256=digest.hexdigest()
+        )
+
+    def matches(self, other: "SourceFingerprint") -> bool:
+        """
+        Whether both fingerprints are of the same content
+
+        The modification time is informative only: a copied or re-extracted CSV gets a
+        new one while its content, and the snapshot parsed from it, are still valid.
+        """
+        return self.size == other.size and self.sha256 == other.sha256
+
+
+class DatasetSnapshot:
+    """
+    Binary snapshot of a parsed tower dataset, reused across process starts
+
+    The tower store is written as one file of raw, aligned columns described by a JSON
+    header, and memory-mapped read-only on load: parsing is skipped, and processes
+    loading the same snapshot share its pages through the OS page cache. The tower
+    index is saved the same way in a second file, keyed by the store it was built from
+    and its radii: the tower ids and positions of every slot, which its KD-trees are
+    rebuilt over without copying them.
+
+    Several processes starting together (server workers) build a missing snapshot once:
+    the first one holds `lock` while building, and the others then map its files.
+    """
+
+    def __init__(self, csv_path: Path, directory: Optional[Path] = None):
+        directory = Path(directory) if directory is not None else csv_path.parent
+        self.store_path = directory / f"{csv_path.name}.store"
+        self.index_path = directory / f"{csv_path.name}.index"
+        self.lock_path = directory / f"{csv_path.name}.lock"
+
+    @contextmanager
+    def lock(self) -> Iterator[None]:
+        """
+        Hold an exclusive lock on the snapshot, across processes, while building it
+
+        Without a writable directory, or on systems without `flock`, nothing is locked
+        and concurrent processes may each build the snapshot.
+        """
+        if fcntl is None:
+            yield
+            return
+        try:
+            self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+            file = open(self.lock_path, "a")
+        except OSError as e:
+            logger.warning(f"Could not lock dataset snapshot {self.lock_path}: {e}")
+            yield
+            return
+        with file:
+            fcntl.flock(file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(file, fcntl.LOCK_UN)
+
+    def load_store(self, source: SourceFingerprint) -> Optional[TowerStore]:
+        """
+        Memory-map the snapshot store, if it was parsed from this CSV content
+
+        Args:
+            source: Fingerprint of the current CSV
+
+        Returns:
+            TowerStore backed by the snapshot file, or None when missing or stale
+        """
+        try:
+            snapshot = read_column_file(
+                self.store_path, _MAGIC, SNAPSHOT_FORMAT_VERSION
+            )
+            if snapshot is None:
+                return None
+            header, columns = snapshot
+            if not source.matches(SourceFingerprint(**header["source"])):
+                return None
+            return TowerStore.from_columns(
+                header["operators"], **{name: columns[name] for name in _STORE_COLUMNS}
+            )
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable snapshot {self.store_path}: {e}")
+            return None
+
+    def save_store(self, store: TowerStore, source: SourceFingerprint) -> None:
+        """
+        Write the store snapshot for a CSV, replacing any previous one atomically
+
+        Args:
+            store: Tower store parsed from the CSV
+            source: Fingerprint of the CSV, taken before parsing it
+        """
+        write_column_file(
+            self.store_path,
+            _MAGIC,
+            {
+                "version": SNAPSHOT_FORMAT_VERSION,
+                "source": asdict(source),
+                "operators": list(store.operators),
+            },
+            {name: getattr(store, name) for name in _STORE_COLUMNS},
+        )
+
+    def load_index(
+        self,
+        store: TowerStore,
+        radii_km: Dict[str, float],
+        distances: DistancesFunction,
+        project: ProjectFunction,
+        model: DistanceModel = EQUIRECTANGULAR,
+    ) -> Optional[TowerIndex]:
+        """
+        Restore the prebuilt tower index, if it was built from this store and radii
+
+        Args:
+            store: Tower store the index must cover
+            radii_km: Coverage radius in kilometers by network generation
+            distances: Vectorized great circle distance function, in km
+            project: Vectorized GPS to Lambert93 projection of query points
+            model: Distance model deciding ranges away from the radii
+
+        Returns:
+            TowerIndex instance, or None when missing or stale
+        """
+        try:
+            snapshot = read_column_file(
+                self.index_path, _INDEX_MAGIC, SNAPSHOT_FORMAT_VERSION
+            )
+            if snapshot is None:
+                return None
+            header, columns = snapshot
+            if header["fingerprint"] != store.fingerprint() or header[
+                "radii_km"
+            ] != dict(radii_km):
+                return None
+            slots = _slots_from_columns(header["slots"], columns)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable snapshot {self.index_path}: {e}")
+            return None
+
+        return TowerIndex.from_slots(store, radii_km, distances, project, slots, model)
+
+    def save_index(self, store: TowerStore, index: TowerIndex) -> None:
+        """Write the tower index snapshot, replacing any previous one atomically"""
+        slots = [
+            {
+                "operator": slot.operator,
+                "key": slot.key,
+                "radius_km": slot.radius_km,
+                "towers": len(slot.ids),
+            }
+            for slot in index.slots
+        ]
+        empty = np.empty((0, 2), dtype=np.float64)
+        write_column_file(
+            self.index_path,
+            _INDEX_MAGIC,
+            {
+                "version": SNAPSHOT_FORMAT_VERSION,
+                "fingerprint": store.fingerprint(),
+                "radii_km": dict(index.radii_km),
+                "slots": slots,
+            },
+            {
+                "ids": np.concatenate(
+                    [np.asarray(slot.ids, dtype=np.int64) for slot in index.slots]
+                    or [np.empty(0, dtype=np.int64)]
+                ),
+                "points": np.concatenate(
+                    [
+                        slot.tree.data if slot.tree is not None else empty
+                        for slot in index.slots
+                    ]
+                    or [empty]
+                ).ravel(),
+            },
+        )
+
+
+def _slots_from_columns(
+    slots: List[dict], columns: Dict[str, np.ndarray]
+) -> List[TowerSlot]:
+    """
+    Index slots over the memory-mapped tower ids and positions of an index snapshot
+
+    The KD-trees reference the mapped positions rather than copying them; only their
+    nodes are built in memory.
+    """
+    points = columns["points"].reshape(-1, 2)
+    restored, start = [], 0
+    for slot in slots:
+        stop = start + slot["towers"]
+        restored.append(
+            TowerSlot(
+                operator=slot["operator"],
+                key=slot["key"],
+                tree=(
+                    cKDTree(points[start:stop], copy_data=False, balanced_tree=False)
+                    if stop > start
+                    else None
+                ),
+                ids=columns["ids"][start:stop],
+                radius_km=slot["radius_km"],
+            )
+        )
+        start = stop
+    return restored
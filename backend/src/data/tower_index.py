@@ -0,0 +1,429 @@
+import math
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from scipy.spatial import cKDTree
+from src.data.tower_store import TowerStore
+from src.services.coordinate_service import (
+    EARTH_RADIUS_KM,
+    EQUIRECTANGULAR,
+    PLANAR,
+    DistanceModel,
+)
+
+# Key used for the per-operator tree holding every tower, whatever its generations
+ANY_NETWORK = "any"
+
+# Relative band around each radius where planar Lambert93 distances are not trusted:
+# towers closer than R * (1 - band) are always in range, towers farther than
+# R * (1 + band) never are (see `PLANAR`). The KD-trees are planar, so candidates are
+# searched up to R * (1 + band) whatever the distance model.
+PLANAR_GUARD_BAND = PLANAR.guard_band
+
+# Towers looked up per disc and slot by `TowerIndex.classify_discs`
+DISC_NEIGHBOURS = 16
+
+# Vectorized great circle distance (lat1, lon1, lat2, lon2) -> km, broadcasting its inputs
+DistancesFunction = Callable[..., np.ndarray]
+
+# Vectorized GPS -> Lambert93 projection (lons, lats) -> (xs, ys) in meters
+ProjectFunction = Callable[[np.ndarray, np.ndarray], Tuple[np.ndarray, np.ndarray]]
+
+
+@dataclass
+class TowerSlot:
+    """KD-tree over the towers of an operator providing a key (generation or any)"""
+
+    operator: str
+    key: str
+    tree: Optional[cKDTree]
+    ids: np.ndarray
+    radius_km: float
+
+
+class TowerIndex:
+    """
+    Spatial index answering "is there a tower within R km" for each operator and network
+    generation, built once from the tower store
+
+    Towers are indexed by their Lambert93 position in meters and query points are
+    projected once. The nearest tower of each operator and generation is looked up in
+    its own KD-tree, and its range decided with a cheaper distance model than haversine
+    (see `DistanceModel`). Only towers within the guard band of the model around a
+    radius are confirmed with the haversine distance, which gives the same answer as a
+    full haversine scan.
+    """
+
+    def __init__(
+        self,
+        store: TowerStore,
+        radii_km: Dict[str, float],
+        distances: DistancesFunction,
+        project: ProjectFunction,
+        model: DistanceModel = EQUIRECTANGULAR,
+    ):
+        self.radii_km = dict(radii_km)
+        self.max_radius_km = max(self.radii_km.values())
+        self.operators: List[str] = []
+        self._x = store.x.astype(np.float64)
+        self._y = store.y.astype(np.float64)
+        self._lats = store.lat
+        self._lons = store.lon
+        self._distances = distances
+        self._project = project
+        self.model = model
+        self._extent = _extent(store, self.max_radius_km)
+        # One slot per operator and key (ANY_NETWORK then each generation), in order
+        self.slots: List[TowerSlot] = []
+
+    @classmethod
+    def build(
+        cls,
+        store: TowerStore,
+        radii_km: Dict[str, float],
+        distances: DistancesFunction,
+        project: ProjectFunction,
+        model: DistanceModel = EQUIRECTANGULAR,
+    ) -> "TowerIndex":
+        """
+        Build the index from the tower store
+
+        Args:
+            store: Columnar tower data
+            radii_km: Coverage radius in kilometers by network generation
+            distances: Vectorized great circle distance function, in km
+            project: Vectorized GPS to Lambert93 projection of query points
+            model: Distance model deciding ranges away from the radii
+
+        Returns:
+            TowerIndex instance
+        """
+        index = cls(store, radii_km, distances, project, model)
+        points = np.column_stack((index._x, index._y))
+        radii = {ANY_NETWORK: index.max_radius_km, **index.radii_km}
+
+        for code, operator in enumerate(store.operators):
+            operator = operator.lower()
+            index.operators.append(operator)
+            of_operator = store.operator_codes == code
+
+            for key, radius in radii.items():
+                mask = of_operator
+                if key != ANY_NETWORK:
+                    mask = mask & store.has_network(key)
+                ids = np.flatnonzero(mask)
+
+                index.slots.append(
+                    TowerSlot(
+                        operator=operator,
+                        key=key,
+                        tree=cKDTree(points[ids]) if len(ids) else None,
+                        ids=ids,
+                        radius_km=radius,
+                    )
+                )
+
+        return index
+
+    @classmethod
+    def from_slots(
+        cls,
+        store: TowerStore,
+        radii_km: Dict[str, float],
+        distances: DistancesFunction,
+        project: ProjectFunction,
+        slots: List[TowerSlot],
+        model: DistanceModel = EQUIRECTANGULAR,
+    ) -> "TowerIndex":
+        """
+        Rebuild an index around slots saved from a previous `build` over the same store
+
+        Args:
+            store: Columnar tower data the slots were built from
+            radii_km: Coverage radius in kilometers by network generation
+            distances: Vectorized great circle distance function, in km
+            project: Vectorized GPS to Lambert93 projection of query points
+            slots: Slots of the built index, in order
+            model: Distance model deciding ranges away from the radii
+
+        Returns:
+            TowerIndex instance
+        """
+        index = cls(store, radii_km, distances, project, model)
+        index.slots = list(slots)
+        index.operators = list(dict.fromkeys(slot.operator for slot in index.slots))
+        return index
+
+    def query(self, lat: float, lon: float) -> Dict[str, Dict[str, bool]]:
+        """
+        Coverage flags by operator for a GPS point
+
+        An operator is listed when at least one of its towers lies within the largest
+        radius, mirroring the behaviour of a full scan over the records.
+
+        Args:
+            lat: Latitude of the point
+            lon: Longitude of the point
+
+        Returns:
+            Dictionary mapping operator to {generation: covered}
+        """
+        return self.query_many([lat], [lon])[0]
+
+    def query_many(
+        self, lats: Sequence[float], lons: Sequence[float]
+    ) -> List[Dict[str, Dict[str, bool]]]:
+        """
+        Coverage flags by operator for several GPS points in one pass
+
+        Args:
+            lats: Latitude of each point
+            lons: Longitude of each point
+
+        Returns:
+            List with, for each point, a dictionary mapping operator to coverage flags
+        """
+        return self.coverage_from_flags(self.within_many(lats, lons))
+
+    def coverage_from_flags(
+        self, within: np.ndarray
+    ) -> List[Dict[str, Dict[str, bool]]]:
+        """
+        Convert per-slot flags, as returned by `within_many`, to coverage dictionaries
+
+        Args:
+            within: Boolean array of shape (points, slots)
+
+        Returns:
+            List with, for each point, a dictionary mapping operator to coverage flags
+        """
+        if not len(within):
+            return []
+
+        # Points share few distinct rows: each one is converted once, and points with
+        # the same flags share the dictionary
+        packed = np.ascontiguousarray(np.packbits(within, axis=1))
+        rows = packed.view(np.dtype((np.void, packed.shape[1]))).ravel()
+        _, firsts, inverse = np.unique(rows, return_index=True, return_inverse=True)
+
+        # One row per point, one block per operator: ANY_NETWORK then each generation
+        generations = list(self.radii_km)
+        flags = within[firsts].reshape(
+            len(firsts), len(self.operators), 1 + len(generations)
+        )
+
+        coverages = []
+        for point_flags in flags.tolist():
+            coverage = {}
+            for operator, (in_range, *covered) in zip(self.operators, point_flags):
+                if in_range:
+                    coverage[operator] = dict(zip(generations, covered))
+            coverages.append(coverage)
+        return [coverages[i] for i in inverse.ravel().tolist()]
+
+    def within_many(self, lats: Sequence[float], lons: Sequence[float]) -> np.ndarray:
+        """
+        For each point and index slot, whether a tower lies within the slot radius
+
+        Args:
+            lats: Latitude of each point
+            lons: Longitude of each point
+
+        Returns:
+            Boolean array of shape (points, slots)
+        """
+        return self.classify_points(lats, lons, 0.0)[0]
+
+    def classify_points(
+        self, lats: Sequence[float], lons: Sequence[float], margin_km: float
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        For each point and index slot, whether a tower lies within the slot radius, and
+        whether points within `margin_km` of it may get another answer
+
+        Around a point, the answer is known to hold when its nearest tower stays in
+        range from `margin_km` away, or when no tower is in range of any point that
+        close; otherwise the slot is flagged as undecided.
+
+        Args:
+            lats: Latitude of each point
+            lons: Longitude of each point
+            margin_km: Great circle distance around the points
+
+        Returns:
+            Tuple of boolean arrays of shape (points, slots): (within, undecided)
+        """
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        within = np.zeros((len(lats), len(self.slots)), dtype=bool)
+        undecided = np.zeros((len(lats), len(self.slots)), dtype=bool)
+
+        # Points away from the dataset extent have no tower in range, and fall outside
+        # the area where the planar guard band was measured; the extent is widened by
+        # twice the largest radius, so points within that radius of them have none either
+        inside = _in_extent(self._extent, lats, lons)
+        if not inside.any():
+            return within, undecided
+
+        lats, lons = lats[inside], lons[inside]
+        xs, ys = self._project(lons, lats)
+        points = np.column_stack((xs, ys))
+        radii_m = np.array([towers.radius_km * 1000 for towers in self.slots])
+        candidates = np.full((len(points), len(self.slots)), -1, dtype=np.int64)
+        planar = np.full((len(points), len(self.slots)), np.inf)
+
+        for slot, towers in enumerate(self.slots):
+            if towers.tree is None:
+                continue
+            planar[:, slot], nearest = towers.tree.query(
+                points,
+                k=1,
+                distance_upper_bound=(radii_m[slot] + margin_km * 1000)
+                * (1 + PLANAR_GUARD_BAND),
+            )
+            found = nearest < towers.tree.n
+            candidates[found, slot] = towers.ids[nearest[found]]
+
+        found = candidates >= 0
+        tower_ids = np.where(found, candidates, 0)
+        distances = self._model_distances(
+            lats[:, np.newaxis],
+            lons[:, np.newaxis],
+            xs[:, np.newaxis],
+            ys[:, np.newaxis],
+            tower_ids,
+        )
+        inner = found & (distances <= radii_m / 1000 * (1 - self.model.guard_band))
+        steady = ~found | (
+            distances * (1 + self.model.guard_band) + margin_km <= radii_m / 1000
+        )
+
+        # Nearest tower not surely in range: check every candidate, with haversine for
+        # those within the guard band
+        reachable = planar <= radii_m * (1 + PLANAR_GUARD_BAND)
+        for point, slot in zip(*np.nonzero(reachable & ~inner)):
+            towers = self.slots[slot]
+            nearby = towers.tree.query_ball_point(
+                points[point], radii_m[slot] * (1 + PLANAR_GUARD_BAND)
+            )
+            ids = towers.ids[nearby]
+            distances = self._model_distances(
+                lats[point], lons[point], xs[point], ys[point], ids
+            )
+            if np.any(distances <= towers.radius_km * (1 - self.model.guard_band)):
+                inner[point, slot] = True
+                continue
+            ids = ids[distances <= towers.radius_km * (1 + self.model.guard_band)]
+            inner[point, slot] = np.any(
+                self._distances(
+                    lats[point], lons[point], self._lats[ids], self._lons[ids]
+                )
+                <= towers.radius_km
+            )
+
+        within[inside] = inner
+        undecided[inside] = ~steady
+        return within, undecided
+
+    def classify_discs(
+        self, lats: Sequence[float], lons: Sequence[float], radius_km: float
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        For discs of `radius_km` around each point, whether every point of the disc has a
+        tower within each slot radius
+
+        A slot is decided when the whole disc is in range of one tower, or when every
+        tower is out of range from the whole disc; otherwise points of the disc may get
+        different answers and the slot is flagged as undecided.
+
+        Args:
+            lats: Latitude of each disc center
+            lons: Longitude of each disc center
+            radius_km: Great circle radius of the discs
+
+        Returns:
+            Tuple of boolean arrays of shape (points, slots): (within, undecided)
+        """
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        within = np.zeros((len(lats), len(self.slots)), dtype=bool)
+        undecided = np.zeros((len(lats), len(self.slots)), dtype=bool)
+        if not len(lats):
+            return within, undecided
+
+        xs, ys = self._project(lons, lats)
+        points = np.column_stack((xs, ys))
+
+        for slot, towers in enumerate(self.slots):
+            if towers.tree is None:
+                continue
+            # Every tower in range of some point of the disc is within this planar bound
+            bound = (towers.radius_km + radius_km) * 1000 * (1 + PLANAR_GUARD_BAND)
+            k = min(DISC_NEIGHBOURS, towers.tree.n)
+            _, nearest = towers.tree.query(points, k=k, distance_upper_bound=bound)
+            nearest = nearest.reshape(len(points), k)
+            found = nearest < towers.tree.n
+
+            ids = towers.ids[np.where(found, nearest, 0)]
+            distances = np.where(
+                found,
+                self._model_distances(
+                    lats[:, np.newaxis],
+                    lons[:, np.newaxis],
+                    xs[:, np.newaxis],
+                    ys[:, np.newaxis],
+                    ids,
+                ),
+                np.inf,
+            )
+            # Bounds of the great circle distance to the closest tower
+            closest = distances.min(axis=1)
+            lower = closest * (1 - self.model.guard_band)
+            upper = closest * (1 + self.model.guard_band)
+
+            within[:, slot] = upper + radius_km <= towers.radius_km
+            # With k towers found there may be more in range, so nothing is known
+            complete = ~found[:, -1]
+            outside = complete & (lower - radius_km > towers.radius_km)
+            undecided[:, slot] = ~within[:, slot] & ~outside
+
+        return within, undecided
+
+    def _model_distances(self, lats, lons, xs, ys, ids: np.ndarray) -> np.ndarray:
+        """
+        Distances in km from points, given by both their GPS and Lambert93 coordinates,
+        to towers with the distance model, broadcasting like NumPy operators
+        """
+        if self.model.projected:
+            return self.model.distances(xs, ys, self._x[ids], self._y[ids])
+        return self.model.distances(lats, lons, self._lats[ids], self._lons[ids])
+
+
+def _extent(store: TowerStore, radius_km: float) -> Tuple[float, float, float, float]:
+    """
+    GPS bounding box of the towers, widened so that any point within `radius_km` of a
+    tower is inside it
+
+    Returns:
+        Tuple of (min latitude, max latitude, min longitude, max longitude)
+    """
+    if not len(store):
+        return (0.0, -1.0, 0.0, -1.0)
+
+    margin_lat = 2 * math.degrees(radius_km / EARTH_RADIUS_KM)
+    max_abs_lat = min(float(np.abs(store.lat).max()) + margin_lat, 89.0)
+    margin_lon = margin_lat / math.cos(math.radians(max_abs_lat))
+    return (
+        float(store.lat.min()) - margin_lat,
+        float(store.lat.max()) + margin_lat,
+        float(store.lon.min()) - margin_lon,
+        float(store.lon.max()) + margin_lon,
+    )
+
+
+def _in_extent(
+    extent: Tuple[float, float, float, float], lats: np.ndarray, lons: np.ndarray
+) -> np.ndarray:
+    """Boolean mask of the points inside an extent"""
+    min_lat, max_lat, min_lon, max_lon = extent
+    return (lats >= min_lat) & (lats <= max_lat) & (lons >= min_lon) & (lons <= max_lon)
@@ -0,0 +1,111 @@
+import hashlib
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Tuple
+import numpy as np
+from src.models.records import CoverageRecord
+
+# Bit of each mobile network generation in `TowerStore.networks`
+NETWORK_BITS = {"2G": 1, "3G": 2, "4G": 4}
+
+
+@dataclass(frozen=True)
+class TowerStore:
+    """
+    Columnar storage of the coverage records
+
+    Each tower is a row across parallel NumPy arrays instead of a Pydantic model, which
+    keeps the whole dataset in a few contiguous buffers and allows vectorized lookups.
+    Towers are projected to GPS coordinates once, when the store is built, and kept in
+    the `lon`/`lat` columns next to their Lambert93 position.
+    """
+
+    operators: Tuple[str, ...]
+    operator_codes: np.ndarray
+    x: np.ndarray
+    y: np.ndarray
+    networks: np.ndarray
+    lon: np.ndarray
+    lat: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.operator_codes)
+
+    @classmethod
+    def from_columns(
+        cls,
+        operators: Iterable[str],
+        operator_codes: Iterable[int],
+        x: Iterable[int],
+        y: Iterable[int],
+        networks: Iterable[int],
+        lon: Iterable[float],
+        lat: Iterable[float],
+    ) -> "TowerStore":
+        """Build a store from column values, casting them to their compact dtypes"""
+        return cls(
+            operators=tuple(operators),
+            operator_codes=np.asarray(operator_codes, dtype=np.uint8),
+            x=np.asarray(x, dtype=np.int32),
+            y=np.asarray(y, dtype=np.int32),
+            networks=np.asarray(networks, dtype=np.uint8),
+            lon=np.asarray(lon, dtype=np.float64),
+            lat=np.asarray(lat, dtype=np.float64),
+        )
+
+    @classmethod
+    def from_records(
+        cls,
+        records: Iterable[CoverageRecord],
+        lon: Iterable[float],
+        lat: Iterable[float],
+    ) -> "TowerStore":
+        """Build a store from coverage records and their GPS coordinates"""
+        operators = {}
+        operator_codes, x, y, networks = [], [], [], []
+
+        for record in records:
+            operator_codes.append(operators.setdefault(record.operator, len(operators)))
+            x.append(record.x)
+            y.append(record.y)
+            networks.append(
+                network_bits(record.network_2g, record.network_3g, record.network_4g)
+            )
+
+        return cls.from_columns(operators, operator_codes, x, y, networks, lon, lat)
+
+    def fingerprint(self) -> str:
+        """Digest of the towers, identifying data derived from this exact dataset"""
+        digest = hashlib.sha256("\n".join(self.operators).encode("utf-8"))
+        for column in (self.operator_codes, self.x, self.y, self.networks):
+            digest.update(np.ascontiguousarray(column).tobytes())
+        return digest.hexdigest()
+
+    def has_network(self, generation: str) -> np.ndarray:
+        """Boolean mask of the towers providing a mobile network generation"""
+        return (self.networks & NETWORK_BITS[generation]) != 0
+
+    def records(self) -> Iterator[CoverageRecord]:
+        """Iterate over the towers as coverage records, for code not using the columns"""
+        for code, x, y, networks in zip(
+            self.operator_codes.tolist(),
+            self.x.tolist(),
+            self.y.tolist(),
+            self.networks.tolist(),
+        ):
+            yield CoverageRecord(
+                operator=self.operators[code],
+                x=x,
+                y=y,
+                network_2g=int(networks & NETWORK_BITS["2G"] != 0),
+                network_3g=int(networks & NETWORK_BITS["3G"] != 0),
+                network_4g=int(networks & NETWORK_BITS["4G"] != 0),
+            )
+
+
+def network_bits(network_2g: int, network_3g: int, network_4g: int) -> int:
+    """Pack 2G/3G/4G availability flags (1 when available) into a bitmask"""
+    return (
+        (NETWORK_BITS["2G"] if network_2g == 1 else 0)
+        | (NETWORK_BITS["3G"] if network_3g == 1 else 0)
+        | (NETWORK_BITS["4G"] if network_4g == 1 else 0)
+    )
@@ -0,0 +1,31 @@
+from dataclasses import dataclass
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+
+
+class JobStatus(str, Enum):
+    """Lifecycle of a coverage job"""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+    @property
+    def finished(self) -> bool:
+        return self in (JobStatus.COMPLETED, JobStatus.FAILED)
+
+
+@dataclass
+class CoverageJob:
+    """Domain model for an asynchronous coverage computation over many locations"""
+
+    id: str
+    status: JobStatus
+    total: int
+    processed: int
+    failed: int
+    created_at: datetime
+    updated_at: datetime
+    error: Optional[str] = None
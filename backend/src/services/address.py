@@ -0,0 +1,52 @@
+import re
+import unicodedata
+
+# Common abbreviations of French street types and words, by their expanded form
+ADDRESS_ABBREVIATIONS = {
+    "all": "allee",
+    "av": "avenue",
+    "ave": "avenue",
+    "bd": "boulevard",
+    "bld": "boulevard",
+    "blvd": "boulevard",
+    "boul": "boulevard",
+    "ch": "chemin",
+    "chem": "chemin",
+    "crs": "cours",
+    "fbg": "faubourg",
+    "fg": "faubourg",
+    "imp": "impasse",
+    "pass": "passage",
+    "pl": "place",
+    "qu": "quai",
+    "r": "rue",
+    "res": "residence",
+    "rte": "route",
+    "sq": "square",
+    "st": "saint",
+    "ste": "sainte",
+}
+
+_SEPARATORS = re.compile(r"[\s,;.'’\"()/-]+")
+
+
+def normalize_address(address: str) -> str:
+    """
+    Canonical form of an address, identical for spellings the geocoder treats alike
+
+    Case, accents, punctuation and whitespace are folded, and common abbreviations are
+    expanded: "157 Bd Mac-Donald, 75019 PARIS" and "157 boulevard mac donald 75019
+    paris" give the same form.
+
+    Args:
+        address: Address string as typed by the user
+
+    Returns:
+        Normalized address, suitable as a cache key
+    """
+    decomposed = unicodedata.normalize("NFKD", address)
+    unaccented = "".join(char for char in decomposed if not unicodedata.combining(char))
+    tokens = _SEPARATORS.split(unaccented.casefold())
+    return " ".join(
+        ADDRESS_ABBREVIATIONS.get(token, token) for token in tokens if token
+    )
@@ -0,0 +1,295 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+logger = logging.getLogger(__name__)
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+@dataclass
+class CacheStats:
+    """Counters of a cache"""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        """Counters as a dictionary, for metrics"""
+        return asdict(self)
+
+
+class LRUCache(Generic[K, V]):
+    """
+    Bounded in-memory cache evicting the least recently used entry, with an optional
+    time to live per entry
+
+    Thread safe: every operation holds a lock for a few dictionary operations.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._clock = clock
+        self._entries: "OrderedDict[K, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        """
+        Cached value of a key, marking it as recently used
+
+        Returns:
+            The value, or `default` when the key is missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return default
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= self._clock():
+                del self._entries[key]
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return value
+
+    def set(self, key: K, value: V) -> None:
+        """Cache a value, evicting the least recently used entry when full"""
+        if self.max_size <= 0:
+            return
+
+        expires_at = self._clock() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def clear(self) -> None:
+        """Remove every entry, keeping the counters"""
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteCache:
+    """
+    Persistent key/value cache in a SQLite file, surviving restarts
+
+    Values are stored as JSON with an expiry timestamp. The database is opened on first
+    use, in WAL mode so that several processes can share the file.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl: Optional[float] = None,
+        table: str = "cache",
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.table = table
+        self.stats = CacheStats()
+        self._clock = clock
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Database connection, created with the cache table on first use"""
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(
+                self.path, timeout=5.0, check_same_thread=False, isolation_level=None
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+            )
+            self._connection = connection
+        return self._connection
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Cached value of a key
+
+        Returns:
+            The value, or None when the key is missing, expired or the database fails
+        """
+        try:
+            with self._lock:
+                row = self.connection.execute(
+                    f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[1] is not None and row[1] <= self._clock():
+                    self.connection.execute(
+                        f"DELETE FROM {self.table} WHERE key = ?", (key,)
+                    )
+                    self.stats.expirations += 1
+                    row = None
+        except sqlite3.Error as e:
+            logger.warning(f"Cache database {self.path} read failed: {e}")
+            row = None
+
+        if row is None:
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        return json.loads(row[0])
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Cached values of several keys, omitting those missing or expired"""
+        values = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                values[key] = value
+        return values
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a value; database failures are logged and otherwise ignored"""
+        self.set_many([(key, value)])
+
+    def set_many(self, items: Iterable[Tuple[str, Any]]) -> None:
+        """Store several values in one statement; failures are logged and ignored"""
+        expires_at = self._clock() + self.ttl if self.ttl is not None else None
+        try:
+            with self._lock:
+                self.connection.executemany(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) "
+                    "VALUES (?, ?, ?)",
+                    ((key, json.dumps(value), expires_at) for key, value in items),
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Cache database {self.path} write failed: {e}")
+
+    def purge_expired(self) -> int:
+        """Delete expired entries, returning how many were removed"""
+        with self._lock:
+            cursor = self.connection.execute(
+                f"DELETE FROM {self.table} WHERE expires_at <= ?", (self._clock(),)
+            )
+        return cursor.rowcount
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+class TieredCache:
+    """
+    In-memory LRU cache in front of an optional persistent cache
+
+    Persistent hits are promoted to memory, and values are written to both tiers. The
+    `a`-prefixed methods are for coroutines: they reach the persistent tier, whose
+    calls block on the disk, from a worker thread, once per call.
+    """
+
+    def __init__(self, memory: LRUCache, persistent: Optional[SQLiteCache] = None):
+        self.memory = memory
+        self.persistent = persistent
+
+    def get(self, key: str) -> Optional[Any]:
+        """Cached value of a key from the fastest tier holding it, or None"""
+        value = self.memory.get(key)
+        if value is None and self.persistent is not None:
+            value = self.persistent.get(key)
+            if value is not None:
+                self.memory.set(key, value)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Cache a value in every tier"""
+        self.memory.set(key, value)
+        if self.persistent is not None:
+            self.persistent.set(key, value)
+
+    async def aget(self, key: str) -> Optional[Any]:
+        """Cached value of a key, reading the persistent tier off the event loop"""
+        return (await self.aget_many([key])).get(key)
+
+    async def aget_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        Cached values of several keys, omitting those missing from every tier
+
+        Keys missing from memory are read from the persistent tier in one worker
+        thread call, and promoted to memory when found.
+        """
+        values, missing = {}, []
+        for key in keys:
+            value = self.memory.get(key)
+            if value is None:
+                missing.append(key)
+            else:
+                values[key] = value
+
+        if missing and self.persistent is not None:
+            found = await asyncio.to_thread(self.persistent.get_many, missing)
+            for key, value in found.items():
+                self.memory.set(key, value)
+            values.update(found)
+        return values
+
+    async def aset(self, key: str, value: Any) -> None:
+        """Cache a value in every tier, writing to disk off the event loop"""
+        await self.aset_many([(key, value)])
+
+    async def aset_many(self, items: List[Tuple[str, Any]]) -> None:
+        """Cache several values in every tier, written to disk in one statement"""
+        for key, value in items:
+            self.memory.set(key, value)
+        if items and self.persistent is not None:
+            await asyncio.to_thread(self.persistent.set_many, items)
+
+    def close(self) -> None:
+        """Close the persistent tier"""
+        if self.persistent is not None:
+            self.persistent.close()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Counters of each tier, with the current in-memory size"""
+        stats = {"memory": {**self.memory.stats.as_dict(), "size": len(self.memory)}}
+        if self.persistent is not None:
+            stats["persistent"] = self.persistent.stats.as_dict()
+        return stats
@@ -1,24 +1,123 @@
 import math
+import numpy as np
 import pyproj
-from typing import Dict, List, Tuple
-from src.models.records import CoverageRecord
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Tuple
+from src.config import Settings, get_settings
+from src.services.cache import LRUCache
 
 # Earth radius in kilometers
 EARTH_RADIUS_KM = 6371.0
 
+LAMBERT93_PROJ = (
+    "+proj=lcc +lat_1=49 +lat_2=44 +lat_0=46.5 +lon_0=3 +x_0=700000 "
+    "+y_0=6600000 +ellps=GRS80 +towgs84=0,0,0,0,0,0,0 +units=m +no_defs"
+)
+WGS84_PROJ = "+proj=longlat +ellps=WGS84 +datum=WGS84 +no_defs"
+
+
+def haversine_distances(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Great circle distances in km between GPS points, broadcasting the arguments"""
+    lat1, lon1, lat2, lon2 = (
+        np.radians(np.asarray(value, dtype=np.float64))
+        for value in (lat1, lon1, lat2, lon2)
+    )
+
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    c = 2 * np.arcsin(np.sqrt(a))
+
+    return EARTH_RADIUS_KM * c
+
+
+def equirectangular_distances(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """
+    Distances in km between GPS points on the plane tangent at their mean latitude,
+    broadcasting the arguments
+    """
+    lat1, lon1, lat2, lon2 = (
+        np.radians(np.asarray(value, dtype=np.float64))
+        for value in (lat1, lon1, lat2, lon2)
+    )
+
+    x = (lon2 - lon1) * np.cos((lat1 + lat2) / 2)
+    y = lat2 - lat1
+
+    return EARTH_RADIUS_KM * np.sqrt(x * x + y * y)
+
+
+def planar_distances(x1, y1, x2, y2) -> np.ndarray:
+    """Euclidean distances in km between Lambert93 points in meters, broadcasting"""
+    dx = np.asarray(x2, dtype=np.float64) - np.asarray(x1, dtype=np.float64)
+    dy = np.asarray(y2, dtype=np.float64) - np.asarray(y1, dtype=np.float64)
+    return np.sqrt(dx * dx + dy * dy) / 1000
+
+
+@dataclass(frozen=True)
+class DistanceModel:
+    """
+    Vectorized distance function trading exactness for speed, with its error bound
+
+    `max_relative_error` is the largest |distance / haversine - 1| measured over 2
+    million pairs up to 50 km apart, one end at a tower of the Arcep dataset
+    (metropolitan France). A distance compared with a radius R decides the answer when
+    it is outside R * (1 +/- `guard_band`), a margin above that error; pairs inside the
+    band are checked with haversine.
+    """
+
+    name: str
+    distances: Callable[..., np.ndarray]
+    max_relative_error: float
+    guard_band: float
+    # Whether `distances` takes Lambert93 (x, y) in meters instead of GPS (lat, lon)
+    projected: bool = False
+
+
+# Exact reference: about 58 ns per pair
+HAVERSINE = DistanceModel("haversine", haversine_distances, 0.0, 0.0)
+# About 31 ns per pair; measured error 4.9e-6 (0.25 m at 50 km)
+EQUIRECTANGULAR = DistanceModel(
+    "equirectangular", equirectangular_distances, 4.9e-6, 1e-5
+)
+# About 6 ns per pair on coordinates already projected; the Lambert93 scale factor
+# gives planar / haversine ratios between 0.9987 and 1.0056
+PLANAR = DistanceModel("planar", planar_distances, 5.6e-3, 1e-2, projected=True)
+
+_DISTANCE_MODELS = {model.name: model for model in (HAVERSINE, EQUIRECTANGULAR, PLANAR)}
+
+
+@lru_cache(maxsize=None)
+def lambert93_to_wgs84_transformer() -> pyproj.Transformer:
+    """Shared Lambert93 -> WGS84 transformer, returning (longitude, latitude)"""
+    return pyproj.Transformer.from_proj(
+        pyproj.Proj(LAMBERT93_PROJ), pyproj.Proj(WGS84_PROJ), always_xy=True
+    )
+
+
+@lru_cache(maxsize=None)
+def wgs84_to_lambert93_transformer() -> pyproj.Transformer:
+    """Shared WGS84 -> Lambert93 transformer, taking (longitude, latitude)"""
+    return pyproj.Transformer.from_proj(
+        pyproj.Proj(WGS84_PROJ), pyproj.Proj(LAMBERT93_PROJ), always_xy=True
+    )
+
 
 class CoordinateService:
     """Service for coordinate conversion and distance calculations"""
 
-    def __init__(self):
-        self._lambert_proj = pyproj.Proj(
-            "+proj=lcc +lat_1=49 +lat_2=44 +lat_0=46.5 +lon_0=3 +x_0=700000 "
-            "+y_0=6600000 +ellps=GRS80 +towgs84=0,0,0,0,0,0,0 +units=m +no_defs"
+    def __init__(self, settings: Optional[Settings] = None):
+        settings = settings or get_settings()
+        # Model deciding coverage ranges, see `within_distance`
+        self.distance_model = _DISTANCE_MODELS[settings.coverage_distance_model]
+        self._transformer = lambert93_to_wgs84_transformer()
+        self._inverse_transformer = wgs84_to_lambert93_transformer()
+        # GPS coordinates by Lambert93 (x, y), bounded so arbitrary points cannot grow it
+        self._gps_cache: LRUCache[Tuple[float, float], Tuple[float, float]] = LRUCache(
+            settings.coordinate_cache_size
         )
-        self._wgs84_proj = pyproj.Proj(
-            "+proj=longlat +ellps=WGS84 +datum=WGS84 +no_defs"
-        )
-        self._gps_cache: Dict[str, Tuple[float, float]] = {}
 
     def lambert93_to_gps(self, x: float, y: float) -> Tuple[float, float]:
         """
@@ -31,15 +130,61 @@ class CoordinateService:
         Returns:
             Tuple of (longitude, latitude) in WGS84
         """
-        cache_key = f"{x},{y}"
+        cache_key = (x, y)
 
-        if cache_key not in self._gps_cache:
-            longitude, latitude = pyproj.transform(
-                self._lambert_proj, self._wgs84_proj, x, y
-            )
-            self._gps_cache[cache_key] = (longitude, latitude)
+        coordinates = self._gps_cache.get(cache_key)
+        if coordinates is None:
+            longitude, latitude = self._transformer.transform(x, y)
+            coordinates = (longitude, latitude)
+            self._gps_cache.set(cache_key, coordinates)
+
+        return coordinates
+
+    def metrics(self) -> Dict[str, Dict[str, int]]:
+        """Hit, miss and eviction counters of the projection cache, with its size"""
+        return {
+            "cache": {
+                **self._gps_cache.stats.as_dict(),
+                "size": len(self._gps_cache),
+                "max_size": self._gps_cache.max_size,
+            }
+        }
+
+    def lambert93_to_gps_many(
+        self, xs: np.ndarray, ys: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Convert arrays of Lambert93 coordinates to GPS (WGS84) coordinates in one call
+
+        Args:
+            xs: Lambert93 X coordinates
+            ys: Lambert93 Y coordinates
+
+        Returns:
+            Tuple of (longitudes, latitudes) arrays in WGS84
+        """
+        longitudes, latitudes = self._transformer.transform(
+            np.asarray(xs, dtype=np.float64), np.asarray(ys, dtype=np.float64)
+        )
+        return np.asarray(longitudes), np.asarray(latitudes)
 
-        return self._gps_cache[cache_key]
+    def gps_to_lambert93_many(
+        self, lons: np.ndarray, lats: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Convert arrays of GPS (WGS84) coordinates to Lambert93 coordinates in one call
+
+        Args:
+            lons: WGS84 longitudes
+            lats: WGS84 latitudes
+
+        Returns:
+            Tuple of (x, y) arrays in Lambert93 meters
+        """
+        xs, ys = self._inverse_transformer.transform(
+            np.asarray(lons, dtype=np.float64), np.asarray(lats, dtype=np.float64)
+        )
+        return np.asarray(xs), np.asarray(ys)
 
     def calculate_distance(
         self, lat1: float, lon1: float, lat2: float, lon2: float
@@ -67,3 +212,85 @@ class CoordinateService:
         c = 2 * math.asin(math.sqrt(a))
 
         return EARTH_RADIUS_KM * c
+
+    def calculate_distances(self, lat1, lon1, lat2, lon2) -> np.ndarray:
+        """
+        Vectorized Haversine distance, broadcasting its arguments like NumPy operators
+
+        A single point against arrays of towers gives one distance per tower, and points
+        shaped (M, 1) against towers shaped (M, N) or (N,) give an M x N matrix.
+
+        Args:
+            lat1, lon1: First point(s) coordinates (latitude, longitude)
+            lat2, lon2: Second point(s) coordinates (latitude, longitude)
+
+        Returns:
+            Array of distances in kilometers
+        """
+        return haversine_distances(lat1, lon1, lat2, lon2)
+
+    def within_distance(self, lat1, lon1, lat2, lon2, radius_km: float) -> np.ndarray:
+        """
+        Whether points are within a great circle distance of each other, broadcasting
+
+        Distances are computed with the configured model; only pairs within its guard
+        band of the radius are computed again with haversine, so the answers are those
+        of `calculate_distances(...) <= radius_km`. A projected model projects the
+        points first, which costs more than it saves unless done once for many pairs.
+
+        Args:
+            lat1, lon1: First point(s) coordinates (latitude, longitude)
+            lat2, lon2: Second point(s) coordinates (latitude, longitude)
+            radius_km: Distance threshold in kilometers
+
+        Returns:
+            Boolean array
+        """
+        model = self.distance_model
+        if model.projected:
+            x1, y1 = self.gps_to_lambert93_many(lon1, lat1)
+            x2, y2 = self.gps_to_lambert93_many(lon2, lat2)
+            distances = model.distances(x1, y1, x2, y2)
+        else:
+            distances = model.distances(lat1, lon1, lat2, lon2)
+
+        within = np.asarray(distances <= radius_km * (1 - model.guard_band))
+        unsure = ~within & (distances <= radius_km * (1 + model.guard_band))
+        if unsure.any():
+            lat1, lon1, lat2, lon2 = np.broadcast_arrays(
+                *(
+                    np.asarray(value, dtype=np.float64)
+                    for value in (lat1, lon1, lat2, lon2)
+                )
+            )
+            within[unsure] = (
+                haversine_distances(
+                    lat1[unsure], lon1[unsure], lat2[unsure], lon2[unsure]
+                )
+                <= radius_km
+            )
+        return within
+
+    def calculate_distance_matrix(
+        self,
+        lats: np.ndarray,
+        lons: np.ndarray,
+        tower_lats: np.ndarray,
+        tower_lons: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Haversine distances between M points and N towers
+
+        Args:
+            lats, lons: Coordinates of the M points
+            tower_lats, tower_lons: Coordinates of the N towers
+
+        Returns:
+            M x N array of distances in kilometers
+        """
+        return self.calculate_distances(
+            np.asarray(lats)[:, np.newaxis],
+            np.asarray(lons)[:, np.newaxis],
+            np.asarray(tower_lats)[np.newaxis, :],
+            np.asarray(tower_lons)[np.newaxis, :],
+        )
@@ -0,0 +1,253 @@
+import logging
+import math
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from src.services.cache import LRUCache
+from src.services.coordinate_service import EARTH_RADIUS_KM
+
+logger = logging.getLogger(__name__)
+
+# New cells written to the database at once
+FLUSH_SIZE = 256
+
+# Points farther from the equator are not cached: cells narrow towards the poles
+MAX_ABS_LATITUDE = 80.0
+
+# Cache states of a point, as returned by `CoverageCache.lookup`
+MISSING, DECIDED, UNDECIDED = 0, 1, 2
+
+# Value of a cell whose points may get different answers
+_UNDECIDED = b""
+
+CellKey = Tuple[int, int]
+
+
+class CoverageCache:
+    """
+    Coverage flags by cell of a grid of `resolution_m` meters in GPS coordinates, for
+    one dataset version
+
+    A cell is stored once the tower index has shown every point of the cell gets the
+    same flags as the point looked up, so cached answers are exactly those of a lookup;
+    other cells are stored as undecided, for their points to be looked up directly. Rows
+    of cells are `resolution_m` high, and each row is split in cells `resolution_m`
+    wide at its latitude.
+
+    Cells are kept in an in-memory LRU. With a path, they are also written in batches
+    to a SQLite file and loaded back when the same dataset version is used again, so
+    the cache stays warm across restarts.
+    """
+
+    def __init__(self, resolution_m: float, max_size: int, path: Optional[str] = None):
+        self.resolution_m = resolution_m
+        self.path = Path(path) if path else None
+        self.memory: LRUCache[CellKey, bytes] = LRUCache(max_size)
+        # Dataset version (and resolution) the cells were computed for
+        self.tag: Optional[str] = None
+        self._lat_step = math.degrees(resolution_m / 1000 / EARTH_RADIUS_KM)
+        self._pending: List[Tuple[str, int, int, bytes]] = []
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+
+    @property
+    def margin_km(self) -> float:
+        """Distance between any two points of a cell, with a margin (in km)"""
+        return self.resolution_m * 1.5 / 1000
+
+    def use_version(self, version: str) -> str:
+        """
+        Serve the cells of a dataset version, dropping those of any other version and
+        loading the saved ones
+
+        Args:
+            version: Dataset version the next lookups and stores are for
+
+        Returns:
+            Tag of the cells, to pass to `lookup` and `store`
+        """
+        tag = f"{version}/{self.resolution_m:g}"
+        with self._lock:
+            if tag != self.tag:
+                self.flush()
+                self.memory.clear()
+                self.tag = tag
+                for row, col, value in self._load(tag):
+                    self.memory.set((row, col), value)
+        return tag
+
+    def cells(self, lats: np.ndarray, lons: np.ndarray) -> List[Optional[CellKey]]:
+        """
+        Cell holding each point
+
+        Args:
+            lats: Latitude of each point
+            lons: Longitude of each point
+
+        Returns:
+            Key of the cell of each point, None for points not cached
+        """
+        rows = np.round(lats / self._lat_step)
+        lon_steps = self._lat_step / np.cos(
+            np.radians(
+                np.clip(rows * self._lat_step, -MAX_ABS_LATITUDE, MAX_ABS_LATITUDE)
+            )
+        )
+        cols = np.round(lons / lon_steps)
+
+        cached = np.abs(lats) <= MAX_ABS_LATITUDE
+        keys = [
+            (row, col) if ok else None
+            for row, col, ok in zip(
+                rows.astype(np.int64).tolist(),
+                cols.astype(np.int64).tolist(),
+                cached.tolist(),
+            )
+        ]
+        return keys
+
+    def lookup(
+        self, tag: str, keys: Sequence[Optional[CellKey]], slots: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Cached flags of cells
+
+        Args:
+            tag: Tag returned by `use_version` for the dataset of the lookup; every
+                cell is missing if another version is served since
+            keys: Cell keys, as returned by `cells`
+            slots: Number of slots of the tower index
+
+        Returns:
+            Tuple of (state, within): the `MISSING`, `DECIDED` or `UNDECIDED` state of
+            each cell, and the flags of decided cells, of shape (cells, slots)
+        """
+        state = np.full(len(keys), MISSING, dtype=np.int8)
+        within = np.zeros((len(keys), slots), dtype=bool)
+        decided, values = [], []
+        with self._lock:
+            if tag != self.tag:
+                return state, within
+            for position, key in enumerate(keys):
+                value = self.memory.get(key) if key is not None else None
+                if value is None:
+                    continue
+                if value == _UNDECIDED:
+                    state[position] = UNDECIDED
+                else:
+                    decided.append(position)
+                    values.append(value)
+
+        if decided:
+            state[decided] = DECIDED
+            packed = np.frombuffer(b"".join(values), dtype=np.uint8)
+            within[decided] = np.unpackbits(
+                packed.reshape(len(decided), -1), axis=1, count=slots
+            ).astype(bool)
+        return state, within
+
+    def store(
+        self,
+        tag: str,
+        keys: Sequence[CellKey],
+        within: np.ndarray,
+        undecided: np.ndarray,
+    ) -> None:
+        """
+        Cache the flags of cells, as classified by `TowerIndex.classify_points` for a
+        point of each cell with `margin_km`
+
+        Args:
+            tag: Tag returned by `use_version` for the dataset the cells come from;
+                nothing is stored if another version is served since
+            keys: Cell keys
+            within: Flags of each cell, of shape (cells, slots)
+            undecided: Whether each slot of each cell is undecided, same shape
+        """
+        packed = np.packbits(within, axis=1)
+        mixed = undecided.any(axis=1)
+        with self._lock:
+            if tag != self.tag:
+                return
+            for key, flags, is_mixed in zip(keys, packed, mixed.tolist()):
+                value = _UNDECIDED if is_mixed else flags.tobytes()
+                self.memory.set(key, value)
+                if self.path is not None:
+                    self._pending.append((tag, key[0], key[1], value))
+            if len(self._pending) >= FLUSH_SIZE:
+                self.flush()
+
+    def flush(self) -> None:
+        """Write the cells cached since the last flush to the database"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            if not pending or self.path is None:
+                return
+            try:
+                self.connection.executemany(
+                    "INSERT OR REPLACE INTO coverage_cells "
+                    "(version, row, col, flags) VALUES (?, ?, ?, ?)",
+                    pending,
+                )
+            except sqlite3.Error as e:
+                logger.warning(f"Coverage cache {self.path} write failed: {e}")
+
+    def close(self) -> None:
+        """Flush pending cells and close the database connection"""
+        with self._lock:
+            self.flush()
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def metrics(self) -> Dict[str, int]:
+        """Hit, miss and eviction counters of the cells, with their number"""
+        return {**self.memory.stats.as_dict(), "size": len(self.memory)}
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Database connection, created with the cells table on first use"""
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(
+                self.path, timeout=5.0, check_same_thread=False, isolation_level=None
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS coverage_cells (version TEXT NOT NULL, "
+                "row INTEGER NOT NULL, col INTEGER NOT NULL, flags BLOB NOT NULL, "
+                "PRIMARY KEY (version, row, col))"
+            )
+            self._connection = connection
+        return self._connection
+
+    def _load(self, tag: str) -> List[Tuple[int, int, bytes]]:
+        """
+        Saved cells of a version, least recently written first, deleting the cells of
+        other versions and those beyond the cache size
+        """
+        if self.path is None or self.memory.max_size <= 0:
+            return []
+        try:
+            self.connection.execute(
+                "DELETE FROM coverage_cells WHERE version != ?", (tag,)
+            )
+            self.connection.execute(
+                "DELETE FROM coverage_cells WHERE version = ? AND rowid NOT IN "
+                "(SELECT rowid FROM coverage_cells WHERE version = ? "
+                "ORDER BY rowid DESC LIMIT ?)",
+                (tag, tag, self.memory.max_size),
+            )
+            rows = self.connection.execute(
+                "SELECT row, col, flags FROM coverage_cells WHERE version = ? "
+                "ORDER BY rowid",
+                (tag,),
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"Coverage cache {self.path} read failed: {e}")
+            return []
+        logger.info(f"Loaded {len(rows)} cached coverage cells from {self.path}")
+        return rows
@@ -1,6 +1,20 @@
 import asyncio
-from typing import Dict, List
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import replace
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from src.config import Settings, get_settings
+from src.data.coverage_dataset import CoverageDataset
+from src.data.coverage_grid import CoverageGrid
 from src.data.coverage_loader import CoverageDataLoader
+from src.data.tower_index import TowerIndex
+from src.data.tower_store import TowerStore
 from src.models.coverage import (
     NetworkCoverage,
     OperatorCoverage,
@@ -10,30 +24,198 @@ from src.models.coverage import (
 from src.models.records import CoverageRecord
 from src.services.geocoding_service import GeocodingService
 from src.services.coordinate_service import CoordinateService
+from src.services.coverage_cache import DECIDED, MISSING, CoverageCache
+
+logger = logging.getLogger(__name__)
 
 NETWORK_GEN_RADIUS_KM = {"2G": 30.0, "3G": 5.0, "4G": 10.0}
 
+# Geocoding results buffered ahead of a slow consumer of a coverage stream
+STREAM_BUFFER_SIZE = 1024
+
 
 class CoverageService:
     """Business logic service for network coverage operations"""
 
-    def __init__(self):
-        self.loader = CoverageDataLoader(
-            "src/data/2018_01_Sites_mobiles_2G_3G_4G_France_metropolitaine_L93_ver2.csv"
-        )
-        self.geocoding_service = GeocodingService()
-        self.coordinate_service = CoordinateService()
+    def __init__(self, settings: Optional[Settings] = None):
+        self.settings = settings or get_settings()
+        self.loader = self._create_loader()
+        self.geocoding_service = GeocodingService(self.settings)
+        self.coordinate_service = CoordinateService(self.settings)
+        self.coverage_cache = self._create_coverage_cache()
+        self._dataset: Optional[CoverageDataset] = None
+        self._lookup_executor: Optional[Executor] = None
+        # Set once warmup has loaded everything lookups need
+        self._warm = False
+        # Lazy loads may race between the warmup thread and the first requests
+        self._lock = threading.RLock()
+        # Held for the duration of a reload, so only one runs at a time
+        self._reload_lock = threading.Lock()
 
     @property
     def coverage_records(self) -> List[CoverageRecord]:
         """Lazy-loaded coverage records from CSV file"""
         return self.loader.load_data()
 
+    @property
+    def dataset(self) -> CoverageDataset:
+        """
+        Current tower data and lookup structures, loaded on first access
+
+        Read it once per operation: a reload replaces it with a new dataset as a whole.
+        """
+        if self._dataset is None:
+            with self._lock:
+                if self._dataset is None:
+                    self._dataset = self._load_dataset(self.loader)
+        return self._dataset
+
+    @property
+    def tower_store(self) -> TowerStore:
+        """Columnar tower data of the current dataset"""
+        return self.dataset.store
+
+    @property
+    def tower_index(self) -> TowerIndex:
+        """Spatial index over the towers of the current dataset"""
+        return self.dataset.index
+
+    @property
+    def coverage_grid(self) -> Optional[CoverageGrid]:
+        """
+        Precomputed coverage grid of the current dataset, when the grid engine is
+        configured
+
+        None when the engine is "index", or when the grid file is missing or was built
+        from other towers: lookups then use the tower index alone.
+        """
+        return self.dataset.grid
+
+    @property
+    def ready(self) -> bool:
+        """
+        Whether warmup loaded the dataset, lookup structures and lookup worker
+        processes, so lookups are fast
+        """
+        return self._warm
+
+    @property
+    def reloading(self) -> bool:
+        """Whether a dataset reload is in progress"""
+        return self._reload_lock.locked()
+
+    def metrics(self) -> Dict[str, Dict]:
+        """Counters of the service caches, for monitoring"""
+        metrics = {
+            "geocoding": self.geocoding_service.metrics(),
+            "coordinates": self.coordinate_service.metrics(),
+        }
+        if self.coverage_cache is not None:
+            metrics["coverage"] = {"cache": self.coverage_cache.metrics()}
+        return metrics
+
+    @property
+    def lookup_executor(self) -> Optional[Executor]:
+        """
+        Pool running coverage lookups off the event loop, created on first use; None
+        when lookups run inline
+        """
+        kind = self.settings.coverage_lookup_executor
+        if self._lookup_executor is None and kind != "inline":
+            with self._lock:
+                if self._lookup_executor is None:
+                    self._lookup_executor = self._create_lookup_executor(kind)
+        return self._lookup_executor
+
+    def warmup(self) -> None:
+        """
+        Load the dataset, tower index and configured grid ahead of the first request,
+        and the lookup worker processes when configured
+
+        Blocking: meant to run in a worker thread while the application starts.
+        """
+        dataset = self.dataset
+        if isinstance(self.lookup_executor, ProcessPoolExecutor):
+            # Each worker loads the dataset once started: start them all now
+            workers = self.settings.coverage_lookup_workers or os.cpu_count()
+            for future in [
+                self.lookup_executor.submit(_lookup_worker_version)
+                for _ in range(workers)
+            ]:
+                future.result()
+        self._warm = True
+        logger.info(
+            f"Coverage data ready: {len(dataset.store)} towers, "
+            f"version {dataset.version}"
+        )
+
+    def close(self) -> None:
+        """
+        Shut the lookup pool down and save the cached coverage; both are opened again
+        if lookups follow
+        """
+        with self._lock:
+            executor, self._lookup_executor = self._lookup_executor, None
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        if self.coverage_cache is not None:
+            self.coverage_cache.close()
+
+    def reload(self) -> CoverageDataset:
+        """
+        Load the dataset again from the CSV file and swap it in atomically
+
+        The new data and lookup structures are built aside from the current ones, which
+        keep serving lookups until the swap; lookups already running finish against the
+        dataset they started with. Blocking, and a reload requested while another one
+        runs waits for it to finish.
+
+        Returns:
+            The newly loaded dataset
+        """
+        with self._reload_lock:
+            loader = self._create_loader()
+            dataset = self._load_dataset(loader)
+            with self._lock:
+                previous = self._dataset
+                self.loader = loader
+                self._dataset = dataset
+
+        logger.info(
+            f"Coverage data reloaded: version "
+            f"{previous.version if previous else None} -> {dataset.version}, "
+            f"{len(dataset.store)} towers"
+        )
+        return dataset
+
+    def start_reload(self) -> bool:
+        """
+        Reload the dataset in a background thread, unless a reload is already running
+
+        Returns:
+            True if a reload was started, False if one was already in progress
+        """
+        if self.reloading:
+            return False
+
+        def run():
+            try:
+                self.reload()
+            except Exception:
+                logger.exception("Coverage data reload failed, keeping current data")
+
+        threading.Thread(target=run, name="coverage-reload", daemon=True).start()
+        return True
+
     async def get_coverage_for_locations(
         self, locations: Dict[str, str]
     ) -> LocationCoverageResults:
         """
-        Get coverage information for multiple locations in parallel
+        Get coverage information for multiple locations
+
+        Addresses are geocoded as a batch (concurrent single requests, or bulk CSV
+        uploads for large requests), then every geocoded point is looked up in a single
+        batch against the tower index.
 
         Args:
             locations: Dictionary mapping location IDs to addresses
@@ -41,115 +223,384 @@ class CoverageService:
         Returns:
             Dictionary mapping location IDs to coverage information
         """
-        tasks = [
-            self._process_location_coverage_with_id(location_id, address)
-            for location_id, address in locations.items()
-        ]
-
-        results_list = await asyncio.gather(*tasks, return_exceptions=True)
-
-        results = {}
         location_ids = list(locations.keys())
+        addresses = list(locations.values())
+        geocoded: List[Optional[Tuple[float, float]]] = [None] * len(addresses)
+        async for position, coordinates in self.geocoding_service.geocode_many(
+            addresses
+        ):
+            geocoded[position] = coordinates
+
+        return dict(
+            zip(location_ids, await self._build_location_coverage(addresses, geocoded))
+        )
+
+    async def get_coverage_for_coordinates(
+        self, locations: Dict[str, Tuple[float, float]]
+    ) -> LocationCoverageResults:
+        """
+        Get coverage information for locations given by their GPS coordinates
 
-        for i, result in enumerate(results_list):
-            location_id = location_ids[i]
+        Nothing is geocoded: every point is looked up in a single batch against the
+        coverage grid or the tower index.
 
-            if isinstance(result, Exception):
-                results[location_id] = LocationCoverageData(
-                    error=str(result), operators={}
-                )
-                continue
+        Args:
+            locations: Dictionary mapping location IDs to (latitude, longitude)
 
-            _, coverage_data = result
-            results[location_id] = LocationCoverageData(
+        Returns:
+            Dictionary mapping location IDs to coverage information
+        """
+        points = list(locations.values())
+        coverages = await self._lookup_coverage_off_loop(
+            [lat for lat, _ in points], [lon for _, lon in points]
+        )
+        return {
+            location_id: LocationCoverageData(
                 error=None, operators=self._build_operator_coverage(coverage_data)
             )
+            for location_id, coverage_data in zip(locations, coverages)
+        }
 
-        return results
+    async def stream_coverage_for_locations(
+        self, locations: Dict[str, str]
+    ) -> AsyncIterator[Tuple[str, LocationCoverageData]]:
+        """
+        Get coverage information for multiple locations, as each one is geocoded
 
-    async def _process_location_coverage_with_id(
-        self, location_id: str, address: str
-    ) -> tuple[str, Dict[str, Dict[str, bool]]]:
-        """Process a single location with its ID for parallel processing"""
-        coverage_data = await self._process_location_coverage(address)
-        return location_id, coverage_data
+        Locations are yielded in the order their geocoding completes, so a slow address
+        does not hold back the others. Geocoding runs ahead of the consumer by at most
+        `STREAM_BUFFER_SIZE` results; the results available when the consumer asks for
+        more are looked up together, in one batch against the tower index.
 
-    async def _process_location_coverage(
-        self, address: str
-    ) -> Dict[str, Dict[str, bool]]:
+        Args:
+            locations: Dictionary mapping location IDs to addresses
+
+        Yields:
+            Tuples of (location ID, coverage information)
         """
-        Process coverage for a single location
+        location_ids = list(locations.keys())
+        addresses = list(locations.values())
+        queue: asyncio.Queue = asyncio.Queue(maxsize=STREAM_BUFFER_SIZE)
+
+        async def geocode() -> None:
+            try:
+                async for result in self.geocoding_service.geocode_many(addresses):
+                    await queue.put(result)
+            except Exception as e:
+                await queue.put(e)
+                return
+            await queue.put(None)
+
+        producer = asyncio.create_task(geocode())
+        try:
+            finished = False
+            while not finished:
+                batch = [await queue.get()]
+                while not queue.empty():
+                    batch.append(queue.get_nowait())
+
+                end = batch[-1]
+                if end is None or isinstance(end, Exception):
+                    batch.pop()
+                    finished = True
+
+                positions = [position for position, _ in batch]
+                coverages = await self._build_location_coverage(
+                    [addresses[position] for position in positions],
+                    [coordinates for _, coordinates in batch],
+                )
+                for position, coverage in zip(positions, coverages):
+                    yield location_ids[position], coverage
+
+                if isinstance(end, Exception):
+                    raise end
+        finally:
+            producer.cancel()
+
+    async def _build_location_coverage(
+        self,
+        addresses: List[str],
+        geocoded: List[Optional[Tuple[float, float]]],
+    ) -> List[LocationCoverageData]:
+        """
+        Look up the coverage of geocoded addresses in a single batch
 
         Args:
-            address: Address string to get coverage for
+            addresses: Address of each location
+            geocoded: (latitude, longitude) of each location, None if not geocoded
 
         Returns:
-            Dictionary with operator coverage data
+            Coverage information of each location, in order
         """
-        coordinates = await self.geocoding_service.geocode_address(address)
+        results: List[Optional[LocationCoverageData]] = [None] * len(addresses)
+        located, lats, lons = [], [], []
 
-        if not coordinates:
-            raise ValueError(f"Could not geocode address: {address}")
+        for position, (address, coordinates) in enumerate(zip(addresses, geocoded)):
+            if coordinates is None:
+                results[position] = LocationCoverageData(
+                    error=f"Could not geocode address: {address}", operators={}
+                )
+                continue
 
-        lat, lon = coordinates
-        return self._lookup_coverage_by_coordinates(lat, lon)
+            lat, lon = coordinates
+            located.append(position)
+            lats.append(lat)
+            lons.append(lon)
+
+        coverages = await self._lookup_coverage_off_loop(lats, lons)
+        for position, coverage_data in zip(located, coverages):
+            results[position] = LocationCoverageData(
+                error=None, operators=self._build_operator_coverage(coverage_data)
+            )
+        return results
+
+    async def _lookup_coverage_off_loop(
+        self, lats: List[float], lons: List[float]
+    ) -> List[Dict[str, Dict[str, bool]]]:
+        """
+        Aggregate coverage for several points in the lookup pool, so that the event
+        loop keeps serving other requests meanwhile
+
+        A worker process answers from its own copy of the dataset, reloaded first when
+        this process swapped in another version since the worker last caught up.
+        """
+        executor = self.lookup_executor
+        if executor is None or not len(lats):
+            return self._lookup_coverage_by_coordinates_many(lats, lons)
+
+        loop = asyncio.get_running_loop()
+        if isinstance(executor, ProcessPoolExecutor):
+            version = self._dataset.version if self._dataset is not None else None
+            return await loop.run_in_executor(
+                executor, _lookup_in_worker, version, lats, lons
+            )
+        return await loop.run_in_executor(
+            executor, self._lookup_coverage_by_coordinates_many, lats, lons
+        )
 
     def _lookup_coverage_by_coordinates(
         self, lat: float, lon: float
     ) -> Dict[str, Dict[str, bool]]:
         """
-        Aggregate coverage by checking each record once and determining what networks are available
-        based on distance. Optimized with early termination.
+        Aggregate coverage by querying the tower index for each operator and mobile network
+        generation combination.
 
         For each operator and mobile network generation combination, returns:
         - True: if there's at least one tower of that operator with that network generation within range
         - False: if no towers of that operator with that network generation are found within range
         """
-        coverage = {}
-        max_radius = max(NETWORK_GEN_RADIUS_KM.values())
+        return self._lookup_coverage_by_coordinates_many([lat], [lon])[0]
 
-        for record in self.coverage_records:
-            operator = record.operator.lower()
+    def _lookup_coverage_by_coordinates_many(
+        self, lats: List[float], lons: List[float]
+    ) -> List[Dict[str, Dict[str, bool]]]:
+        """
+        Aggregate coverage for several points at once, evaluating every operator and mobile
+        network generation of every point with vectorized distance computations
 
-            if operator in coverage and all(coverage[operator].values()):
-                continue
+        Args:
+            lats: Latitude of each point
+            lons: Longitude of each point
 
-            tower_lon, tower_lat = self.coordinate_service.lambert93_to_gps(
-                record.x, record.y
-            )
+        Returns:
+            List of operator coverage data, in the order of the points
+        """
+        if not len(lats):
+            return []
 
-            distance = self.coordinate_service.calculate_distance(
-                lat, lon, tower_lat, tower_lon
-            )
+        # Points sharing coordinates (duplicate addresses) are looked up once
+        points = np.column_stack(
+            [np.asarray(lats, dtype=np.float64), np.asarray(lons, dtype=np.float64)]
+        )
+        unique, inverse = np.unique(points, axis=0, return_inverse=True)
+        if len(unique) < len(points):
+            coverages = self._lookup_unique_coordinates(unique[:, 0], unique[:, 1])
+            return [coverages[i] for i in inverse.ravel()]
+        return self._lookup_unique_coordinates(lats, lons)
+
+    def _lookup_unique_coordinates(
+        self, lats: Sequence[float], lons: Sequence[float]
+    ) -> List[Dict[str, Dict[str, bool]]]:
+        """
+        Aggregate coverage for distinct points with the lookup structures of the current
+        dataset, unless cached
 
-            if distance > max_radius:
-                continue
+        Args:
+            lats: Latitude of each point
+            lons: Longitude of each point
 
-            if operator not in coverage:
-                coverage[operator] = {"2G": False, "3G": False, "4G": False}
+        Returns:
+            List of operator coverage data, in the order of the points
+        """
+        dataset = self.dataset
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        # The coverage grid already answers most points without the tower index, and a
+        # dataset replaced by a reload would switch the cache back to its version
+        if (
+            self.coverage_cache is None
+            or dataset.grid is not None
+            or dataset is not self._dataset
+        ):
+            within = self._lookup_flags(dataset, lats, lons)
+        else:
+            within = self._lookup_flags_cached(dataset, lats, lons)
+        return dataset.index.coverage_from_flags(within)
+
+    def _lookup_flags_cached(
+        self, dataset: CoverageDataset, lats: np.ndarray, lons: np.ndarray
+    ) -> np.ndarray:
+        """
+        Per-slot coverage flags of points, from the cells of the coverage cache
 
-            if (
-                not coverage[operator]["2G"]
-                and record.network_2g == 1
-                and distance <= NETWORK_GEN_RADIUS_KM["2G"]
-            ):
-                coverage[operator]["2G"] = True
+        Points of cells not cached yet, or cached as undecided, are looked up in the
+        tower index. The first point of each new cell also tells whether every point of
+        the cell gets the same flags: the cell is then cached with them, else as
+        undecided.
 
-            if (
-                not coverage[operator]["3G"]
-                and record.network_3g == 1
-                and distance <= NETWORK_GEN_RADIUS_KM["3G"]
-            ):
-                coverage[operator]["3G"] = True
+        Args:
+            dataset: Dataset to look the points up in
+            lats: Latitude of each point
+            lons: Longitude of each point
 
-            if (
-                not coverage[operator]["4G"]
-                and record.network_4g == 1
-                and distance <= NETWORK_GEN_RADIUS_KM["4G"]
-            ):
-                coverage[operator]["4G"] = True
+        Returns:
+            Boolean array of shape (points, slots)
+        """
+        cache = self.coverage_cache
+        tag = cache.use_version(dataset.version)
+        keys = cache.cells(lats, lons)
+        state, within = cache.lookup(tag, keys, len(dataset.index.slots))
+
+        looked_up = np.flatnonzero(state != DECIDED)
+        if not len(looked_up):
+            return within
+
+        point_within, undecided = dataset.index.classify_points(
+            lats[looked_up], lons[looked_up], cache.margin_km
+        )
+        within[looked_up] = point_within
+
+        # Position among the looked up points of the first point of each new cell
+        new_cells: Dict[Tuple[int, int], int] = {}
+        for i, position in enumerate(looked_up.tolist()):
+            if state[position] == MISSING and keys[position] is not None:
+                new_cells.setdefault(keys[position], i)
+        if new_cells:
+            firsts = list(new_cells.values())
+            cache.store(tag, list(new_cells), point_within[firsts], undecided[firsts])
+        return within
+
+    def _lookup_flags(
+        self, dataset: CoverageDataset, lats: np.ndarray, lons: np.ndarray
+    ) -> np.ndarray:
+        """
+        Per-slot coverage flags of points, from the coverage grid when loaded, else
+        from the tower index
+
+        Args:
+            dataset: Dataset to look the points up in
+            lats: Latitude of each point
+            lons: Longitude of each point
+
+        Returns:
+            Boolean array of shape (points, slots)
+        """
+        if dataset.grid is None:
+            return dataset.index.within_many(lats, lons)
+
+        # Grid cells answer most points; the others are looked up in the exact index
+        xs, ys = self.coordinate_service.gps_to_lambert93_many(lons, lats)
+        within, decided = dataset.grid.lookup(xs, ys)
+        if not decided.all():
+            within[~decided] = dataset.index.within_many(lats[~decided], lons[~decided])
+        return within
+
+    def _create_loader(self) -> CoverageDataLoader:
+        """Data loader for the configured CSV file"""
+        return CoverageDataLoader(
+            self.settings.coverage_csv_path, snapshot_dir=self._snapshot_dir()
+        )
+
+    def _load_dataset(self, loader: CoverageDataLoader) -> CoverageDataset:
+        """Load the towers with their index and configured grid into a new dataset"""
+        store = loader.load_store()
+        index = loader.load_index(NETWORK_GEN_RADIUS_KM)
+        grid = None
+        if self.settings.coverage_engine == "grid":
+            grid = self._load_coverage_grid(store, index)
+
+        return CoverageDataset(
+            version=store.fingerprint()[:16],
+            store=store,
+            index=index,
+            grid=grid,
+            loaded_at=datetime.now(timezone.utc),
+        )
+
+    def _create_coverage_cache(self) -> Optional[CoverageCache]:
+        """Cache of coverage by cell, or None when disabled"""
+        if (
+            self.settings.coverage_cache_resolution_m <= 0
+            or self.settings.coverage_cache_size <= 0
+        ):
+            return None
+        return CoverageCache(
+            self.settings.coverage_cache_resolution_m,
+            self.settings.coverage_cache_size,
+            self.settings.coverage_cache_path,
+        )
 
-        return coverage
+    def _create_lookup_executor(self, kind: str) -> Executor:
+        """Thread or process pool of the configured size for coverage lookups"""
+        workers = self.settings.coverage_lookup_workers
+        if kind == "thread":
+            return ThreadPoolExecutor(workers, thread_name_prefix="coverage-lookup")
+
+        # Spawned rather than forked: the parent runs threads and an event loop
+        return ProcessPoolExecutor(
+            workers or os.cpu_count(),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_lookup_worker,
+            initargs=(
+                self.settings,
+                self._dataset.version if self._dataset is not None else None,
+            ),
+        )
+
+    def _snapshot_dir(self) -> Optional[str]:
+        """Directory of the dataset snapshot, or None when snapshots are disabled"""
+        if not self.settings.coverage_snapshot:
+            return None
+        return self.settings.coverage_snapshot_dir or str(
+            Path(self.settings.coverage_csv_path).parent
+        )
+
+    def _load_coverage_grid(
+        self, store: TowerStore, index: TowerIndex
+    ) -> Optional[CoverageGrid]:
+        """Load the configured coverage grid, if it matches the tower dataset"""
+        path = Path(self.settings.coverage_grid_path)
+        if not path.exists():
+            logger.warning(
+                f"Coverage grid {path} not found, using the tower index; build it with "
+                f"python -m src.data.coverage_grid"
+            )
+            return None
+
+        try:
+            grid = CoverageGrid.load(str(path))
+        except (OSError, KeyError, ValueError) as e:
+            logger.warning(f"Could not load coverage grid {path}, using the index: {e}")
+            return None
+
+        if not grid.matches(store, index):
+            logger.warning(
+                f"Coverage grid {path} was built from another dataset, using the index"
+            )
+            return None
+
+        logger.info(f"Loaded coverage grid {path} with {grid.shape} cells")
+        return grid
 
     def _build_operator_coverage(
         self, coverage_data: Dict[str, Dict[str, bool]]
@@ -171,3 +622,63 @@ class CoverageService:
                 network_4g=networks.get("4G", False),
             )
         return result
+
+
+# Coverage service of a lookup worker process, created by `_init_lookup_worker`
+_worker_service: Optional[CoverageService] = None
+
+# Dataset version of the parent process when the worker last caught up with it
+_worker_parent_version: Optional[str] = None
+
+
+def _init_lookup_worker(settings: Settings, version: Optional[str]) -> None:
+    """
+    Load the coverage dataset in a newly started lookup worker process
+
+    Args:
+        settings: Settings of the parent process
+        version: Dataset version served by the parent process, None if not loaded yet
+    """
+    global _worker_service, _worker_parent_version
+    # Workers only look points up: no coverage cache, geocoding cache or index
+    _worker_service = CoverageService(
+        replace(
+            settings,
+            coverage_lookup_executor="inline",
+            coverage_cache_resolution_m=0,
+            geocoding_cache_path=None,
+            geocoding_local_index=None,
+        )
+    )
+    _worker_service.warmup()
+    _worker_parent_version = version
+
+
+def _lookup_worker_version() -> str:
+    """Version of the dataset loaded by a lookup worker process"""
+    return _worker_service.dataset.version
+
+
+def _lookup_in_worker(
+    version: Optional[str], lats: List[float], lons: List[float]
+) -> List[Dict[str, Dict[str, bool]]]:
+    """
+    Aggregate coverage for several points in a lookup worker process
+
+    Args:
+        version: Dataset version served by the parent process, None if not loaded yet
+        lats: Latitude of each point
+        lons: Longitude of each point
+
+    Returns:
+        List of operator coverage data, in the order of the points
+    """
+    global _worker_parent_version
+    # Catch up once per dataset swapped in by the parent. A worker started after the
+    # CSV changed may already hold a newer version than the parent's: it keeps it
+    # rather than reloading on every lookup.
+    if version is not None and version != _worker_parent_version:
+        if _worker_service.dataset.version != version:
+            _worker_service.reload()
+        _worker_parent_version = version
+    return _worker_service._lookup_coverage_by_coordinates_many(lats, lons)
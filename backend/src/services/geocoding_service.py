@@ -1,11 +1,23 @@
+import asyncio
+import csv
+import io
 import httpx
-from typing import Optional, Tuple
+import importlib.util
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple
 from pydantic import ValidationError
+from src.config import Settings, get_settings
+from src.data.address_index import AddressIndex
 from src.models.geocoding import GeocodeResponse
+from src.services.address import normalize_address
+from src.services.cache import LRUCache, SQLiteCache, TieredCache
+from src.services.rate_limit import RequestScheduler
+from src.services.single_flight import SingleFlight
 import logging
 
 logger = logging.getLogger(__name__)
 
+Coordinates = Tuple[float, float]
+
 
 class GeocodingService:
     """
@@ -17,40 +29,394 @@ class GeocodingService:
 
     BASE_URL = "https://api-adresse.data.gouv.fr"
 
+    def __init__(
+        self,
+        settings: Optional[Settings] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.settings = settings or get_settings()
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._scheduler: Optional[RequestScheduler] = None
+        # Results by normalized address; failures are not cached
+        self.cache = TieredCache(
+            LRUCache(
+                self.settings.geocoding_cache_size, self.settings.geocoding_cache_ttl
+            ),
+            (
+                SQLiteCache(
+                    self.settings.geocoding_cache_path,
+                    self.settings.geocoding_cache_ttl,
+                    table="geocoding",
+                )
+                if self.settings.geocoding_cache_path
+                else None
+            ),
+        )
+        # Addresses being geocoded, by normalized address: concurrent requests for an
+        # address wait for the first one instead of calling the API again
+        self._in_flight: SingleFlight[str, Optional[Coordinates]] = SingleFlight()
+        self._local_index: Optional[AddressIndex] = None
+        self._local_index_loaded = False
+        self._local_hits = 0
+        self._local_misses = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """
+        HTTP client shared by every request, keeping connections to the API alive
+
+        Opened by `start` when the application starts, or on first use otherwise.
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = self._create_client()
+        return self._client
+
+    @property
+    def local_index(self) -> Optional[AddressIndex]:
+        """
+        Offline geocoding index, memory-mapped on first use
+
+        None when not configured, or unreadable: addresses then go to the API.
+        """
+        if not self._local_index_loaded:
+            path = self.settings.geocoding_local_index
+            if path:
+                try:
+                    self._local_index = AddressIndex.load(path)
+                    logger.info(
+                        f"Loaded {len(self._local_index)} addresses from {path}"
+                    )
+                except (OSError, ValueError) as e:
+                    logger.error(f"Offline geocoding index {path} unavailable: {e}")
+            self._local_index_loaded = True
+        return self._local_index
+
+    @property
+    def scheduler(self) -> RequestScheduler:
+        """
+        Scheduler of the requests sent to the API, shared by every request
+
+        Created with the client, as its locks belong to the running event loop.
+        """
+        if self._scheduler is None:
+            self._scheduler = RequestScheduler(
+                max_in_flight=self.settings.geocoding_max_in_flight,
+                rate=self.settings.geocoding_rate_limit,
+                burst=self.settings.geocoding_rate_burst,
+                max_retries=self.settings.geocoding_max_retries,
+                backoff=self.settings.geocoding_retry_backoff,
+                max_delay=self.settings.geocoding_retry_max_delay,
+            )
+        return self._scheduler
+
+    async def start(self) -> None:
+        """Open the shared HTTP client"""
+        self.client
+
+    async def aclose(self) -> None:
+        """Close the shared HTTP client and its pooled connections, and the cache"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._scheduler = None
+        self.cache.close()
+
+    def metrics(self) -> Dict[str, Dict]:
+        """Hit and miss counters of the results cache, and request counters"""
+        metrics = {
+            "cache": self.cache.stats(),
+            "in_flight": {
+                "pending": len(self._in_flight),
+                "coalesced": self._in_flight.coalesced,
+            },
+        }
+        if self._scheduler is not None:
+            metrics["requests"] = self._scheduler.stats.as_dict()
+        if self._local_index is not None:
+            metrics["local"] = {"hits": self._local_hits, "misses": self._local_misses}
+        return metrics
+
+    def _create_client(self) -> httpx.AsyncClient:
+        """HTTP client with the configured connection pool"""
+        http2 = self.settings.geocoding_http2
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("HTTP/2 requested for geocoding but h2 is not installed")
+            http2 = False
+
+        return httpx.AsyncClient(
+            base_url=self.BASE_URL,
+            timeout=self.settings.geocoding_timeout,
+            limits=httpx.Limits(
+                max_connections=self.settings.geocoding_max_connections,
+                max_keepalive_connections=(
+                    self.settings.geocoding_max_keepalive_connections
+                ),
+                keepalive_expiry=self.settings.geocoding_keepalive_expiry,
+            ),
+            http2=http2,
+            transport=self._transport,
+        )
+
     async def geocode_address(self, address: str) -> Optional[Tuple[float, float]]:
         """
         Geocode a French address to GPS coordinates
 
+        Results are cached by normalized address, so spelling variants of an address
+        already geocoded are answered without calling the API, and concurrent requests
+        for an address being geocoded share its result. Addresses found in the offline
+        index, when configured, are answered without calling the API either.
+
         Args:
             address: Address string to geocode
 
         Returns:
             Tuple of (latitude, longitude) or None if geocoding fails
         """
+        key = normalize_address(address)
+        cached = await self.cache.aget(key)
+        if cached is not None:
+            latitude, longitude = cached
+            return latitude, longitude
+
+        local = self._geocode_locally(address)
+        if local is not None or not self.settings.geocoding_remote:
+            return local
+
+        future, leader = self._in_flight.claim(key)
+        if not leader:
+            return await self._in_flight.wait(future)
+
+        coordinates = None
+        try:
+            coordinates = await self._request_coordinates(address)
+            if coordinates is not None:
+                await self.cache.aset(key, list(coordinates))
+        finally:
+            self._in_flight.resolve(key, coordinates)
+        return coordinates
+
+    async def geocode_many(
+        self, addresses: Sequence[str]
+    ) -> AsyncIterator[Tuple[int, Optional[Coordinates]]]:
+        """
+        Geocode many French addresses, yielding results as they arrive
+
+        Cached addresses and addresses found in the offline index are answered first.
+        Spelling variants of one address are geocoded once, as are addresses already
+        being geocoded by a concurrent call, whose result is awaited. Small batches go
+        through single requests run concurrently; batches of at least
+        `geocoding_batch_threshold` uncached addresses are uploaded to the bulk CSV
+        endpoint in chunks of `geocoding_batch_size`, each chunk's results being
+        yielded as soon as it completes.
+
+        Args:
+            addresses: Address strings to geocode
+
+        Yields:
+            Tuples of (position of the address in `addresses`, (latitude, longitude)
+            or None if geocoding fails), in completion order
+        """
+        positions: Dict[str, List[int]] = {}
+        for position, address in enumerate(addresses):
+            positions.setdefault(normalize_address(address), []).append(position)
+
+        answered: List[Tuple[str, Optional[Coordinates]]] = []
+        missing: List[Tuple[str, str]] = []
+        followed: List[Tuple[str, asyncio.Future]] = []
+        cached_values = await self.cache.aget_many(positions)
+        for key, key_positions in positions.items():
+            cached = cached_values.get(key)
+            if cached is not None:
+                answered.append((key, (cached[0], cached[1])))
+                continue
+
+            local = self._geocode_locally(addresses[key_positions[0]])
+            if local is not None or not self.settings.geocoding_remote:
+                answered.append((key, local))
+                continue
+
+            future, leader = self._in_flight.claim(key)
+            if leader:
+                missing.append((key, addresses[key_positions[0]]))
+            else:
+                followed.append((key, future))
+
+        leading = {key for key, _ in missing}
+        tasks: List[asyncio.Future] = []
+        try:
+            for key, coordinates in answered:
+                for position in positions[key]:
+                    yield position, coordinates
+
+            if len(missing) < self.settings.geocoding_batch_threshold:
+                requests = [
+                    self._request_single(key, address) for key, address in missing
+                ]
+            else:
+                size = self.settings.geocoding_batch_size
+                requests = [
+                    self._request_batch(missing[start : start + size])
+                    for start in range(0, len(missing), size)
+                ]
+            requests.extend(self._follow(key, future) for key, future in followed)
+            tasks = [asyncio.ensure_future(request) for request in requests]
+
+            for completed in asyncio.as_completed(tasks):
+                results = await completed
+                await self.cache.aset_many(
+                    [
+                        (key, list(coordinates))
+                        for key, coordinates in results
+                        if key in leading and coordinates is not None
+                    ]
+                )
+                for key, coordinates in results:
+                    if key in leading:
+                        self._in_flight.resolve(key, coordinates)
+                    for position in positions[key]:
+                        yield position, coordinates
+        finally:
+            # The consumer may stop early: do not leave requests running, nor
+            # concurrent callers waiting for them
+            for task in tasks:
+                task.cancel()
+            for key in leading:
+                self._in_flight.resolve(key, None)
+
+    def _geocode_locally(self, address: str) -> Optional[Coordinates]:
+        """Coordinates of an address found in the offline index, if configured"""
+        index = self.local_index
+        if index is None:
+            return None
+
+        match = index.search(address, self.settings.geocoding_local_min_score)
+        if match is None:
+            self._local_misses += 1
+            return None
+        self._local_hits += 1
+        return match.latitude, match.longitude
+
+    async def _follow(
+        self, key: str, future: asyncio.Future
+    ) -> List[Tuple[str, Optional[Coordinates]]]:
+        """Wait for an address geocoded by a concurrent call"""
+        return [(key, await self._in_flight.wait(future))]
+
+    async def _request_single(
+        self, key: str, address: str
+    ) -> List[Tuple[str, Optional[Coordinates]]]:
+        """Geocode one address of a batch with the search endpoint"""
+        return [(key, await self._request_coordinates(address))]
+
+    async def _request_batch(
+        self, batch: List[Tuple[str, str]]
+    ) -> List[Tuple[str, Optional[Coordinates]]]:
+        """
+        Geocode a chunk of addresses with one upload to the bulk CSV endpoint
+
+        Falls back to single requests when the upload fails, so that one bad chunk does
+        not fail every address in it.
+
+        Args:
+            batch: (normalized address, address) pairs
+
+        Returns:
+            (normalized address, coordinates or None) pairs
+        """
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.BASE_URL}/search/", params={"q": address, "limit": 1}
+            coordinates = await self._request_csv([address for _, address in batch])
+        except Exception as e:
+            logger.error(
+                f"Bulk geocoding of {len(batch)} addresses failed, "
+                f"falling back to single requests: {e}"
+            )
+            results = await asyncio.gather(
+                *(self._request_single(key, address) for key, address in batch)
+            )
+            return [result for single in results for result in single]
+
+        logger.info(
+            f"Bulk geocoded {sum(c is not None for c in coordinates)}"
+            f"/{len(batch)} addresses"
+        )
+        return [(key, coords) for (key, _), coords in zip(batch, coordinates)]
+
+    async def _request_csv(self, addresses: List[str]) -> List[Optional[Coordinates]]:
+        """
+        Geocode addresses with the bulk CSV endpoint
+
+        Args:
+            addresses: Address strings to geocode
+
+        Returns:
+            (latitude, longitude) or None for each address, in order
+
+        Raises:
+            httpx.HTTPError: If the request fails
+            KeyError, ValueError, csv.Error: If the response is not the expected CSV
+        """
+        upload = io.StringIO()
+        writer = csv.writer(upload)
+        writer.writerow(["id", "address"])
+        writer.writerows(enumerate(addresses))
+
+        response = await self.scheduler.send(
+            lambda: self.client.post(
+                "/search/csv/",
+                data={
+                    "columns": "address",
+                    "result_columns": ["latitude", "longitude", "result_status"],
+                },
+                files={
+                    "data": ("addresses.csv", upload.getvalue().encode(), "text/csv")
+                },
+            )
+        )
+        response.raise_for_status()
+
+        coordinates: List[Optional[Coordinates]] = [None] * len(addresses)
+        for row in csv.DictReader(io.StringIO(response.content.decode("utf-8-sig"))):
+            if row["result_status"] == "ok":
+                coordinates[int(row["id"])] = (
+                    float(row["latitude"]),
+                    float(row["longitude"]),
                 )
-                response.raise_for_status()
+        return coordinates
 
-                try:
-                    geocode_response = GeocodeResponse(**response.json())
-                except ValidationError as e:
-                    logger.error(f"Invalid geocoding API response for '{address}': {e}")
-                    return None
+    async def _request_coordinates(self, address: str) -> Optional[Tuple[float, float]]:
+        """
+        Geocode an address with the API
+
+        Args:
+            address: Address string to geocode
+
+        Returns:
+            Tuple of (latitude, longitude) or None if geocoding fails
+        """
+        try:
+            response = await self.scheduler.send(
+                lambda: self.client.get("/search/", params={"q": address, "limit": 1})
+            )
+            response.raise_for_status()
+
+            try:
+                geocode_response = GeocodeResponse(**response.json())
+            except ValidationError as e:
+                logger.error(f"Invalid geocoding API response for '{address}': {e}")
+                return None
 
-                if not geocode_response.features:
-                    logger.warning(f"No geocoding results found for address: {address}")
-                    return None
+            if not geocode_response.features:
+                logger.warning(f"No geocoding results found for address: {address}")
+                return None
 
-                feature = geocode_response.features[0]
-                coordinates = feature.geometry.coordinates
+            feature = geocode_response.features[0]
+            coordinates = feature.geometry.coordinates
 
-                longitude, latitude = coordinates
+            longitude, latitude = coordinates
 
-                logger.info(f"Geocoded '{address}' to ({latitude}, {longitude})")
-                return latitude, longitude
+            logger.info(f"Geocoded '{address}' to ({latitude}, {longitude})")
+            return latitude, longitude
 
         except httpx.RequestError as e:
             logger.error(f"Network error during geocoding for '{address}': {e}")
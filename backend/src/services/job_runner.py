@@ -0,0 +1,193 @@
+import asyncio
+import logging
+import uuid
+from typing import Dict, Iterable, List, Optional, Tuple
+from src.config import Settings, get_settings
+from src.models.jobs import CoverageJob, JobStatus
+from src.services.coverage_service import CoverageService
+from src.services.job_store import JobLocation, JobStore
+
+logger = logging.getLogger(__name__)
+
+
+class CoverageJobRunner:
+    """
+    Runs coverage jobs in the background of the application process
+
+    A job's locations are processed in chunks of `jobs_chunk_size`, each one geocoded
+    and looked up as a batch by the coverage service; at most `jobs_concurrency` chunks
+    run at once across all jobs. Pending locations are read a chunk at a time, and every
+    store call runs in a worker thread, off the event loop. Results are stored as each
+    chunk completes, so progress can be polled, and a job interrupted by a shutdown resumes where it stopped on the
+    next start.
+
+    Jobs are claimed in the store before running, with a lease renewed while they run:
+    processes sharing the store never run the same job at once, and the jobs of a
+    process that died are taken over by the others once the lease expires.
+    """
+
+    def __init__(
+        self,
+        coverage_service: CoverageService,
+        store: Optional[JobStore] = None,
+        settings: Optional[Settings] = None,
+    ):
+        self.settings = settings or get_settings()
+        self.coverage_service = coverage_service
+        self.store = store or JobStore(self.settings.jobs_db_path)
+        # Identifies the jobs claimed by this runner in the store
+        self.owner = uuid.uuid4().hex
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._watcher: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """
+        Resume the jobs left unfinished by a previous run, then keep taking over jobs
+        whose runner stopped renewing their lease
+        """
+        await self._resume()
+        self._watcher = asyncio.create_task(self._watch())
+
+    async def stop(self) -> None:
+        """
+        Interrupt running jobs and release them; they stay unfinished and resume on the
+        next start, or in another process sharing the store
+        """
+        if self._watcher is not None:
+            self._watcher.cancel()
+            await asyncio.gather(self._watcher, return_exceptions=True)
+            self._watcher = None
+        running = dict(self._tasks)
+        for task in running.values():
+            task.cancel()
+        await asyncio.gather(*running.values(), return_exceptions=True)
+        for job_id in running:
+            await asyncio.to_thread(self.store.release, job_id, self.owner)
+        self._slots = None
+        await asyncio.to_thread(self.store.close)
+
+    async def submit(self, locations: Iterable[Tuple[str, str]]) -> CoverageJob:
+        """
+        Record a job and start processing it in the background
+
+        Args:
+            locations: (location ID, address) pairs
+
+        Returns:
+            The queued job
+        """
+        job = await asyncio.to_thread(self.store.create, locations)
+        # Another process may have picked the queued job up already
+        if await asyncio.to_thread(
+            self.store.claim, job.id, self.owner, self.settings.jobs_lease_seconds
+        ):
+            self._launch(job.id)
+        return job
+
+    async def wait(self, job_id: str) -> None:
+        """Wait until a job running in this process finishes"""
+        task = self._tasks.get(job_id)
+        if task is not None:
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def _resume(self) -> None:
+        """Run the unfinished jobs no other runner holds"""
+        for job in await asyncio.to_thread(self.store.unfinished):
+            if job.id in self._tasks or not await asyncio.to_thread(
+                self.store.claim, job.id, self.owner, self.settings.jobs_lease_seconds
+            ):
+                continue
+            logger.info(
+                f"Resuming coverage job {job.id} at {job.processed}/{job.total}"
+            )
+            self._launch(job.id)
+
+    async def _watch(self) -> None:
+        """Take over the jobs of runners that stopped, once their lease expires"""
+        while True:
+            await asyncio.sleep(self.settings.jobs_lease_seconds)
+            try:
+                await self._resume()
+            except Exception:
+                logger.exception("Resuming coverage jobs failed")
+
+    async def _renew(self, job_id: str, task: asyncio.Task) -> None:
+        """Extend the lease of a running job, cancelling it once lost"""
+        while True:
+            await asyncio.sleep(self.settings.jobs_lease_seconds / 3)
+            if not await asyncio.to_thread(
+                self.store.renew, job_id, self.owner, self.settings.jobs_lease_seconds
+            ):
+                logger.warning(
+                    f"Coverage job {job_id} was taken over by another runner"
+                )
+                task.cancel()
+                return
+
+    def _launch(self, job_id: str) -> None:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.settings.jobs_concurrency)
+        task = asyncio.create_task(self._run(job_id))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+
+    async def _run(self, job_id: str) -> None:
+        """Process the pending locations of a claimed job, then mark it finished"""
+        heartbeat = asyncio.create_task(self._renew(job_id, asyncio.current_task()))
+        try:
+            # Position of the last location handed to a worker
+            position = -1
+            reading = asyncio.Lock()
+
+            async def next_chunk() -> List[JobLocation]:
+                nonlocal position
+                async with reading:
+                    chunk = await asyncio.to_thread(
+                        self.store.pending,
+                        job_id,
+                        position,
+                        self.settings.jobs_chunk_size,
+                    )
+                    if chunk:
+                        position = chunk[-1][0]
+                    return chunk
+
+            async def work() -> None:
+                while chunk := await next_chunk():
+                    async with self._slots:
+                        await self._process(job_id, chunk)
+
+            await asyncio.gather(
+                *(work() for _ in range(self.settings.jobs_concurrency))
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception(f"Coverage job {job_id} failed")
+            await asyncio.to_thread(
+                self.store.set_status,
+                job_id,
+                JobStatus.FAILED,
+                error=str(e),
+                owner=self.owner,
+            )
+            return
+        finally:
+            heartbeat.cancel()
+        await asyncio.to_thread(
+            self.store.set_status, job_id, JobStatus.COMPLETED, owner=self.owner
+        )
+        logger.info(f"Coverage job {job_id} completed")
+
+    async def _process(self, job_id: str, chunk: List[JobLocation]) -> None:
+        """Compute and store the coverage of a chunk of locations"""
+        # Keyed by position: location IDs of an uploaded file may repeat
+        results = await self.coverage_service.get_coverage_for_locations(
+            {str(position): address for position, _, address in chunk}
+        )
+        await asyncio.to_thread(
+            self.store.save_results,
+            job_id,
+            [(position, results[str(position)]) for position, _, _ in chunk],
+        )
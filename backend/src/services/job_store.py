@@ -0,0 +1,346 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import asdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+from src.models.coverage import LocationCoverageData, NetworkCoverage
+from src.models.jobs import CoverageJob, JobStatus
+
+# (position in the job, location ID, address)
+JobLocation = Tuple[int, str, str]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    processed INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    error TEXT,
+    owner TEXT,
+    lease_until REAL
+);
+CREATE TABLE IF NOT EXISTS job_locations (
+    job_id TEXT NOT NULL REFERENCES jobs (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    location_id TEXT NOT NULL,
+    address TEXT NOT NULL,
+    result TEXT,
+    sequence INTEGER,
+    PRIMARY KEY (job_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS job_locations_sequence
+    ON job_locations (job_id, sequence);
+"""
+
+# Columns added to the jobs table since its creation, for existing databases
+_JOB_COLUMNS = {"owner": "TEXT", "lease_until": "REAL"}
+
+
+class JobStore:
+    """
+    Persistent store of coverage jobs and their per-location results, in a SQLite file
+
+    Jobs survive restarts: locations without a result yet are what remains to process.
+    Results are numbered in the order they are stored, so that they can be paged while
+    chunks complete out of order. The database is opened on first use, in WAL mode so
+    that results can be read while a job writes them.
+
+    Calls block on the database: async callers run them in a worker thread. Several
+    processes may share the file: a runner claims a job before running it, with a
+    lease it renews while the job runs, so that a job is run by one process at a time
+    and taken over once its runner stops renewing.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Database connection, created with the job tables on first use"""
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(
+                self.path, timeout=5.0, check_same_thread=False, isolation_level=None
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("PRAGMA foreign_keys=ON")
+            connection.executescript(_SCHEMA)
+            columns = {row[1] for row in connection.execute("PRAGMA table_info(jobs)")}
+            for name, kind in _JOB_COLUMNS.items():
+                if name not in columns:
+                    connection.execute(f"ALTER TABLE jobs ADD COLUMN {name} {kind}")
+            self._connection = connection
+        return self._connection
+
+    def create(self, locations: Iterable[Tuple[str, str]]) -> CoverageJob:
+        """
+        Record a new queued job
+
+        Args:
+            locations: (location ID, address) pairs, in order
+
+        Returns:
+            The created job
+        """
+        job_id = uuid.uuid4().hex
+        now = _now()
+        with self._lock, self.connection:
+            self.connection.execute("BEGIN")
+            self.connection.execute(
+                "INSERT INTO jobs (id, status, total, created_at, updated_at) "
+                "VALUES (?, ?, 0, ?, ?)",
+                (job_id, JobStatus.QUEUED.value, now, now),
+            )
+            cursor = self.connection.executemany(
+                "INSERT INTO job_locations (job_id, position, location_id, address) "
+                "VALUES (?, ?, ?, ?)",
+                (
+                    (job_id, position, location_id, address)
+                    for position, (location_id, address) in enumerate(locations)
+                ),
+            )
+            self.connection.execute(
+                "UPDATE jobs SET total = ? WHERE id = ?", (cursor.rowcount, job_id)
+            )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[CoverageJob]:
+        """Job by ID, or None if unknown"""
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT id, status, total, processed, failed, created_at, updated_at, "
+                "error FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        return _job(row) if row is not None else None
+
+    def unfinished(self) -> List[CoverageJob]:
+        """Jobs queued or interrupted while running, oldest first"""
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT id, status, total, processed, failed, created_at, updated_at, "
+                "error FROM jobs WHERE status IN (?, ?) ORDER BY created_at",
+                (JobStatus.QUEUED.value, JobStatus.RUNNING.value),
+            ).fetchall()
+        return [_job(row) for row in rows]
+
+    def pending(
+        self, job_id: str, after: int = -1, limit: Optional[int] = None
+    ) -> List[JobLocation]:
+        """
+        Locations of a job without a result yet, in order
+
+        Args:
+            job_id: Job to read
+            after: Only locations at a later position are returned
+            limit: Maximum number of locations, all when None
+
+        Returns:
+            (position, location ID, address) tuples
+        """
+        with self._lock:
+            return self.connection.execute(
+                "SELECT position, location_id, address FROM job_locations "
+                "WHERE job_id = ? AND result IS NULL AND position > ? "
+                "ORDER BY position LIMIT ?",
+                (job_id, after, -1 if limit is None else limit),
+            ).fetchall()
+
+    def claim(self, job_id: str, owner: str, lease_seconds: float) -> bool:
+        """
+        Take a job to run it: a queued job, or a running one whose lease expired
+
+        Args:
+            job_id: Job to run
+            owner: Identifier of the runner taking the job
+            lease_seconds: Time the job is reserved to the runner, unless renewed
+
+        Returns:
+            Whether the job was claimed; False if it is finished or another runner
+            holds it
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self.connection.execute(
+                "UPDATE jobs SET status = ?, owner = ?, lease_until = ?, updated_at = ? "
+                "WHERE id = ? AND (status = ? OR (status = ? AND "
+                "(lease_until IS NULL OR lease_until < ?)))",
+                (
+                    JobStatus.RUNNING.value,
+                    owner,
+                    now + lease_seconds,
+                    _now(),
+                    job_id,
+                    JobStatus.QUEUED.value,
+                    JobStatus.RUNNING.value,
+                    now,
+                ),
+            )
+        return cursor.rowcount == 1
+
+    def renew(self, job_id: str, owner: str, lease_seconds: float) -> bool:
+        """
+        Extend the lease of a running job
+
+        Returns:
+            Whether the runner still holds the job
+        """
+        with self._lock:
+            cursor = self.connection.execute(
+                "UPDATE jobs SET lease_until = ? "
+                "WHERE id = ? AND owner = ? AND status = ?",
+                (time.time() + lease_seconds, job_id, owner, JobStatus.RUNNING.value),
+            )
+        return cursor.rowcount == 1
+
+    def release(self, job_id: str, owner: str) -> None:
+        """End the lease of a running job, for another runner to take it over"""
+        with self._lock:
+            self.connection.execute(
+                "UPDATE jobs SET lease_until = NULL "
+                "WHERE id = ? AND owner = ? AND status = ?",
+                (job_id, owner, JobStatus.RUNNING.value),
+            )
+
+    def set_status(
+        self,
+        job_id: str,
+        status: JobStatus,
+        error: Optional[str] = None,
+        owner: Optional[str] = None,
+    ) -> None:
+        """
+        Move a job to another status, with the error that made it fail
+
+        Args:
+            job_id: Job to update
+            status: New status
+            error: Error that made the job fail
+            owner: When given, the job is only updated if this runner holds it
+        """
+        with self._lock:
+            self.connection.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? "
+                "WHERE id = ? AND (? IS NULL OR owner = ?)",
+                (status.value, error, _now(), job_id, owner, owner),
+            )
+
+    def save_results(
+        self, job_id: str, results: List[Tuple[int, LocationCoverageData]]
+    ) -> int:
+        """
+        Store the results of processed locations and update the job progress
+
+        Locations that already have a result keep it and are not counted again, so
+        that a chunk stored twice (by a runner that lost its lease) leaves the progress
+        and the result numbering intact.
+
+        Args:
+            job_id: Job the locations belong to
+            results: (position, coverage information) pairs
+
+        Returns:
+            Number of results stored
+        """
+        with self._lock, self.connection:
+            self.connection.execute("BEGIN")
+            (processed,) = self.connection.execute(
+                "SELECT processed FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            sequence, failed = processed, 0
+            for position, result in results:
+                cursor = self.connection.execute(
+                    "UPDATE job_locations SET result = ?, sequence = ? "
+                    "WHERE job_id = ? AND position = ? AND result IS NULL",
+                    (json.dumps(asdict(result)), sequence, job_id, position),
+                )
+                sequence += cursor.rowcount
+                failed += cursor.rowcount * (result.error is not None)
+            self.connection.execute(
+                "UPDATE jobs SET processed = ?, failed = failed + ?, updated_at = ? "
+                "WHERE id = ?",
+                (sequence, failed, _now(), job_id),
+            )
+        return sequence - processed
+
+    def results(
+        self, job_id: str, offset: int = 0, limit: Optional[int] = None
+    ) -> List[Tuple[str, LocationCoverageData]]:
+        """
+        Processed locations of a job, in the order they were processed
+
+        Args:
+            job_id: Job to read
+            offset: Number of processed locations to skip
+            limit: Maximum number of locations, all when None
+
+        Returns:
+            (location ID, coverage information) pairs
+        """
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT location_id, result FROM job_locations "
+                "WHERE job_id = ? AND sequence >= ? ORDER BY sequence LIMIT ?",
+                (job_id, offset, -1 if limit is None else limit),
+            ).fetchall()
+        return [
+            (location_id, _location_coverage(json.loads(result)))
+            for location_id, result in rows
+        ]
+
+    def iter_results(
+        self, job_id: str, page_size: int = 1000
+    ) -> Iterator[Tuple[str, LocationCoverageData]]:
+        """Every processed location of a job, read page by page"""
+        offset = 0
+        while True:
+            page = self.results(job_id, offset, page_size)
+            yield from page
+            if len(page) < page_size:
+                return
+            offset += page_size
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _job(row: tuple) -> CoverageJob:
+    job_id, status, total, processed, failed, created_at, updated_at, error = row
+    return CoverageJob(
+        id=job_id,
+        status=JobStatus(status),
+        total=total,
+        processed=processed,
+        failed=failed,
+        created_at=datetime.fromisoformat(created_at),
+        updated_at=datetime.fromisoformat(updated_at),
+        error=error,
+    )
+
+
+def _location_coverage(data: dict) -> LocationCoverageData:
+    return LocationCoverageData(
+        error=data["error"],
+        operators={
+            operator: NetworkCoverage(**networks)
+            for operator, networks in data["operators"].items()
+        },
+    )
@@ -0,0 +1,171 @@
+import asyncio
+import logging
+import random
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, Optional
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SchedulerStats:
+    """Counters of a request scheduler"""
+
+    requests: int = 0
+    retries: int = 0
+    rate_limited: int = 0
+    server_errors: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        """Counters as a dictionary, for metrics"""
+        return asdict(self)
+
+
+class TokenBucket:
+    """
+    Token bucket pacing requests to an average rate, allowing bursts
+
+    Waiters are served in arrival order. The bucket can be paused, e.g. until the time
+    given by the Retry-After header of a rate limited response, so that every request
+    backs off instead of each one discovering the limit.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(self.burst)
+        self._updated_at = clock()
+        self._resume_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a request may be sent"""
+        async with self._lock:
+            while True:
+                now = self._clock()
+                if now < self._resume_at:
+                    await self._sleep(self._resume_at - now)
+                    continue
+
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated_at) * self.rate
+                )
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await self._sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, delay: float) -> None:
+        """Hold every request back for `delay` seconds from now"""
+        self._resume_at = max(self._resume_at, self._clock() + delay)
+
+
+class RequestScheduler:
+    """
+    Schedules outbound requests to a rate limited API
+
+    Bounds the number of requests in flight, paces them with a token bucket matching
+    the upstream quota (when `rate` is positive) and retries rate limited (429) and
+    server error (5xx) responses with jittered exponential backoff, honoring the
+    Retry-After header. Requests waiting for a retry do not hold an in-flight slot.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int,
+        rate: float,
+        burst: int,
+        max_retries: int,
+        backoff: float,
+        max_delay: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_delay = max_delay
+        self.stats = SchedulerStats()
+        self.bucket = TokenBucket(rate, burst, clock, sleep) if rate > 0 else None
+        self._sleep = sleep
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+
+    async def send(
+        self, request: Callable[[], Awaitable[httpx.Response]]
+    ) -> httpx.Response:
+        """
+        Send a request, retrying it while the API is rate limiting or failing
+
+        Args:
+            request: Function sending the request, called once per attempt
+
+        Returns:
+            Response of the last attempt, which may still be an error response once the
+            retries are exhausted
+        """
+        attempt = 0
+        while True:
+            async with self._in_flight:
+                if self.bucket is not None:
+                    await self.bucket.acquire()
+                self.stats.requests += 1
+                response = await request()
+
+            status = response.status_code
+            if status != 429 and status < 500:
+                return response
+
+            if status == 429:
+                self.stats.rate_limited += 1
+            else:
+                self.stats.server_errors += 1
+            if attempt >= self.max_retries:
+                return response
+
+            delay = self._retry_delay(response, attempt)
+            if status == 429 and self.bucket is not None:
+                self.bucket.pause(delay)
+            logger.warning(
+                f"{response.request.method} {response.request.url.path} answered "
+                f"{status}, retrying in {delay:.2f}s"
+            )
+            attempt += 1
+            self.stats.retries += 1
+            await self._sleep(delay)
+
+    def _retry_delay(self, response: httpx.Response, attempt: int) -> float:
+        """Seconds before retrying: Retry-After when given, else jittered backoff"""
+        retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+        if retry_after is not None:
+            return min(self.max_delay, retry_after)
+        # "Full jitter": spreads the retries of concurrent requests over the window
+        return random.uniform(0, min(self.max_delay, self.backoff * 2**attempt))
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delay in seconds or HTTP date)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
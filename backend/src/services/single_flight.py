@@ -0,0 +1,55 @@
+import asyncio
+from typing import Dict, Generic, Hashable, Tuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class SingleFlight(Generic[K, V]):
+    """
+    Coalesces concurrent work on the same key onto one in-flight future
+
+    The first caller to claim a key becomes its leader and does the work; callers
+    claiming the key while it is in flight get the leader's future and wait for its
+    result instead of repeating the work. The leader must resolve every key it claimed,
+    even when it fails, or followers wait forever.
+    """
+
+    def __init__(self):
+        self.coalesced = 0
+        self._futures: Dict[K, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._futures)
+
+    def claim(self, key: K) -> Tuple["asyncio.Future[V]", bool]:
+        """
+        Join the work in flight for a key, or start it
+
+        Returns:
+            Tuple of (future of the result, whether the caller is the leader and must
+            resolve it)
+        """
+        future = self._futures.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return future, False
+
+        future = asyncio.get_running_loop().create_future()
+        self._futures[key] = future
+        return future, True
+
+    def resolve(self, key: K, value: V) -> None:
+        """Publish the result of a key to its followers; no-op if already resolved"""
+        future = self._futures.pop(key, None)
+        if future is not None and not future.done():
+            future.set_result(value)
+
+    @staticmethod
+    async def wait(future: "asyncio.Future[V]") -> V:
+        """
+        Result of a claimed future
+
+        Shielded, so that a cancelled follower does not cancel the work others wait for.
+        """
+        return await asyncio.shield(future)
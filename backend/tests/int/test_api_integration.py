@@ -1,16 +1,57 @@
+import asyncio
+import json
 import pytest
-from unittest.mock import AsyncMock
-from src.models.coverage import NetworkCoverage
+from unittest.mock import AsyncMock, Mock
+from fastapi.testclient import TestClient
+from src.api.main import app
+from src.config import Settings
+from src.models.coverage import LocationCoverageData, NetworkCoverage
+from src.services.job_runner import CoverageJobRunner
+from src.services.job_store import JobStore
 
 
 @pytest.fixture
 def mock_coverage_service(monkeypatch):
     """Fixture to mock the coverage service"""
     mock_service = AsyncMock()
+    mock_service.close = Mock()
     monkeypatch.setattr("src.api.views.coverage_service", mock_service)
     return mock_service
 
 
+@pytest.fixture(autouse=True)
+def job_runner(monkeypatch, tmp_path):
+    """Fixture for a job runner storing its jobs in a temporary database"""
+    coverage_service = AsyncMock()
+    coverage_service.get_coverage_for_locations.side_effect = lambda locations: {
+        key: LocationCoverageData(
+            error=None,
+            operators={
+                "orange": NetworkCoverage(
+                    network_2g=True, network_3g=False, network_4g=True
+                )
+            },
+        )
+        for key in locations
+    }
+    runner = CoverageJobRunner(
+        coverage_service,
+        JobStore(str(tmp_path / "jobs.sqlite")),
+        Settings(jobs_chunk_size=2),
+    )
+    monkeypatch.setattr("src.api.views.job_runner", runner)
+    return runner
+
+
+@pytest.fixture
+def admin_token(monkeypatch):
+    """Fixture configuring an admin token, returning the headers that send it"""
+    monkeypatch.setattr(
+        "src.api.views.get_settings", lambda: Settings(admin_token="secret")
+    )
+    return {"X-Admin-Token": "secret"}
+
+
 @pytest.fixture
 def single_location_coverage_data():
     """Fixture for single location coverage test data"""
@@ -58,6 +99,166 @@ class TestAPIIntegration:
         data = response.json()
         assert data == {"status": "ok"}
 
+    def test_ready_endpoint_loading(self, mock_coverage_service, client):
+        """Test that the readiness probe fails until the coverage data is loaded"""
+        mock_coverage_service.ready = False
+
+        response = client.get("/ready")
+
+        assert response.status_code == 503
+        assert response.json() == {"status": "loading"}
+
+    def test_ready_endpoint_ready(self, mock_coverage_service, client):
+        """Test that the readiness probe succeeds once the coverage data is loaded"""
+        mock_coverage_service.ready = True
+
+        response = client.get("/ready")
+
+        assert response.status_code == 200
+        assert response.json() == {"status": "ready"}
+
+    def test_lifespan_warms_coverage_data_up(self, mock_coverage_service):
+        """Test that application startup opens the geocoding client and loads the
+        coverage data in the background"""
+        mock_coverage_service.ready = False
+
+        def warmup():
+            mock_coverage_service.ready = True
+
+        mock_coverage_service.warmup = Mock(side_effect=warmup)
+
+        with TestClient(app) as client:
+            # Startup only schedules the warmup; /health answers meanwhile
+            assert client.get("/health").status_code == 200
+
+        mock_coverage_service.warmup.assert_called_once()
+        assert mock_coverage_service.ready is True
+        # The shared geocoding client lives as long as the application
+        mock_coverage_service.geocoding_service.start.assert_awaited_once()
+        mock_coverage_service.geocoding_service.aclose.assert_awaited_once()
+
+    def test_lifespan_warmup_failure(self, mock_coverage_service):
+        """Test that a failed warmup is reported by the readiness probe"""
+        mock_coverage_service.ready = False
+        mock_coverage_service.warmup = Mock(side_effect=FileNotFoundError("dataset"))
+
+        with TestClient(app) as client:
+            client.portal.call(asyncio.wait, {app.state.warmup})
+            response = client.get("/ready")
+
+        assert response.status_code == 503
+        assert response.json() == {"status": "failed"}
+
+    def test_admin_reload(self, mock_coverage_service, client, admin_token):
+        """Test that a dataset reload is accepted and runs in the background"""
+        mock_coverage_service.ready = False
+        mock_coverage_service.start_reload = Mock(return_value=True)
+
+        response = client.post("/api/v1/admin/reload", headers=admin_token)
+
+        assert response.status_code == 202
+        assert response.json() == {"started": True, "dataset": None}
+        mock_coverage_service.start_reload.assert_called_once()
+
+    def test_admin_reload_requires_token(
+        self, mock_coverage_service, client, admin_token
+    ):
+        """Test that administration endpoints check the configured admin token"""
+        mock_coverage_service.ready = False
+        mock_coverage_service.start_reload = Mock(return_value=True)
+
+        response = client.post("/api/v1/admin/reload")
+        assert response.status_code == 403
+        response = client.post(
+            "/api/v1/admin/reload", headers={"X-Admin-Token": "wrong"}
+        )
+        assert response.status_code == 403
+        mock_coverage_service.start_reload.assert_not_called()
+
+        response = client.post("/api/v1/admin/reload", headers=admin_token)
+        assert response.status_code == 202
+
+    def test_admin_disabled_without_token(
+        self, mock_coverage_service, client, monkeypatch
+    ):
+        """Test that administration endpoints refuse every request without a token"""
+        monkeypatch.setattr("src.api.views.get_settings", lambda: Settings())
+        mock_coverage_service.start_reload = Mock(return_value=True)
+
+        response = client.post("/api/v1/admin/reload", headers={"X-Admin-Token": ""})
+
+        assert response.status_code == 403
+        assert client.get("/api/v1/admin/dataset").status_code == 403
+        mock_coverage_service.start_reload.assert_not_called()
+
+    def test_admin_dataset_loading(self, mock_coverage_service, client, admin_token):
+        """Test that the dataset endpoint is unavailable until data is loaded"""
+        mock_coverage_service.ready = False
+
+        response = client.get("/api/v1/admin/dataset", headers=admin_token)
+
+        assert response.status_code == 503
+
+    def test_metrics_endpoint(self, mock_coverage_service, client):
+        """Test that the metrics endpoint exposes the service counters"""
+        metrics = {"geocoding": {"cache": {"memory": {"hits": 3, "misses": 1}}}}
+        mock_coverage_service.metrics = Mock(return_value=metrics)
+
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.json() == metrics
+
+    @pytest.mark.parametrize(
+        "url, headers",
+        [
+            ("/api/v1/coverage?stream=true", {}),
+            ("/api/v1/coverage", {"Accept": "application/x-ndjson"}),
+            ("/api/v1/coverage", {"Accept": "application/json, application/ndjson"}),
+        ],
+    )
+    def test_coverage_endpoint_stream(
+        self, mock_coverage_service, client, url, headers
+    ):
+        """Test that the streaming mode sends one NDJSON line per location"""
+
+        async def stream_coverage_for_locations(locations):
+            yield "location2", LocationCoverageData(
+                error="Could not geocode address: nowhere", operators={}
+            )
+            yield "location1", LocationCoverageData(
+                error=None,
+                operators={
+                    "orange": NetworkCoverage(
+                        network_2g=True, network_3g=False, network_4g=True
+                    )
+                },
+            )
+
+        mock_coverage_service.stream_coverage_for_locations = (
+            stream_coverage_for_locations
+        )
+        payload = {"location1": "157 boulevard Mac Donald 75019 Paris"}
+
+        response = client.post(url, json=payload, headers=headers)
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert lines == [
+            {
+                "id": "location2",
+                "error": "Could not geocode address: nowhere",
+                "operators": {},
+            },
+            {
+                "id": "location1",
+                "error": None,
+                "operators": {"orange": {"2G": True, "3G": False, "4G": True}},
+            },
+        ]
+        mock_coverage_service.get_coverage_for_locations.assert_not_called()
+
     def test_coverage_endpoint_success(
         self, mock_coverage_service, single_location_coverage_data, client
     ):
@@ -163,3 +364,130 @@ class TestAPIIntegration:
             headers={"content-type": "application/json"},
         )
         assert response.status_code == 422
+
+    def test_coverage_by_coordinates(self, mock_coverage_service, client):
+        """Test that coverage is returned for points given by their coordinates"""
+        mock_coverage_service.get_coverage_for_coordinates.return_value = {
+            "location1": LocationCoverageData(
+                error=None,
+                operators={
+                    "orange": NetworkCoverage(
+                        network_2g=True, network_3g=False, network_4g=True
+                    )
+                },
+            )
+        }
+
+        response = client.post(
+            "/api/v1/coverage/by-coordinates", json={"location1": [48.8853, 2.3833]}
+        )
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "location1": {
+                "error": None,
+                "operators": {"orange": {"2G": True, "3G": False, "4G": True}},
+            }
+        }
+        mock_coverage_service.get_coverage_for_coordinates.assert_awaited_once_with(
+            {"location1": (48.8853, 2.3833)}
+        )
+        mock_coverage_service.geocoding_service.geocode_address.assert_not_called()
+
+    @pytest.mark.parametrize(
+        "payload",
+        [
+            {"location1": [91.0, 2.3833]},
+            {"location1": [48.8853, -181.0]},
+            {"location1": [48.8853]},
+            {"location1": "157 boulevard Mac Donald 75019 Paris"},
+        ],
+    )
+    def test_coverage_by_coordinates_invalid_payload(
+        self, mock_coverage_service, client, payload
+    ):
+        """Test that malformed or out of range coordinates are rejected"""
+        response = client.post("/api/v1/coverage/by-coordinates", json=payload)
+
+        assert response.status_code == 422
+        mock_coverage_service.get_coverage_for_coordinates.assert_not_called()
+
+    def test_coverage_job(self, job_runner):
+        """Test that a submitted job is processed in the background and its results
+        paged"""
+        payload = {f"id{n}": f"{n} rue de Rivoli 75001 Paris" for n in range(5)}
+
+        with TestClient(app) as client:
+            response = client.post("/api/v1/coverage/jobs", json=payload)
+            assert response.status_code == 202
+            job = response.json()
+            assert job["status"] == "queued"
+            assert job["total"] == 5
+            assert response.headers["location"] == f"/api/v1/coverage/jobs/{job['id']}"
+
+            client.portal.call(job_runner.wait, job["id"])
+            response = client.get(response.headers["location"])
+            assert response.status_code == 200
+            assert response.json()["status"] == "completed"
+            assert response.json()["processed"] == 5
+
+            url = f"/api/v1/coverage/jobs/{job['id']}/results"
+            first = client.get(url, params={"limit": 3}).json()
+            second = client.get(
+                url, params={"offset": first["next_offset"], "limit": 3}
+            ).json()
+
+        assert first["next_offset"] == 3
+        assert second["next_offset"] is None
+        items = first["items"] + second["items"]
+        assert sorted(item["id"] for item in items) == sorted(payload)
+        assert items[0]["operators"] == {
+            "orange": {"2G": True, "3G": False, "4G": True}
+        }
+
+    def test_coverage_job_csv_upload_and_stream(self, job_runner):
+        """Test that a job is accepted as a CSV file and its results streamed"""
+        content = "id;address\nid1;157 boulevard Mac Donald 75019 Paris\nid2;1 rue A\n"
+
+        with TestClient(app) as client:
+            response = client.post(
+                "/api/v1/coverage/jobs",
+                content=content.encode("utf-8"),
+                headers={"content-type": "text/csv"},
+            )
+            assert response.status_code == 202
+            job_id = response.json()["id"]
+            client.portal.call(job_runner.wait, job_id)
+
+            response = client.get(
+                f"/api/v1/coverage/jobs/{job_id}/results",
+                headers={"Accept": "application/x-ndjson"},
+            )
+
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert sorted(line["id"] for line in lines) == ["id1", "id2"]
+
+    @pytest.mark.parametrize(
+        "content, content_type, status_code",
+        [
+            ("invalid json", "application/json", 422),
+            ('{"id1": 1}', "application/json", 422),
+            ("id,street\nid1,rue A\n", "text/csv", 400),
+        ],
+    )
+    def test_coverage_job_invalid_payload(
+        self, client, content, content_type, status_code
+    ):
+        """Test that an invalid job submission is rejected"""
+        response = client.post(
+            "/api/v1/coverage/jobs",
+            content=content,
+            headers={"content-type": content_type},
+        )
+        assert response.status_code == status_code
+
+    def test_coverage_job_unknown(self, client):
+        """Test that an unknown job is not found"""
+        assert client.get("/api/v1/coverage/jobs/unknown").status_code == 404
+        assert client.get("/api/v1/coverage/jobs/unknown/results").status_code == 404
@@ -0,0 +1,111 @@
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+import httpx
+import pytest
+
+pytestmark = pytest.mark.skipif(
+    not Path("/proc/self/smaps_rollup").exists(),
+    reason="Needs fork and /proc/<pid>/smaps_rollup (Linux)",
+)
+
+BACKEND = Path(__file__).resolve().parents[2]
+STARTUP_TIMEOUT = 180
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _memory(pid: int) -> dict:
+    """Memory counters of a process in kB, from /proc/<pid>/smaps_rollup"""
+    counters = {}
+    with open(f"/proc/{pid}/smaps_rollup") as file:
+        for line in file:
+            name, _, value = line.partition(":")
+            if value.strip().endswith("kB"):
+                counters[name] = int(value.split()[0])
+    return counters
+
+
+def _children(pid: int) -> list:
+    with open(f"/proc/{pid}/task/{pid}/children") as file:
+        return [int(child) for child in file.read().split()]
+
+
+@pytest.fixture
+def server(tmp_path):
+    """Fixture running the pre-fork server with two workers"""
+    port = _free_port()
+    env = dict(
+        os.environ,
+        JOBS_DB_PATH=str(tmp_path / "jobs.sqlite"),
+        GEOCODING_CACHE_PATH="",
+        COVERAGE_SNAPSHOT_DIR=str(tmp_path / "snapshots"),
+        COVERAGE_CACHE_PATH=str(tmp_path / "coverage.sqlite"),
+    )
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "src.api.server",
+            "--port",
+            str(port),
+            "--workers",
+            "2",
+            "--log-level",
+            "warning",
+        ],
+        cwd=BACKEND,
+        env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while True:
+            assert process.poll() is None, "The server exited"
+            assert time.monotonic() < deadline, "The server did not get ready"
+            try:
+                if httpx.get(f"{url}/ready").status_code == 200:
+                    break
+            except httpx.TransportError:
+                pass
+            time.sleep(0.2)
+        yield process, url
+    finally:
+        process.terminate()
+        process.wait(timeout=60)
+
+
+class TestPreforkServer:
+    """Test the pre-fork server end to end"""
+
+    def test_workers_share_preloaded_memory(self, server):
+        """Test that the workers serve requests and share most of their memory"""
+        process, url = server
+
+        for _ in range(10):
+            assert httpx.get(f"{url}/health").json() == {"status": "ok"}
+
+        workers = _children(process.pid)
+        assert len(workers) == 2
+        for pid in workers:
+            memory = _memory(pid)
+            private = memory["Private_Clean"] + memory["Private_Dirty"]
+            assert private < memory["Rss"] / 2
+
+    def test_stops_workers_on_sigterm(self, server):
+        """Test that SIGTERM stops the workers, then the server"""
+        process, _ = server
+        workers = _children(process.pid)
+
+        process.terminate()
+
+        assert process.wait(timeout=60) == 0
+        for pid in workers:
+            assert not Path(f"/proc/{pid}").exists()
@@ -0,0 +1,39 @@
+import pytest
+from src.services.address import normalize_address
+
+
+class TestNormalizeAddress:
+    """Unit tests for normalize_address"""
+
+    @pytest.mark.parametrize(
+        "address",
+        [
+            "157 boulevard Mac Donald 75019 Paris",
+            "157 BOULEVARD MAC DONALD 75019 PARIS",
+            "  157 Bd Mac-Donald,   75019 Paris ",
+            "157 bd. mac donald 75019 paris",
+        ],
+    )
+    def test_variants_share_normalized_form(self, address):
+        """Test that case, punctuation, spacing and abbreviations are folded"""
+        assert normalize_address(address) == "157 boulevard mac donald 75019 paris"
+
+    def test_accents_folded(self):
+        """Test that accented letters match their unaccented form"""
+        assert normalize_address("78 Le Poujol, 30125 L'Estréchure") == (
+            "78 le poujol 30125 l estrechure"
+        )
+        assert normalize_address("Allée des Érables") == "allee des erables"
+
+    def test_abbreviations_expanded(self):
+        """Test that common street type abbreviations are expanded"""
+        assert normalize_address("5 av Anatole France") == "5 avenue anatole france"
+        assert normalize_address("Pl d'Armes, 78000 Versailles") == (
+            "place d armes 78000 versailles"
+        )
+        assert normalize_address("12 r St-Honoré") == "12 rue saint honore"
+
+    def test_empty_address(self):
+        """Test that an empty or blank address normalizes to an empty string"""
+        assert normalize_address("") == ""
+        assert normalize_address(" , ") == ""
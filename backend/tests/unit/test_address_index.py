@@ -0,0 +1,116 @@
+import gzip
+import shutil
+import numpy as np
+import pytest
+from pathlib import Path
+from src.data.address_index import AddressIndex, read_ban_csv
+
+BAN_SAMPLE = Path(__file__).parent.parent / "fixtures" / "ban-sample.csv"
+
+
+@pytest.fixture(scope="module")
+def address_index():
+    """Fixture for the index of the BAN sample"""
+    return AddressIndex.from_ban_csv(BAN_SAMPLE)
+
+
+class TestAddressIndex:
+    """Unit tests for AddressIndex"""
+
+    def test_read_ban_csv(self):
+        """Test that BAN rows are read as full addresses, skipping unplaced ones"""
+        rows = list(read_ban_csv(BAN_SAMPLE))
+
+        assert len(rows) == 15
+        assert rows[1] == ("157 Boulevard Macdonald 75019 Paris", 2.379541, 48.897851)
+        assert rows[6][0] == "12 bis Rue Saint-Honoré 75001 Paris"
+
+    def test_read_ban_csv_gzipped(self, tmp_path):
+        """Test that gzipped extracts, as published, are read"""
+        path = tmp_path / "adresses-75.csv.gz"
+        with open(BAN_SAMPLE, "rb") as source, gzip.open(path, "wb") as target:
+            shutil.copyfileobj(source, target)
+
+        assert list(read_ban_csv(path)) == list(read_ban_csv(BAN_SAMPLE))
+
+    @pytest.mark.parametrize(
+        "address",
+        [
+            "157 boulevard Macdonald 75019 Paris",
+            "157 BD MACDONALD, 75019 PARIS",
+            "157, Boulevard Macdonald - 75019 Paris",
+        ],
+    )
+    def test_exact_match(self, address_index, address):
+        """Test that spelling variants of an address match it exactly"""
+        match = address_index.search(address)
+
+        assert match.address == "157 boulevard macdonald 75019 paris"
+        assert (match.latitude, match.longitude) == (48.897851, 2.379541)
+        assert match.score == 1.0
+
+    @pytest.mark.parametrize(
+        "address, expected",
+        [
+            # Missing postcode
+            ("1 rue de la Paix Paris", "1 rue de la paix 75002 paris"),
+            ("1 rue de la Paix Nantes", "1 rue de la paix 44000 nantes"),
+            # Extra country, words out of order
+            (
+                "Place de la Comédie 1, 34000 Montpellier, France",
+                "1 place de la comedie 34000 montpellier",
+            ),
+            # Truncated word
+            (
+                "1 place de la Cathédrale 67000 Strasb",
+                "1 place de la cathedrale 67000 strasbourg",
+            ),
+        ],
+    )
+    def test_fuzzy_match(self, address_index, address, expected):
+        """Test that close variants match the intended address"""
+        match = address_index.search(address)
+
+        assert match.address == expected
+        assert match.score >= 0.8
+
+    @pytest.mark.parametrize(
+        "address",
+        ["1 rue Inconnue 75002 Paris", "8 avenue Foch 75116 Paris", "", "   "],
+    )
+    def test_no_match(self, address_index, address):
+        """Test that addresses not in the index are not matched to another one"""
+        assert address_index.search(address) is None
+
+    def test_min_score(self, address_index):
+        """Test that the minimum score trades recall for precision"""
+        address = "1 rue de la Paix Paris"
+
+        assert address_index.search(address, min_score=1.0) is None
+        assert address_index.search(address, min_score=0.5) is not None
+
+    def test_save_and_load(self, address_index, tmp_path):
+        """Test that a saved index is memory-mapped and answers identically"""
+        path = tmp_path / "addresses.idx"
+        address_index.save(path)
+
+        loaded = AddressIndex.load(path)
+
+        assert isinstance(loaded.postings, np.memmap)
+        assert len(loaded) == len(address_index)
+        for address in ("157 bd Macdonald 75019 Paris", "1 rue de la Paix Paris"):
+            assert loaded.search(address) == address_index.search(address)
+
+    def test_load_invalid(self, tmp_path):
+        """Test that a file which is not an address index is rejected"""
+        path = tmp_path / "addresses.idx"
+        path.write_bytes(b"not an index")
+
+        with pytest.raises(ValueError):
+            AddressIndex.load(path)
+        with pytest.raises(FileNotFoundError):
+            AddressIndex.load(tmp_path / "missing.idx")
+
+    def test_empty_index(self):
+        """Test that an empty index matches nothing"""
+        assert AddressIndex.build([]).search("1 rue de la Paix Paris") is None
@@ -0,0 +1,160 @@
+import threading
+import pytest
+from src.services.cache import LRUCache, SQLiteCache, TieredCache
+
+
+class FakeClock:
+    """Clock advanced by hand"""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    """Fixture for a manually advanced clock"""
+    return FakeClock()
+
+
+class TestLRUCache:
+    """Unit tests for LRUCache"""
+
+    def test_get_and_set(self):
+        """Test that cached values are returned and counted as hits"""
+        cache = LRUCache(max_size=2)
+        cache.set("a", 1)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.stats.hits == 1
+        assert cache.stats.misses == 1
+
+    def test_evicts_least_recently_used(self):
+        """Test that the least recently used entry is evicted when full"""
+        cache = LRUCache(max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert len(cache) == 2
+        assert cache.stats.evictions == 1
+
+    def test_entries_expire(self, clock):
+        """Test that entries are dropped once their time to live has passed"""
+        cache = LRUCache(max_size=2, ttl=60, clock=clock)
+        cache.set("a", 1)
+
+        clock.now += 59
+        assert cache.get("a") == 1
+        clock.now += 1
+        assert cache.get("a") is None
+        assert cache.stats.expirations == 1
+        assert len(cache) == 0
+
+    def test_disabled_when_empty(self):
+        """Test that a cache of size 0 stores nothing"""
+        cache = LRUCache(max_size=0)
+        cache.set("a", 1)
+
+        assert cache.get("a") is None
+
+
+class TestSQLiteCache:
+    """Unit tests for SQLiteCache"""
+
+    def test_persists_across_instances(self, tmp_path):
+        """Test that values written by one instance are read by another"""
+        path = tmp_path / "cache.sqlite"
+        first = SQLiteCache(str(path))
+        first.set("paris", [48.8566, 2.3522])
+        first.close()
+
+        second = SQLiteCache(str(path))
+        assert second.get("paris") == [48.8566, 2.3522]
+        assert second.get("lyon") is None
+        assert second.stats.hits == 1
+        assert second.stats.misses == 1
+        second.close()
+
+    def test_entries_expire(self, tmp_path, clock):
+        """Test that expired entries are not returned and can be purged"""
+        cache = SQLiteCache(str(tmp_path / "cache.sqlite"), ttl=60, clock=clock)
+        cache.set("a", 1)
+        cache.set("b", 2)
+
+        clock.now += 61
+        assert cache.get("a") is None
+        assert cache.stats.expirations == 1
+        assert cache.purge_expired() == 1
+        cache.close()
+
+    def test_database_errors_ignored(self, tmp_path):
+        """Test that database failures degrade to cache misses"""
+        cache = SQLiteCache(str(tmp_path / "cache.sqlite"))
+        cache.connection.execute("DROP TABLE cache")
+
+        cache.set("a", 1)
+        assert cache.get("a") is None
+        cache.close()
+
+
+class TestTieredCache:
+    """Unit tests for TieredCache"""
+
+    def test_persistent_hits_promoted(self, tmp_path):
+        """Test that values found on disk are promoted to memory"""
+        persistent = SQLiteCache(str(tmp_path / "cache.sqlite"))
+        persistent.set("a", 1)
+        cache = TieredCache(LRUCache(max_size=10), persistent)
+
+        assert cache.get("a") == 1
+        assert cache.get("a") == 1
+
+        stats = cache.stats()
+        assert stats["memory"]["hits"] == 1
+        assert stats["memory"]["size"] == 1
+        assert stats["persistent"]["hits"] == 1
+        cache.close()
+
+    def test_memory_only(self):
+        """Test that the persistent tier is optional"""
+        cache = TieredCache(LRUCache(max_size=10))
+        cache.set("a", 1)
+
+        assert cache.get("a") == 1
+        assert "persistent" not in cache.stats()
+
+    async def test_async_access_off_event_loop(self, tmp_path):
+        """Test that coroutines reach the persistent tier from a worker thread"""
+        persistent = SQLiteCache(str(tmp_path / "cache.sqlite"))
+        persistent.set("a", 1)
+        threads = []
+        get_many, set_many = persistent.get_many, persistent.set_many
+
+        def record(method):
+            def wrapper(*args):
+                threads.append(threading.current_thread())
+                return method(*args)
+
+            return wrapper
+
+        persistent.get_many = record(get_many)
+        persistent.set_many = record(set_many)
+        cache = TieredCache(LRUCache(max_size=10), persistent)
+
+        assert await cache.aget_many(["a", "b"]) == {"a": 1}
+        await cache.aset_many([("b", 2), ("c", 3)])
+        assert await cache.aget("b") == 2
+        assert cache.memory.get("a") == 1
+
+        assert persistent.get("c") == 3
+        assert len(threads) == 2
+        assert threading.current_thread() not in threads
+        cache.close()
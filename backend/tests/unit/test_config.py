@@ -0,0 +1,37 @@
+import pytest
+from src.config import Settings
+
+
+class TestSettings:
+    """Unit tests for Settings"""
+
+    def test_defaults(self):
+        """Test that settings default to the bundled dataset and the index engine"""
+        settings = Settings.from_env({})
+
+        assert settings == Settings()
+        assert settings.coverage_engine == "index"
+
+    def test_from_env(self):
+        """Test that environment variables override the matching fields"""
+        settings = Settings.from_env(
+            {"COVERAGE_ENGINE": "grid", "COVERAGE_GRID_PATH": "/tmp/grid.npz"}
+        )
+
+        assert settings.coverage_engine == "grid"
+        assert settings.coverage_grid_path == "/tmp/grid.npz"
+
+    def test_unknown_engine(self):
+        """Test that an unknown coverage engine is rejected"""
+        with pytest.raises(ValueError, match="Unknown coverage engine"):
+            Settings.from_env({"COVERAGE_ENGINE": "brute-force"})
+
+    def test_unknown_lookup_executor(self):
+        """Test that an unknown lookup executor is rejected"""
+        with pytest.raises(ValueError, match="Unknown lookup executor"):
+            Settings.from_env({"COVERAGE_LOOKUP_EXECUTOR": "gpu"})
+
+    def test_unknown_distance_model(self):
+        """Test that an unknown distance model is rejected"""
+        with pytest.raises(ValueError, match="Unknown distance model"):
+            Settings.from_env({"COVERAGE_DISTANCE_MODEL": "manhattan"})
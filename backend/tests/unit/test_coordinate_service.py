@@ -1,7 +1,15 @@
 import pytest
 import math
+import numpy as np
 from unittest.mock import patch, Mock
-from src.services.coordinate_service import CoordinateService, EARTH_RADIUS_KM
+from src.config import Settings
+from src.services.coordinate_service import (
+    EARTH_RADIUS_KM,
+    EQUIRECTANGULAR,
+    HAVERSINE,
+    PLANAR,
+    CoordinateService,
+)
 
 
 @pytest.fixture
@@ -68,6 +76,37 @@ class TestCoordinateService:
         # Should return different results
         assert coords1 != coords2
 
+    def test_lambert93_to_gps_many(self, coordinate_service):
+        """Test batch conversion matches the single point conversion"""
+        xs = np.array([652376, 650000, 700000], dtype=np.int32)
+        ys = np.array([6862327, 6860000, 6900000], dtype=np.int32)
+
+        lons, lats = coordinate_service.lambert93_to_gps_many(xs, ys)
+
+        assert lons.shape == lats.shape == (3,)
+        for x, y, lon, lat in zip(xs.tolist(), ys.tolist(), lons, lats):
+            assert (lon, lat) == coordinate_service.lambert93_to_gps(x, y)
+
+    def test_gps_to_lambert93_many_round_trip(self, coordinate_service):
+        """Test that GPS to Lambert93 conversion inverts the Lambert93 to GPS one"""
+        xs = np.array([652376, 102980, 1200000], dtype=np.int32)
+        ys = np.array([6862327, 6847973, 6100000], dtype=np.int32)
+
+        lons, lats = coordinate_service.lambert93_to_gps_many(xs, ys)
+        round_trip_xs, round_trip_ys = coordinate_service.gps_to_lambert93_many(
+            lons, lats
+        )
+
+        np.testing.assert_allclose(round_trip_xs, xs, atol=1e-3)
+        np.testing.assert_allclose(round_trip_ys, ys, atol=1e-3)
+
+    def test_lambert93_to_gps_many_empty(self, coordinate_service):
+        """Test batch conversion of empty arrays"""
+        lons, lats = coordinate_service.lambert93_to_gps_many([], [])
+
+        assert len(lons) == 0
+        assert len(lats) == 0
+
     def test_calculate_distance_same_point(self, coordinate_service, paris_gps):
         """Test distance calculation between same point"""
         lon, lat = paris_gps
@@ -156,22 +195,61 @@ class TestCoordinateService:
         # Sydney to Melbourne is approximately 700-800 km
         assert 650 < distance < 850
 
+    def test_calculate_distances_matches_scalar(
+        self, coordinate_service, paris_gps, lyon_gps
+    ):
+        """Test vectorized distances against the scalar Haversine implementation"""
+        paris_lon, paris_lat = paris_gps
+        tower_lats = np.array([48.8534, 45.7640, 48.8606, -33.8688])
+        tower_lons = np.array([2.3488, 4.8357, 2.3376, 151.2093])
+
+        distances = coordinate_service.calculate_distances(
+            paris_lat, paris_lon, tower_lats, tower_lons
+        )
+
+        assert distances.shape == (4,)
+        for distance, lat, lon in zip(distances, tower_lats, tower_lons):
+            expected = coordinate_service.calculate_distance(
+                paris_lat, paris_lon, lat, lon
+            )
+            assert distance == pytest.approx(expected, rel=1e-12)
+
+    def test_calculate_distance_matrix(self, coordinate_service, paris_gps, lyon_gps):
+        """Test M points x N towers distance matrix"""
+        lats = np.array([paris_gps[1], lyon_gps[1]])
+        lons = np.array([paris_gps[0], lyon_gps[0]])
+        tower_lats = np.array([48.8566, 45.7640, 43.2965])
+        tower_lons = np.array([2.3522, 4.8357, 5.3698])
+
+        matrix = coordinate_service.calculate_distance_matrix(
+            lats, lons, tower_lats, tower_lons
+        )
+
+        assert matrix.shape == (2, 3)
+        for i in range(2):
+            for j in range(3):
+                expected = coordinate_service.calculate_distance(
+                    lats[i], lons[i], tower_lats[j], tower_lons[j]
+                )
+                assert matrix[i, j] == pytest.approx(expected, rel=1e-12)
+
     def test_earth_radius_constant(self):
         """Test that Earth radius constant is reasonable"""
         # Earth radius should be around 6371 km
         assert 6350 < EARTH_RADIUS_KM < 6400
 
-    @patch("pyproj.transform")
-    def test_lambert93_to_gps_with_mock(self, mock_transform, coordinate_service):
+    def test_lambert93_to_gps_with_mock(self, coordinate_service):
         """Test Lambert93 to GPS conversion with mocked pyproj"""
-        # Mock the transform function
-        mock_transform.return_value = (2.3488, 48.8534)
+        # Mock the transformer
+        mock_transformer = Mock()
+        mock_transformer.transform.return_value = (2.3488, 48.8534)
+        coordinate_service._transformer = mock_transformer
 
         x, y = 652376, 6862327
         result = coordinate_service.lambert93_to_gps(x, y)
 
         # Verify the mock was called
-        mock_transform.assert_called_once()
+        mock_transformer.transform.assert_called_once_with(x, y)
 
         # Verify result
         assert result == (2.3488, 48.8534)
@@ -183,9 +261,8 @@ class TestCoordinateService:
         # Call the method to populate cache
         coordinate_service.lambert93_to_gps(x, y)
 
-        # Check that cache key exists
-        expected_key = f"{x},{y}"
-        assert expected_key in coordinate_service._gps_cache
+        # Check that the numeric key is cached
+        assert coordinate_service._gps_cache.get((x, y)) is not None
 
     def test_cache_persistence(self, coordinate_service):
         """Test that cache persists across multiple calls"""
@@ -204,3 +281,95 @@ class TestCoordinateService:
         for i, (x, y) in enumerate(coordinates):
             cached_result = coordinate_service.lambert93_to_gps(x, y)
             assert cached_result == results[i]
+
+    def test_cache_is_bounded(self):
+        """Test that the least recently used projections are evicted when full"""
+        coordinate_service = CoordinateService(Settings(coordinate_cache_size=2))
+
+        coordinate_service.lambert93_to_gps(650000, 6860000)
+        coordinate_service.lambert93_to_gps(700000, 6900000)
+        coordinate_service.lambert93_to_gps(650000, 6860000)
+        coordinate_service.lambert93_to_gps(750000, 6950000)
+
+        assert len(coordinate_service._gps_cache) == 2
+        assert coordinate_service._gps_cache.get((700000, 6900000)) is None
+        assert coordinate_service._gps_cache.get((650000, 6860000)) is not None
+
+    def test_cache_metrics(self):
+        """Test that the metrics count hits, misses and evictions"""
+        coordinate_service = CoordinateService(Settings(coordinate_cache_size=1))
+
+        coordinate_service.lambert93_to_gps(650000, 6860000)
+        coordinate_service.lambert93_to_gps(650000, 6860000)
+        coordinate_service.lambert93_to_gps(700000, 6900000)
+
+        assert coordinate_service.metrics() == {
+            "cache": {
+                "hits": 1,
+                "misses": 2,
+                "evictions": 1,
+                "expirations": 0,
+                "size": 1,
+                "max_size": 1,
+            }
+        }
+
+    def test_cache_disabled(self):
+        """Test that a cache size of 0 projects every call without caching"""
+        coordinate_service = CoordinateService(Settings(coordinate_cache_size=0))
+
+        first = coordinate_service.lambert93_to_gps(650000, 6860000)
+        second = coordinate_service.lambert93_to_gps(650000, 6860000)
+
+        assert first == second
+        assert len(coordinate_service._gps_cache) == 0
+
+
+@pytest.fixture
+def nearby_pairs():
+    """Fixture for pairs of GPS points up to 50 km apart over metropolitan France"""
+    rng = np.random.default_rng(11)
+    count = 100_000
+    lat1 = rng.uniform(41.5, 51.0, count)
+    lon1 = rng.uniform(-4.5, 8.0, count)
+    distance = rng.uniform(0.01, 50.0, count) / EARTH_RADIUS_KM
+    bearing = rng.uniform(0, 2 * np.pi, count)
+    lat2 = lat1 + np.degrees(distance * np.cos(bearing))
+    lon2 = lon1 + np.degrees(distance * np.sin(bearing)) / np.cos(np.radians(lat1))
+    return lat1, lon1, lat2, lon2
+
+
+class TestDistanceModels:
+    """Unit tests for the distance models"""
+
+    @pytest.mark.parametrize(
+        "model", [HAVERSINE, EQUIRECTANGULAR, PLANAR], ids=lambda model: model.name
+    )
+    def test_error_within_bound(self, coordinate_service, nearby_pairs, model):
+        """Test that each model stays within its documented error bound"""
+        lat1, lon1, lat2, lon2 = nearby_pairs
+        exact = coordinate_service.calculate_distances(lat1, lon1, lat2, lon2)
+
+        if model.projected:
+            x1, y1 = coordinate_service.gps_to_lambert93_many(lon1, lat1)
+            x2, y2 = coordinate_service.gps_to_lambert93_many(lon2, lat2)
+            distances = model.distances(x1, y1, x2, y2)
+        else:
+            distances = model.distances(lat1, lon1, lat2, lon2)
+
+        error = np.abs(distances / exact - 1).max()
+        assert error <= model.max_relative_error
+        assert model.max_relative_error <= model.guard_band
+
+    @pytest.mark.parametrize("name", ["haversine", "equirectangular", "planar"])
+    def test_within_distance_matches_haversine(self, nearby_pairs, name):
+        """Test that every model gives the haversine answers, even near the radius"""
+        coordinate_service = CoordinateService(Settings(coverage_distance_model=name))
+        lat1, lon1, lat2, lon2 = nearby_pairs
+        exact = coordinate_service.calculate_distances(lat1, lon1, lat2, lon2)
+        # Radii equal to some of the distances, so pairs sit right on the limit
+        for radius_km in np.sort(exact)[:: len(exact) // 20]:
+            within = coordinate_service.within_distance(
+                lat1, lon1, lat2, lon2, radius_km
+            )
+            np.testing.assert_array_equal(within, exact <= radius_km)
@@ -0,0 +1,111 @@
+import numpy as np
+import pytest
+from src.services.coverage_cache import DECIDED, MISSING, UNDECIDED, CoverageCache
+
+
+@pytest.fixture
+def cache():
+    """Fixture for an in-memory coverage cache of 10 m cells"""
+    cache = CoverageCache(resolution_m=10.0, max_size=100)
+    cache.use_version("v1")
+    return cache
+
+
+def store_cells(cache, tag, keys, within, undecided=None):
+    """Store boolean rows of flags for cells"""
+    within = np.array(within, dtype=bool)
+    if undecided is None:
+        undecided = np.zeros_like(within)
+    cache.store(tag, keys, within, np.array(undecided, dtype=bool))
+
+
+class TestCoverageCache:
+    """Unit tests for CoverageCache"""
+
+    def test_cells(self, cache):
+        """Test that points a few meters apart share a cell, unlike farther ones"""
+        lats = np.array([48.85660, 48.85661, 48.85700, 85.0])
+        lons = np.array([2.35220, 2.35221, 2.35220, 2.35220])
+
+        keys = cache.cells(lats, lons)
+
+        assert keys[0] == keys[1]
+        assert keys[2] != keys[0]
+        # Points near the poles are not cached
+        assert keys[3] is None
+
+    def test_store_and_lookup(self, cache):
+        """Test that stored cells are returned with their state and flags"""
+        tag = cache.tag
+        store_cells(cache, tag, [(1, 1)], [[True] * 9 + [False] * 3])
+        store_cells(cache, tag, [(2, 2)], [[True] * 12], [[False] * 11 + [True]])
+
+        state, within = cache.lookup(tag, [(1, 1), (2, 2), (3, 3), None], 12)
+
+        assert state.tolist() == [DECIDED, UNDECIDED, MISSING, MISSING]
+        assert within[0].tolist() == [True] * 9 + [False] * 3
+        assert not within[1:].any()
+        assert cache.metrics()["hits"] == 2
+        assert cache.metrics()["size"] == 2
+
+    def test_version_change_clears_cells(self, cache):
+        """Test that cells of a previous dataset version are not served"""
+        tag = cache.tag
+        store_cells(cache, tag, [(1, 1)], [[True]])
+
+        new_tag = cache.use_version("v2")
+        state, _ = cache.lookup(new_tag, [(1, 1)], 1)
+
+        assert new_tag != tag
+        assert state.tolist() == [MISSING]
+        # Cells computed for the previous version are dropped
+        store_cells(cache, tag, [(1, 1)], [[True]])
+        assert len(cache.memory) == 0
+
+    def test_lookup_of_previous_version_misses(self, cache):
+        """Test that a lookup for a version no longer served finds no cells"""
+        tag = cache.tag
+        new_tag = cache.use_version("v2")
+        store_cells(cache, new_tag, [(1, 1)], [[True, True, False]])
+
+        state, within = cache.lookup(tag, [(1, 1)], 2)
+
+        assert state.tolist() == [MISSING]
+        assert within.shape == (1, 2) and not within.any()
+
+    def test_persisted_cells_loaded(self, tmp_path):
+        """Test that saved cells are loaded back for the same version only"""
+        path = str(tmp_path / "coverage.sqlite")
+        cache = CoverageCache(resolution_m=10.0, max_size=100, path=path)
+        tag = cache.use_version("v1")
+        store_cells(cache, tag, [(1, 1), (2, 2)], [[True, False], [False, True]])
+        cache.close()
+
+        cache = CoverageCache(resolution_m=10.0, max_size=100, path=path)
+        tag = cache.use_version("v1")
+        state, within = cache.lookup(tag, [(1, 1), (2, 2)], 2)
+        assert state.tolist() == [DECIDED, DECIDED]
+        assert within.tolist() == [[True, False], [False, True]]
+        cache.close()
+
+        cache = CoverageCache(resolution_m=10.0, max_size=100, path=path)
+        tag = cache.use_version("v2")
+        state, _ = cache.lookup(tag, [(1, 1)], 2)
+        assert state.tolist() == [MISSING]
+        cache.close()
+
+    def test_persisted_cells_bounded(self, tmp_path):
+        """Test that only the most recently saved cells are loaded back"""
+        path = str(tmp_path / "coverage.sqlite")
+        cache = CoverageCache(resolution_m=10.0, max_size=2, path=path)
+        tag = cache.use_version("v1")
+        for key in [(1, 1), (2, 2), (3, 3)]:
+            store_cells(cache, tag, [key], [[True]])
+        cache.close()
+
+        cache = CoverageCache(resolution_m=10.0, max_size=2, path=path)
+        tag = cache.use_version("v1")
+        state, _ = cache.lookup(tag, [(1, 1), (2, 2), (3, 3)], 1)
+
+        assert state.tolist() == [MISSING, DECIDED, DECIDED]
+        cache.close()
@@ -0,0 +1,143 @@
+import pytest
+import random
+import numpy as np
+from src.data.coverage_grid import CoverageGrid
+from src.data.tower_index import TowerIndex
+from src.data.tower_store import TowerStore
+from src.models.records import CoverageRecord
+from src.services.coordinate_service import CoordinateService
+from src.services.coverage_service import NETWORK_GEN_RADIUS_KM
+
+
+@pytest.fixture
+def coordinate_service():
+    """Fixture for coordinate service instance"""
+    return CoordinateService()
+
+
+@pytest.fixture
+def tower_store(coordinate_service):
+    """Fixture for towers scattered around Paris (Lambert93) with random generations"""
+    rng = random.Random(5)
+    records = [
+        CoverageRecord(
+            operator=rng.choice(["Orange", "SFR", "Bouygues"]),
+            x=652000 + rng.randint(-40000, 40000),
+            y=6862000 + rng.randint(-40000, 40000),
+            network_2g=int(rng.random() < 0.3),
+            network_3g=int(rng.random() < 0.5),
+            network_4g=int(rng.random() < 0.5),
+        )
+        for _ in range(60)
+    ]
+    lon, lat = coordinate_service.lambert93_to_gps_many(
+        [record.x for record in records], [record.y for record in records]
+    )
+    return TowerStore.from_records(records, lon=lon, lat=lat)
+
+
+@pytest.fixture
+def tower_index(tower_store, coordinate_service):
+    """Fixture for the tower index over the test towers"""
+    return TowerIndex.build(
+        tower_store,
+        NETWORK_GEN_RADIUS_KM,
+        coordinate_service.calculate_distances,
+        coordinate_service.gps_to_lambert93_many,
+    )
+
+
+@pytest.fixture
+def coverage_grid(tower_store, tower_index, coordinate_service):
+    """Fixture for a coarse coverage grid over the test towers"""
+    return CoverageGrid.build(
+        tower_store,
+        tower_index,
+        coordinate_service.lambert93_to_gps_many,
+        cell_size_m=2000,
+    )
+
+
+def grid_lookup(grid, index, lats, lons, coordinate_service):
+    """Look points up in the grid, falling back to the index like CoverageService"""
+    lats, lons = np.asarray(lats), np.asarray(lons)
+    xs, ys = coordinate_service.gps_to_lambert93_many(lons, lats)
+    within, decided = grid.lookup(xs, ys)
+    within[~decided] = index.within_many(lats[~decided], lons[~decided])
+    return index.coverage_from_flags(within)
+
+
+class TestCoverageGrid:
+    """Unit tests for CoverageGrid"""
+
+    def test_lookup_matches_index(self, coverage_grid, tower_index, coordinate_service):
+        """Test that grid lookups with index fallback match the index"""
+        rng = random.Random(8)
+        lats = [48.8566 + rng.uniform(-0.8, 0.8) for _ in range(2000)]
+        lons = [2.3522 + rng.uniform(-1.2, 1.2) for _ in range(2000)]
+
+        assert grid_lookup(
+            coverage_grid, tower_index, lats, lons, coordinate_service
+        ) == tower_index.query_many(lats, lons)
+
+    def test_decided_cells_match_index(
+        self, coverage_grid, tower_index, coordinate_service
+    ):
+        """Test that flags of decided cells hold for every point of the cell"""
+        rng = np.random.default_rng(2)
+        rows, cols = coverage_grid.shape
+        xs = coverage_grid.origin_x + rng.uniform(0, cols, 5000) * 2000
+        ys = coverage_grid.origin_y + rng.uniform(0, rows, 5000) * 2000
+        within, decided = coverage_grid.lookup(xs, ys)
+        lons, lats = coordinate_service.lambert93_to_gps_many(xs, ys)
+
+        assert decided.mean() > 0.5
+        np.testing.assert_array_equal(
+            within[decided], tower_index.within_many(lats, lons)[decided]
+        )
+
+    def test_lookup_outside_grid(self, coverage_grid):
+        """Test that points outside the grid are left to the index"""
+        within, decided = coverage_grid.lookup(
+            np.array([coverage_grid.origin_x - 1.0, np.inf]), np.array([0.0, 0.0])
+        )
+
+        assert not decided.any()
+        assert not within.any()
+
+    def test_save_and_load(self, tmp_path, coverage_grid, tower_store, tower_index):
+        """Test that a saved grid loads back identical and matches its dataset"""
+        path = tmp_path / "grid.bin"
+        coverage_grid.save(str(path))
+
+        loaded = CoverageGrid.load(str(path))
+
+        assert loaded.shape == coverage_grid.shape
+        assert loaded.slots == coverage_grid.slots
+        np.testing.assert_array_equal(loaded.flags, coverage_grid.flags)
+        np.testing.assert_array_equal(loaded.undecided, coverage_grid.undecided)
+        assert loaded.matches(tower_store, tower_index)
+        # Mapped from the file, not read into memory
+        assert isinstance(loaded.flags, np.memmap)
+
+    def test_matches_other_dataset(
+        self, coverage_grid, tower_store, coordinate_service
+    ):
+        """Test that a grid is rejected for towers it was not built from"""
+        other = TowerStore.from_columns(
+            tower_store.operators,
+            tower_store.operator_codes,
+            tower_store.x + 1,
+            tower_store.y,
+            tower_store.networks,
+            tower_store.lon,
+            tower_store.lat,
+        )
+        index = TowerIndex.build(
+            other,
+            NETWORK_GEN_RADIUS_KM,
+            coordinate_service.calculate_distances,
+            coordinate_service.gps_to_lambert93_many,
+        )
+
+        assert not coverage_grid.matches(other, index)
@@ -1,8 +1,13 @@
 import pytest
 import tempfile
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from unittest.mock import Mock
 from pathlib import Path
 from src.data.coverage_loader import CoverageDataLoader
+from src.data.snapshot import DatasetSnapshot
 from src.models.records import CoverageRecord
 
 
@@ -28,6 +33,15 @@ def create_test_csv():
             pass  # File already deleted
 
 
+def memory_mapped(array: np.ndarray) -> bool:
+    """Whether an array is a view of a memory-mapped file"""
+    while array is not None:
+        if isinstance(array, np.memmap):
+            return True
+        array = array.base
+    return False
+
+
 class TestCoverageDataLoader:
     """Unit tests for CoverageDataLoader"""
 
@@ -151,6 +165,196 @@ Orange,102980,6847973,invalid,1,0"""
         with pytest.raises(FileNotFoundError):
             loader.load_data()
 
+    def test_load_store_columns(self, create_test_csv):
+        """Test that CSV data is loaded into compact columnar arrays"""
+        csv_content = """Operateur,x,y,2G,3G,4G
+Orange,102980,6847973,1,1,0
+SFR,103113,6848661,0,1,1
+Orange,103114,6848664,1,0,1"""
+
+        csv_path = create_test_csv(csv_content)
+
+        loader = CoverageDataLoader(csv_path)
+        store = loader.load_store()
+
+        assert store.operators == ("Orange", "SFR")
+        assert store.operator_codes.dtype == np.uint8
+        assert store.x.dtype == np.int32
+        assert store.y.dtype == np.int32
+        assert store.networks.dtype == np.uint8
+        assert store.operator_codes.tolist() == [0, 1, 0]
+        assert store.x.tolist() == [102980, 103113, 103114]
+        assert store.y.tolist() == [6847973, 6848661, 6848664]
+        assert store.has_network("2G").tolist() == [True, False, True]
+        assert store.has_network("3G").tolist() == [True, True, False]
+        assert store.has_network("4G").tolist() == [False, True, True]
+
+        # Towers are projected to GPS coordinates at load time (western Brittany)
+        assert store.lon.dtype == store.lat.dtype == np.float64
+        assert np.all((-5.2 < store.lon) & (store.lon < -4.9))
+        assert np.all((48.3 < store.lat) & (store.lat < 48.6))
+
+        # Store is cached and shared with the records accessor
+        assert loader.load_store() is store
+        assert [record.operator for record in loader.load_data()] == [
+            "Orange",
+            "SFR",
+            "Orange",
+        ]
+
+    def test_snapshot_reused(self, create_test_csv, tmp_path, monkeypatch):
+        """Test that a second loader maps the snapshot instead of parsing the CSV"""
+        csv_content = """Operateur,x,y,2G,3G,4G
+Orange,102980,6847973,1,1,0
+SFR,103113,6848661,0,1,1"""
+
+        csv_path = create_test_csv(csv_content)
+        first = CoverageDataLoader(csv_path, snapshot_dir=str(tmp_path))
+        first_store = first.load_store()
+        assert first.snapshot.store_path.exists()
+
+        second = CoverageDataLoader(csv_path, snapshot_dir=str(tmp_path))
+        monkeypatch.setattr(
+            second, "_parse_csv", Mock(side_effect=AssertionError("CSV parsed"))
+        )
+        store = second.load_store()
+
+        assert store.operators == first_store.operators
+        for column in ("operator_codes", "x", "y", "networks", "lon", "lat"):
+            np.testing.assert_array_equal(
+                getattr(store, column), getattr(first_store, column)
+            )
+            assert getattr(store, column).dtype == getattr(first_store, column).dtype
+        assert store.fingerprint() == first_store.fingerprint()
+        assert [record.operator for record in second.load_data()] == ["Orange", "SFR"]
+
+    def test_snapshot_invalidated_by_csv_change(self, create_test_csv, tmp_path):
+        """Test that a snapshot is not reused once the CSV content changes"""
+        csv_path = create_test_csv(
+            """Operateur,x,y,2G,3G,4G
+Orange,102980,6847973,1,1,0"""
+        )
+        CoverageDataLoader(csv_path, snapshot_dir=str(tmp_path)).load_store()
+
+        # Same size, different content
+        with open(csv_path, "w") as f:
+            f.write(
+                """Operateur,x,y,2G,3G,4G
+Orange,102980,6847973,0,1,1"""
+            )
+
+        store = CoverageDataLoader(csv_path, snapshot_dir=str(tmp_path)).load_store()
+        assert store.has_network("2G").tolist() == [False]
+        assert store.has_network("4G").tolist() == [True]
+
+    def test_snapshot_index_restored(self, create_test_csv, tmp_path):
+        """Test that the prebuilt index is restored and answers like a fresh build"""
+        radii_km = {"2G": 30.0, "3G": 5.0, "4G": 10.0}
+        csv_path = create_test_csv(
+            """Operateur,x,y,2G,3G,4G
+Orange,102980,6847973,1,1,0
+SFR,103113,6848661,0,1,1"""
+        )
+        built = CoverageDataLoader(csv_path, snapshot_dir=str(tmp_path)).load_index(
+            radii_km
+        )
+        assert DatasetSnapshot(Path(csv_path), tmp_path).index_path.exists()
+
+        loader = CoverageDataLoader(csv_path, snapshot_dir=str(tmp_path))
+        restored = loader.load_index(radii_km)
+
+        assert restored.operators == built.operators == ["orange", "sfr"]
+        lats, lons = loader.load_store().lat, loader.load_store().lon
+        assert restored.query_many(lats, lons) == built.query_many(lats, lons)
+        # Other radii need another index
+        assert (
+            loader.snapshot.load_index(
+                loader.load_store(), {"2G": 1.0, "3G": 1.0, "4G": 1.0}, None, None
+            )
+            is None
+        )
+
+    def test_snapshot_index_memory_mapped(self, create_test_csv, tmp_path):
+        """Test that a restored index references the mapped snapshot, even in the
+        process that built it"""
+        csv_path = create_test_csv(
+            """Operateur,x,y,2G,3G,4G
+Orange,102980,6847973,1,1,0
+SFR,103113,6848661,0,1,1"""
+        )
+        loader = CoverageDataLoader(csv_path, snapshot_dir=str(tmp_path))
+        index = loader.load_index({"2G": 30.0, "3G": 5.0, "4G": 10.0})
+
+        assert memory_mapped(loader.load_store().lon)
+        for slot in index.slots:
+            assert memory_mapped(slot.ids)
+            if slot.tree is not None:
+                assert memory_mapped(slot.tree.data)
+
+    def test_snapshot_built_once_by_concurrent_loaders(
+        self, create_test_csv, tmp_path, monkeypatch
+    ):
+        """Test that loaders starting together parse the CSV once and share the
+        snapshot"""
+        csv_path = create_test_csv(
+            """Operateur,x,y,2G,3G,4G
+Orange,102980,6847973,1,1,0"""
+        )
+        parse_csv = CoverageDataLoader._parse_csv
+        parses = []
+
+        def slow_parse_csv(loader):
+            parses.append(loader)
+            time.sleep(0.1)
+            return parse_csv(loader)
+
+        monkeypatch.setattr(CoverageDataLoader, "_parse_csv", slow_parse_csv)
+        loaders = [
+            CoverageDataLoader(csv_path, snapshot_dir=str(tmp_path)) for _ in range(4)
+        ]
+        with ThreadPoolExecutor(len(loaders)) as executor:
+            stores = list(executor.map(lambda loader: loader.load_store(), loaders))
+
+        assert len(parses) == 1
+        assert all(len(store) == 1 for store in stores)
+
+    def test_snapshot_corrupted(self, create_test_csv, tmp_path):
+        """Test that an unreadable snapshot is ignored and rewritten"""
+        csv_path = create_test_csv(
+            """Operateur,x,y,2G,3G,4G
+Orange,102980,6847973,1,1,0"""
+        )
+        loader = CoverageDataLoader(csv_path, snapshot_dir=str(tmp_path))
+        loader.snapshot.store_path.write_bytes(b"NCCSNAP\0garbage")
+
+        assert len(loader.load_store()) == 1
+        assert (
+            len(CoverageDataLoader(csv_path, snapshot_dir=str(tmp_path)).load_store())
+            == 1
+        )
+
+    def test_concurrent_loads_parse_once(self, create_test_csv, monkeypatch):
+        """Test that loads racing from several threads parse the CSV only once"""
+        csv_path = create_test_csv(
+            """Operateur,x,y,2G,3G,4G
+Orange,102980,6847973,1,1,0"""
+        )
+        loader = CoverageDataLoader(csv_path)
+        parse_csv = loader._parse_csv
+
+        def slow_parse_csv():
+            time.sleep(0.05)
+            return parse_csv()
+
+        parse = Mock(side_effect=slow_parse_csv)
+        monkeypatch.setattr(loader, "_parse_csv", parse)
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            stores = list(executor.map(lambda _: loader.load_store(), range(4)))
+
+        parse.assert_called_once()
+        assert all(store is stores[0] for store in stores)
+
     def test_coverage_record_validation(self):
         """Test that CoverageRecord validates data correctly"""
         # Valid record
@@ -177,7 +381,7 @@ Orange,102980,6847973,invalid,1,0"""
         assert isinstance(loader.csv_path, Path)
         assert str(loader.csv_path) == "/path/to/test.csv"
         assert loader._loaded is False
-        assert loader._data == []
+        assert loader._store is None
 
     def test_reload_functionality(self, create_test_csv):
         """Test reload() method properly clears cache and reloads data"""
@@ -192,15 +396,16 @@ Orange,102980,6847973,1,1,0"""
         records1 = loader.load_data()
         assert len(records1) == 1
         assert loader._loaded is True
-        assert len(loader._data) == 1
+        assert len(loader._store) == 1
+        store1 = loader._store
 
         # Reload should clear cache and reload
         records2 = loader.reload()
         assert len(records2) == 1
         assert loader._loaded is True
 
-        # Should be same list object (memory efficient) but freshly loaded
-        assert records1 is records2  # Same list object
+        # Should be freshly loaded from the file
+        assert loader._store is not store1
         assert records2[0].operator == "Orange"  # Freshly loaded content
 
     def test_reload_with_file_changes(self, create_test_csv):
@@ -258,6 +463,27 @@ Orange,102980,6847973,1,1,0"""
         assert len(records2) == 0
         assert loader._loaded is True
 
+    def test_reload_failure_keeps_data(self, create_test_csv):
+        """Test that a reload failing to parse the CSV keeps the loaded data"""
+        csv_path = create_test_csv(
+            """Operateur,x,y,2G,3G,4G
+Orange,102980,6847973,1,1,0"""
+        )
+        loader = CoverageDataLoader(csv_path)
+        records = loader.load_data()
+
+        with open(csv_path, "w") as f:
+            f.write(
+                """Operateur,x,y,2G,3G,4G
+SFR,invalid,6848661,1,1,0"""
+            )
+
+        with pytest.raises(ValueError):
+            loader.reload()
+
+        assert loader.load_data() is records
+        assert loader._loaded is True
+
     def test_reload_state_management(self, create_test_csv):
         """Test reload() properly manages internal state"""
         csv_content = """Operateur,x,y,2G,3G,4G
@@ -269,14 +495,14 @@ Orange,102980,6847973,1,1,0"""
 
         # Initial state
         assert loader._loaded is False
-        assert len(loader._data) == 0
+        assert loader._store is None
 
         # After load
         loader.load_data()
         assert loader._loaded is True
-        assert len(loader._data) == 1
+        assert len(loader._store) == 1
 
         # After reload - state should be properly managed
         loader.reload()
         assert loader._loaded is True  # Should be loaded after reload
-        assert len(loader._data) == 1  # Should contain reloaded data
+        assert len(loader._store) == 1  # Should contain reloaded data
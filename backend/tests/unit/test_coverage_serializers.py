@@ -0,0 +1,54 @@
+import pytest
+from pydantic import TypeAdapter
+from src.api.serializers.coverage.responses import (
+    CoverageResponse,
+    CoverageResponseType,
+    LocationCoverageLine,
+)
+from src.models.coverage import LocationCoverageData, NetworkCoverage
+
+
+@pytest.fixture
+def domain_results():
+    """Fixture for coverage results with every network combination and an error"""
+    return {
+        "id1": LocationCoverageData(
+            error=None,
+            operators={
+                f"operator {mask}": NetworkCoverage(
+                    network_2g=bool(mask & 1),
+                    network_3g=bool(mask & 2),
+                    network_4g=bool(mask & 4),
+                )
+                for mask in range(8)
+            },
+        ),
+        'id "2" é': LocationCoverageData(
+            error='Could not geocode address: 1 "rue" \\ Noël', operators={}
+        ),
+    }
+
+
+class TestCoverageSerializers:
+    """Unit tests for the direct JSON serialization of coverage responses"""
+
+    def test_to_json_matches_response_model(self, domain_results):
+        """Test that the fast path gives the bytes of the Pydantic serializers"""
+        adapter = TypeAdapter(CoverageResponseType)
+        expected = adapter.dump_json(
+            CoverageResponse.from_domain(domain_results), by_alias=True
+        )
+
+        assert CoverageResponse.to_json(domain_results) == expected
+        assert CoverageResponse.to_json({}) == b"{}"
+
+    def test_ndjson_from_domain_matches_line_model(self, domain_results):
+        """Test that NDJSON lines built from fragments match the line serializer"""
+        for location_id, location_data in domain_results.items():
+            expected = LocationCoverageLine.from_domain(
+                location_id, location_data
+            ).to_ndjson()
+
+            assert LocationCoverageLine.ndjson_from_domain(
+                location_id, location_data
+            ) == expected.encode("utf-8")
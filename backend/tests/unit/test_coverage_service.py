@@ -1,8 +1,19 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+import numpy as np
 import pytest
-from unittest.mock import AsyncMock, Mock
-from src.services.coverage_service import CoverageService
-from src.models.coverage import NetworkCoverage
+from unittest.mock import AsyncMock, Mock, patch
+from src.config import Settings
+from src.data.coverage_grid import CoverageGrid
+from src.services import coverage_service
+from src.services.coverage_service import CoverageService, NETWORK_GEN_RADIUS_KM
+from src.models.coverage import LocationCoverageData, NetworkCoverage
+from src.data.tower_index import TowerIndex
+from src.data.tower_store import TowerStore
 from src.models.records import CoverageRecord
+from src.services.coordinate_service import CoordinateService
 
 
 @pytest.fixture
@@ -41,16 +52,20 @@ def mock_geocoding_service():
     """Fixture for geocoding service mock"""
     mock = AsyncMock()
     mock.geocode_address.return_value = (48.8566, 2.3522)  # Paris coordinates
+
+    async def geocode_many(addresses):
+        for position, address in enumerate(addresses):
+            yield position, await mock.geocode_address(address)
+
+    mock.geocode_many = geocode_many
+    mock.metrics = Mock(return_value={"cache": {}})
     return mock
 
 
 @pytest.fixture
-def mock_coordinate_service():
-    """Fixture for coordinate service mock"""
-    mock = Mock()
-    mock.lambert93_to_gps.return_value = (2.3522, 48.8566)  # lon, lat
-    mock.calculate_distance.return_value = 5.0  # Within 5km
-    return mock
+def coordinate_service():
+    """Fixture for coordinate service instance"""
+    return CoordinateService()
 
 
 @pytest.fixture
@@ -65,22 +80,47 @@ def coverage_service_with_mocks(
     monkeypatch,
     mock_coverage_records,
     mock_geocoding_service,
-    mock_coordinate_service,
+    coordinate_service,
     mock_coverage_loader,
 ):
     """Fixture for coverage service with all dependencies mocked"""
     # Mock the loader to return our test data
     mock_coverage_loader.load_data.return_value = mock_coverage_records
+    lon, lat = coordinate_service.lambert93_to_gps_many(
+        [record.x for record in mock_coverage_records],
+        [record.y for record in mock_coverage_records],
+    )
+    store = TowerStore.from_records(mock_coverage_records, lon=lon, lat=lat)
+    mock_coverage_loader.load_store.return_value = store
+    mock_coverage_loader.load_index.side_effect = lambda radii_km: TowerIndex.build(
+        store,
+        radii_km,
+        coordinate_service.calculate_distances,
+        coordinate_service.gps_to_lambert93_many,
+    )
 
     # Create service and inject mocks
     service = CoverageService()
     service.loader = mock_coverage_loader
     service.geocoding_service = mock_geocoding_service
-    service.coordinate_service = mock_coordinate_service
+    service.coordinate_service = coordinate_service
 
     return service
 
 
+class PendingProcessPool(ProcessPoolExecutor):
+    """Process pool whose tasks complete when the test sets their result"""
+
+    def __init__(self):
+        super().__init__(max_workers=1)
+        self.futures = []
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        self.futures.append(future)
+        return future
+
+
 class TestCoverageService:
     """Unit tests for CoverageService"""
 
@@ -92,6 +132,15 @@ class TestCoverageService:
         assert records == mock_coverage_records
         coverage_service_with_mocks.loader.load_data.assert_called_once()
 
+    def test_tower_store_property(
+        self, coverage_service_with_mocks, mock_coverage_records
+    ):
+        """Test that tower_store property returns loader columnar data"""
+        store = coverage_service_with_mocks.tower_store
+        assert len(store) == len(mock_coverage_records)
+        assert store.operators == ("Orange", "SFR", "Bouygues")
+        coverage_service_with_mocks.loader.load_store.assert_called_once()
+
     @pytest.mark.asyncio
     async def test_get_coverage_for_locations_single_location(
         self, coverage_service_with_mocks
@@ -139,6 +188,82 @@ class TestCoverageService:
         # Should handle the failure gracefully and return empty result for that location
         assert len(result) == 0 or result.get("loc1") == {}
 
+    @pytest.mark.asyncio
+    async def test_get_coverage_for_coordinates(self, coverage_service_with_mocks):
+        """Test that coordinates are looked up without geocoding"""
+        service = coverage_service_with_mocks
+        locations = {"paris": (48.8566, 2.3522), "marseille": (43.2965, 5.3698)}
+
+        result = await service.get_coverage_for_coordinates(locations)
+
+        assert list(result) == ["paris", "marseille"]
+        assert result["paris"].error is None
+        assert result["paris"].operators["sfr"] == NetworkCoverage(
+            network_2g=True, network_3g=False, network_4g=True
+        )
+        assert result["marseille"] == LocationCoverageData(error=None, operators={})
+        service.geocoding_service.geocode_address.assert_not_called()
+
+    async def test_stream_coverage_for_locations(self, coverage_service_with_mocks):
+        """Test that locations are streamed in geocoding completion order"""
+        service = coverage_service_with_mocks
+        geocoded = asyncio.Event()
+
+        async def geocode_many(addresses):
+            yield 2, None
+            await geocoded.wait()
+            yield 0, (48.8566, 2.3522)
+            yield 1, (43.2965, 5.3698)
+
+        service.geocoding_service.geocode_many = geocode_many
+        locations = {
+            "paris": "157 boulevard Mac Donald 75019 Paris",
+            "marseille": "2 La Canebière 13001 Marseille",
+            "nowhere": "nowhere at all",
+        }
+
+        stream = service.stream_coverage_for_locations(locations)
+        first = await anext(stream)
+        geocoded.set()
+        with patch.object(
+            service,
+            "_lookup_coverage_by_coordinates_many",
+            wraps=service._lookup_coverage_by_coordinates_many,
+        ) as lookup:
+            rest = [item async for item in stream]
+
+        assert first == (
+            "nowhere",
+            LocationCoverageData(
+                error="Could not geocode address: nowhere at all", operators={}
+            ),
+        )
+        assert [location_id for location_id, _ in rest] == ["paris", "marseille"]
+        assert rest[0][1].operators["orange"].network_2g is True
+        assert rest[1][1].operators == {}
+        # Results available together are looked up in one batch
+        assert lookup.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_stream_coverage_geocoding_error(self, coverage_service_with_mocks):
+        """Test that a geocoding error ends the stream after the results so far"""
+        service = coverage_service_with_mocks
+
+        async def geocode_many(addresses):
+            yield 0, None
+            raise RuntimeError("geocoder crashed")
+
+        service.geocoding_service.geocode_many = geocode_many
+        received = []
+
+        with pytest.raises(RuntimeError, match="geocoder crashed"):
+            async for location_id, _ in service.stream_coverage_for_locations(
+                {"a": "first", "b": "second"}
+            ):
+                received.append(location_id)
+
+        assert received == ["a"]
+
     def test_lookup_coverage_by_coordinates_with_coverage(
         self, coverage_service_with_mocks
     ):
@@ -147,7 +272,7 @@ class TestCoverageService:
 
         result = coverage_service_with_mocks._lookup_coverage_by_coordinates(lat, lon)
 
-        # Should find Orange and SFR (mocked to be within range)
+        # Should find Orange and SFR (a few kilometers away)
         assert "orange" in result
         assert "sfr" in result
         assert result["orange"]["2G"] is True
@@ -158,17 +283,336 @@ class TestCoverageService:
         self, coverage_service_with_mocks
     ):
         """Test coverage lookup when no towers are in range"""
-        # Mock coordinate service to return large distance
-        coverage_service_with_mocks.coordinate_service.calculate_distance.return_value = (
-            50.0
-        )
-
-        lat, lon = 48.8566, 2.3522
+        # Marseille is far away from every test tower
+        lat, lon = 43.2965, 5.3698
         result = coverage_service_with_mocks._lookup_coverage_by_coordinates(lat, lon)
 
         # Should return empty dict when no towers in range
         assert result == {}
 
+    def test_lookup_coverage_by_coordinates_many_duplicates(
+        self, coverage_service_with_mocks
+    ):
+        """Test that duplicate points are looked up once"""
+        service = coverage_service_with_mocks
+        lats = [48.8566, 43.2965, 48.8566, 48.8566]
+        lons = [2.3522, 5.3698, 2.3522, 2.3522]
+
+        with patch.object(
+            service,
+            "_lookup_unique_coordinates",
+            wraps=service._lookup_unique_coordinates,
+        ) as lookup:
+            results = service._lookup_coverage_by_coordinates_many(lats, lons)
+
+        assert lookup.call_count == 1
+        assert len(lookup.call_args.args[0]) == 2
+        assert results == [
+            service._lookup_coverage_by_coordinates(lat, lon)
+            for lat, lon in zip(lats, lons)
+        ]
+
+    def test_lookup_coverage_by_coordinates_many(self, coverage_service_with_mocks):
+        """Test batch coverage lookup matches single point lookups"""
+        lats = [48.8566, 48.8606]
+        lons = [2.3522, 2.3376]
+
+        results = coverage_service_with_mocks._lookup_coverage_by_coordinates_many(
+            lats, lons
+        )
+
+        assert results == [
+            coverage_service_with_mocks._lookup_coverage_by_coordinates(lat, lon)
+            for lat, lon in zip(lats, lons)
+        ]
+        assert (
+            coverage_service_with_mocks._lookup_coverage_by_coordinates_many([], [])
+            == []
+        )
+
+    def test_lookup_cached_matches_uncached(self, coverage_service_with_mocks):
+        """Test that cached cells give the same coverage as tower index lookups"""
+        service = coverage_service_with_mocks
+        index = service.dataset.index
+        store = service.dataset.store
+        rng = np.random.default_rng(3)
+        # Points around the towers, many close to a radius limit
+        distances = rng.choice([5.0, 10.0, 30.0], 500) * rng.uniform(0.998, 1.002, 500)
+        bearings = rng.uniform(0, 2 * np.pi, 500)
+        lats = store.lat[0] + np.degrees(distances * np.cos(bearings) / 6371.0)
+        lons = store.lon[0] + np.degrees(
+            distances * np.sin(bearings) / 6371.0
+        ) / np.cos(np.radians(store.lat[0]))
+        # Other points in the same cells
+        near_lats = lats + rng.uniform(-4e-5, 4e-5, len(lats))
+        near_lons = lons + rng.uniform(-4e-5, 4e-5, len(lons))
+
+        first = service._lookup_coverage_by_coordinates_many(lats, lons)
+        hits = service.metrics()["coverage"]["cache"]["hits"]
+        second = service._lookup_coverage_by_coordinates_many(near_lats, near_lons)
+
+        assert first == index.query_many(lats, lons)
+        assert second == index.query_many(near_lats, near_lons)
+        assert service.metrics()["coverage"]["cache"]["hits"] - hits > 0
+
+    def test_lookup_without_coverage_cache(self, coverage_service_with_mocks):
+        """Test that a zero cache size disables the coverage cache"""
+        service = coverage_service_with_mocks
+        service.settings = Settings(coverage_cache_size=0)
+        service.coverage_cache = service._create_coverage_cache()
+
+        result = service._lookup_coverage_by_coordinates(48.8566, 2.3522)
+
+        assert service.coverage_cache is None
+        assert "coverage" not in service.metrics()
+        assert "orange" in result
+
+    def test_coverage_cache_persisted(self, tmp_path):
+        """Test that cached cells are loaded back by a new service, per dataset"""
+        csv_path = tmp_path / "towers.csv"
+        csv_path.write_text("Operateur,x,y,2G,3G,4G\nOrange,652000,6862000,1,1,1\n")
+        settings = Settings(
+            coverage_csv_path=str(csv_path),
+            coverage_snapshot=False,
+            coverage_cache_path=str(tmp_path / "coverage.sqlite"),
+        )
+        service = CoverageService(settings)
+        lat, lon = service.dataset.store.lat[0], service.dataset.store.lon[0]
+        expected = service._lookup_coverage_by_coordinates(lat, lon)
+        service.close()
+
+        service = CoverageService(settings)
+        try:
+            assert service._lookup_coverage_by_coordinates(lat, lon) == expected
+            assert service.metrics()["coverage"]["cache"]["hits"] == 1
+
+            csv_path.write_text("Operateur,x,y,2G,3G,4G\nSFR,652000,6862000,1,0,0\n")
+            service.reload()
+            assert list(service._lookup_coverage_by_coordinates(lat, lon)) == ["sfr"]
+        finally:
+            service.close()
+
+    def test_lookup_with_grid_engine(self, tmp_path, coverage_service_with_mocks):
+        """Test that the grid engine returns the same coverage as the tower index"""
+        service = coverage_service_with_mocks
+        store = service.loader.load_store()
+        index = service.loader.load_index(NETWORK_GEN_RADIUS_KM)
+        grid_path = tmp_path / "grid.bin"
+        CoverageGrid.build(
+            store,
+            index,
+            service.coordinate_service.lambert93_to_gps_many,
+            cell_size_m=5000,
+        ).save(str(grid_path))
+        lats = [48.8566 + offset / 10 for offset in range(-5, 6)]
+        lons = [2.3522 + offset / 10 for offset in range(-5, 6)]
+        expected = index.query_many(lats, lons)
+
+        service.settings = Settings(
+            coverage_engine="grid", coverage_grid_path=str(grid_path)
+        )
+
+        assert service.coverage_grid is not None
+        assert service._lookup_coverage_by_coordinates_many(lats, lons) == expected
+
+    def test_grid_engine_without_grid_file(self, tmp_path, coverage_service_with_mocks):
+        """Test that a missing grid file falls back to the tower index"""
+        service = coverage_service_with_mocks
+        service.settings = Settings(
+            coverage_engine="grid", coverage_grid_path=str(tmp_path / "missing.bin")
+        )
+
+        assert service.coverage_grid is None
+        assert "orange" in service._lookup_coverage_by_coordinates(48.8566, 2.3522)
+
+    def test_warmup(self, coverage_service_with_mocks):
+        """Test that warmup loads the tower index and marks the service ready"""
+        service = coverage_service_with_mocks
+        assert service.ready is False
+
+        service.warmup()
+
+        assert service.ready is True
+        service.loader.load_index.assert_called_once()
+        # Lookups reuse the warmed index
+        service._lookup_coverage_by_coordinates(48.8566, 2.3522)
+        service.loader.load_index.assert_called_once()
+
+    def test_ready_after_lookup_processes_start(self, coverage_service_with_mocks):
+        """Test that the service is not ready until the lookup processes are loaded"""
+        service = coverage_service_with_mocks
+        service.settings = Settings(
+            coverage_lookup_executor="process", coverage_lookup_workers=2
+        )
+        pool = service._lookup_executor = PendingProcessPool()
+        warmup = threading.Thread(target=service.warmup)
+        warmup.start()
+        try:
+            deadline = time.monotonic() + 10
+            while len(pool.futures) < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+            service.loader.load_index.assert_called_once()
+            assert service.ready is False
+        finally:
+            for future in pool.futures:
+                future.set_result("version")
+            warmup.join(timeout=10)
+
+        assert service.ready is True
+        service.close()
+
+    def test_reload_swaps_dataset(self, tmp_path):
+        """Test that reload swaps in the new dataset and leaves the previous intact"""
+        csv_path = tmp_path / "towers.csv"
+        csv_path.write_text("Operateur,x,y,2G,3G,4G\nOrange,652000,6862000,1,1,1\n")
+        service = CoverageService(
+            Settings(coverage_csv_path=str(csv_path), coverage_snapshot=False)
+        )
+        previous = service.dataset
+        lat, lon = previous.store.lat[0], previous.store.lon[0]
+        assert "orange" in service._lookup_coverage_by_coordinates(lat, lon)
+
+        csv_path.write_text("Operateur,x,y,2G,3G,4G\nSFR,652000,6862000,1,0,0\n")
+        dataset = service.reload()
+
+        assert service.dataset is dataset
+        assert dataset.version != previous.version
+        assert service._lookup_coverage_by_coordinates(lat, lon) == {
+            "sfr": {"2G": True, "3G": False, "4G": False}
+        }
+        # Lookups holding the previous dataset still answer from it
+        assert "orange" in previous.index.query(lat, lon)
+
+    def test_reload_failure_keeps_dataset(self, tmp_path):
+        """Test that a failed reload keeps serving the current dataset"""
+        csv_path = tmp_path / "towers.csv"
+        csv_path.write_text("Operateur,x,y,2G,3G,4G\nOrange,652000,6862000,1,1,1\n")
+        service = CoverageService(
+            Settings(coverage_csv_path=str(csv_path), coverage_snapshot=False)
+        )
+        previous = service.dataset
+
+        csv_path.write_text("Operateur,x,y,2G,3G,4G\nOrange,invalid,6862000,1,1,1\n")
+        with pytest.raises(ValueError):
+            service.reload()
+
+        assert service.dataset is previous
+        assert not service.reloading
+
+    def test_start_reload_while_reloading(self, coverage_service_with_mocks):
+        """Test that a reload is not started while another one is running"""
+        service = coverage_service_with_mocks
+
+        with service._reload_lock:
+            assert service.reloading is True
+            assert service.start_reload() is False
+
+    async def test_lookup_runs_off_event_loop(self, coverage_service_with_mocks):
+        """Test that lookups run in the thread pool, not on the event loop thread"""
+        service = coverage_service_with_mocks
+        threads = []
+        lookup = service._lookup_coverage_by_coordinates_many
+
+        def record_thread(lats, lons):
+            threads.append(threading.current_thread())
+            return lookup(lats, lons)
+
+        service._lookup_coverage_by_coordinates_many = record_thread
+        try:
+            result = await service.get_coverage_for_coordinates(
+                {"paris": (48.8566, 2.3522)}
+            )
+        finally:
+            service.close()
+
+        assert "orange" in result["paris"].operators
+        assert threads and threads[0] is not threading.current_thread()
+
+    async def test_lookup_inline(self, coverage_service_with_mocks):
+        """Test that the inline executor looks up on the calling thread"""
+        service = coverage_service_with_mocks
+        service.settings = Settings(coverage_lookup_executor="inline")
+
+        assert service.lookup_executor is None
+        result = await service.get_coverage_for_coordinates(
+            {"paris": (48.8566, 2.3522)}
+        )
+        assert "orange" in result["paris"].operators
+
+    async def test_lookup_in_worker_processes(self, tmp_path):
+        """Test that worker processes answer from the dataset version of the parent"""
+        csv_path = tmp_path / "towers.csv"
+        csv_path.write_text("Operateur,x,y,2G,3G,4G\nOrange,652000,6862000,1,1,1\n")
+        service = CoverageService(
+            Settings(
+                coverage_csv_path=str(csv_path),
+                coverage_snapshot=False,
+                coverage_lookup_executor="process",
+                coverage_lookup_workers=1,
+            )
+        )
+        try:
+            service.warmup()
+            lat, lon = service.dataset.store.lat[0], service.dataset.store.lon[0]
+            result = await service.get_coverage_for_coordinates({"tower": (lat, lon)})
+            assert list(result["tower"].operators) == ["orange"]
+
+            csv_path.write_text("Operateur,x,y,2G,3G,4G\nSFR,652000,6862000,1,0,0\n")
+            service.reload()
+            result = await service.get_coverage_for_coordinates({"tower": (lat, lon)})
+            assert list(result["tower"].operators) == ["sfr"]
+        finally:
+            service.close()
+
+    def test_lookup_worker_reloads_once_per_parent_version(self, tmp_path, monkeypatch):
+        """Test that a lookup worker only catches up when the parent swaps datasets"""
+        csv_path = tmp_path / "towers.csv"
+        csv_path.write_text("Operateur,x,y,2G,3G,4G\nOrange,652000,6862000,1,1,1\n")
+        settings = Settings(
+            coverage_csv_path=str(csv_path),
+            coverage_snapshot=False,
+            coverage_lookup_executor="process",
+            coverage_cache_path=str(tmp_path / "coverage.sqlite"),
+            geocoding_cache_path=str(tmp_path / "geocoding.sqlite"),
+        )
+        parent = CoverageService(settings)
+        parent.warmup()
+        lats, lons = parent.dataset.store.lat[:1], parent.dataset.store.lon[:1]
+        # The CSV changes after the parent loaded it but before the worker starts
+        csv_path.write_text("Operateur,x,y,2G,3G,4G\nSFR,652000,6862000,1,0,0\n")
+        monkeypatch.setattr(coverage_service, "_worker_service", None)
+        monkeypatch.setattr(coverage_service, "_worker_parent_version", None)
+
+        coverage_service._init_lookup_worker(settings, parent.dataset.version)
+        worker = coverage_service._worker_service
+        try:
+            # Workers only load the dataset
+            assert worker.coverage_cache is None
+            assert worker.geocoding_service.cache.persistent is None
+            reload = Mock(wraps=worker.reload)
+            monkeypatch.setattr(worker, "reload", reload)
+
+            # The worker keeps its newer dataset instead of reloading on every lookup
+            for _ in range(3):
+                coverage_service._lookup_in_worker(parent.dataset.version, lats, lons)
+            reload.assert_not_called()
+
+            # It reloads once after the parent swaps in another version
+            parent.reload()
+            csv_path.write_text("Operateur,x,y,2G,3G,4G\nFree,652000,6862000,0,0,1\n")
+            parent.reload()
+            for _ in range(3):
+                result = coverage_service._lookup_in_worker(
+                    parent.dataset.version, lats, lons
+                )
+            assert reload.call_count == 1
+            assert worker.dataset.version == parent.dataset.version
+            assert list(result[0]) == ["free"]
+        finally:
+            worker.close()
+            parent.close()
+
     def test_build_operator_coverage(self, coverage_service_with_mocks):
         """Test conversion of raw coverage data to NetworkCoverage objects"""
         coverage_data = {
@@ -1,14 +1,158 @@
+import asyncio
+import csv
+import email
+import email.policy
+import io
 import pytest
-from unittest.mock import AsyncMock, Mock, patch
+from unittest.mock import patch
 import httpx
-from pydantic import ValidationError
+from pathlib import Path
+from src.config import Settings
+from src.data.address_index import AddressIndex
 from src.services.geocoding_service import GeocodingService
 
 
 @pytest.fixture
-def geocoding_service():
-    """Fixture for geocoding service instance"""
-    return GeocodingService()
+def api_requests():
+    """Fixture collecting the requests sent to the mocked geocoding API"""
+    return []
+
+
+@pytest.fixture
+def api_response(api_requests):
+    """
+    Fixture configuring the mocked geocoding API: set `handler` to a function returning
+    an httpx.Response (or raising) for a request
+    """
+
+    class MockedAPI:
+        handler = None
+
+        def __call__(self, request: httpx.Request) -> httpx.Response:
+            api_requests.append(request)
+            return self.handler(request)
+
+    return MockedAPI()
+
+
+@pytest.fixture
+def geocoding_service(api_response):
+    """Fixture for geocoding service instance talking to the mocked API"""
+    return GeocodingService(
+        settings=Settings(geocoding_cache_path=None),
+        transport=httpx.MockTransport(api_response),
+    )
+
+
+class StandInAdresseAPI:
+    """
+    Local stand-in for the search and bulk CSV endpoints of the Adresse API, geocoding
+    the addresses it knows
+    """
+
+    def __init__(self, known):
+        self.known = known
+        self.requests = []
+        self.uploads = []
+        # Status code answered by the bulk endpoint, when it should fail
+        self.csv_failure = None
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if request.url.path == "/search/csv/":
+            return self.search_csv(request)
+        return self.search(request)
+
+    @property
+    def single_requests(self):
+        return [r for r in self.requests if r.url.path == "/search/"]
+
+    def search(self, request: httpx.Request) -> httpx.Response:
+        coordinates = self.known.get(request.url.params["q"])
+        features = []
+        if coordinates is not None:
+            latitude, longitude = coordinates
+            features.append(
+                {
+                    "type": "Feature",
+                    "geometry": {"type": "Point", "coordinates": [longitude, latitude]},
+                    "properties": {"label": request.url.params["q"], "score": 0.9},
+                }
+            )
+        return httpx.Response(
+            200,
+            json={
+                "type": "FeatureCollection",
+                "query": request.url.params["q"],
+                "features": features,
+            },
+        )
+
+    def search_csv(self, request: httpx.Request) -> httpx.Response:
+        if self.csv_failure is not None:
+            return httpx.Response(self.csv_failure)
+
+        form = email.message_from_bytes(
+            f"Content-Type: {request.headers['content-type']}\r\n\r\n".encode()
+            + request.content,
+            policy=email.policy.HTTP,
+        )
+        fields = {}
+        for part in form.iter_parts():
+            name = part.get_param("name", header="content-disposition")
+            fields.setdefault(name, []).append(part.get_payload(decode=True).decode())
+
+        rows = list(csv.DictReader(io.StringIO(fields["data"][0])))
+        self.uploads.append(rows)
+        result_columns = fields["result_columns"]
+
+        output = io.StringIO()
+        writer = csv.DictWriter(output, fieldnames=[*rows[0].keys(), *result_columns])
+        writer.writeheader()
+        for row in rows:
+            coordinates = self.known.get(row[fields["columns"][0]])
+            result = {"latitude": "", "longitude": "", "result_status": "not-found"}
+            if coordinates is not None:
+                result = {
+                    "latitude": coordinates[0],
+                    "longitude": coordinates[1],
+                    "result_status": "ok",
+                }
+            writer.writerow({**row, **{c: result[c] for c in result_columns}})
+        return httpx.Response(
+            200,
+            content=output.getvalue().encode(),
+            headers={"content-type": "text/csv"},
+        )
+
+
+@pytest.fixture
+def stand_in_api():
+    """Fixture for the local stand-in of the geocoding API"""
+    return StandInAdresseAPI(
+        {
+            "157 boulevard Mac Donald 75019 Paris": (48.8978, 2.3795),
+            "5 avenue Anatole France 75007 Paris": (48.8584, 2.2945),
+            "78 Le Poujol 30125 L'Estréchure": (44.1001, 3.7794),
+            "1 place de la Comédie 34000 Montpellier": (43.6085, 3.8796),
+        }
+    )
+
+
+def batch_geocoding_service(stand_in_api, **settings):
+    """Geocoding service talking to the stand-in API, without persistent cache"""
+    return GeocodingService(
+        settings=Settings(geocoding_cache_path=None, **settings),
+        transport=httpx.MockTransport(stand_in_api),
+    )
+
+
+async def geocode_all(service, addresses):
+    """Results of geocode_many, in the order of the addresses"""
+    results = [None] * len(addresses)
+    async for position, coordinates in service.geocode_many(addresses):
+        results[position] = coordinates
+    return results
 
 
 @pytest.fixture
@@ -50,178 +194,467 @@ class TestGeocodingService:
 
     @pytest.mark.asyncio
     async def test_geocode_address_success(
-        self, geocoding_service, mock_successful_response
+        self, geocoding_service, api_response, api_requests, mock_successful_response
     ):
         """Test successful geocoding of an address"""
-        with patch("httpx.AsyncClient") as mock_client:
-            # Setup mock response
-            mock_response = Mock()
-            mock_response.json.return_value = mock_successful_response
-            mock_response.raise_for_status.return_value = None
-
-            # Setup mock client
-            mock_context_manager = AsyncMock()
-            mock_context_manager.__aenter__.return_value.get.return_value = (
-                mock_response
-            )
-            mock_client.return_value = mock_context_manager
+        api_response.handler = lambda request: httpx.Response(
+            200, json=mock_successful_response
+        )
 
-            # Test the geocoding
-            address = "157 boulevard Mac Donald 75019 Paris"
-            result = await geocoding_service.geocode_address(address)
+        address = "157 boulevard Mac Donald 75019 Paris"
+        result = await geocoding_service.geocode_address(address)
 
-            # Verify result
-            assert result is not None
-            assert result == (48.8566, 2.3522)  # (latitude, longitude)
+        # Verify result
+        assert result is not None
+        assert result == (48.8566, 2.3522)  # (latitude, longitude)
 
-            # Verify API was called correctly
-            mock_context_manager.__aenter__.return_value.get.assert_called_once_with(
-                f"{geocoding_service.BASE_URL}/search/",
-                params={"q": address, "limit": 1},
-            )
+        # Verify API was called correctly
+        assert len(api_requests) == 1
+        request = api_requests[0]
+        assert request.method == "GET"
+        assert str(request.url).startswith(f"{geocoding_service.BASE_URL}/search/")
+        assert request.url.params["q"] == address
+        assert request.url.params["limit"] == "1"
 
     @pytest.mark.asyncio
     async def test_geocode_address_no_results(
-        self, geocoding_service, mock_empty_response
+        self, geocoding_service, api_response, mock_empty_response
     ):
         """Test geocoding when no results are found"""
-        with patch("httpx.AsyncClient") as mock_client:
-            # Setup mock response with no features
-            mock_response = Mock()
-            mock_response.json.return_value = mock_empty_response
-            mock_response.raise_for_status.return_value = None
-
-            mock_context_manager = AsyncMock()
-            mock_context_manager.__aenter__.return_value.get.return_value = (
-                mock_response
-            )
-            mock_client.return_value = mock_context_manager
+        api_response.handler = lambda request: httpx.Response(
+            200, json=mock_empty_response
+        )
 
-            # Test the geocoding
-            result = await geocoding_service.geocode_address("nonexistent address")
+        result = await geocoding_service.geocode_address("nonexistent address")
 
-            # Should return None for no results
-            assert result is None
+        # Should return None for no results
+        assert result is None
 
     @pytest.mark.asyncio
     async def test_geocode_address_invalid_response(
-        self, geocoding_service, mock_invalid_response
+        self, geocoding_service, api_response, mock_invalid_response
     ):
         """Test geocoding with invalid API response"""
-        with patch("httpx.AsyncClient") as mock_client:
-            # Setup mock response with invalid structure
-            mock_response = Mock()
-            mock_response.json.return_value = mock_invalid_response
-            mock_response.raise_for_status.return_value = None
-
-            mock_context_manager = AsyncMock()
-            mock_context_manager.__aenter__.return_value.get.return_value = (
-                mock_response
-            )
-            mock_client.return_value = mock_context_manager
+        api_response.handler = lambda request: httpx.Response(
+            200, json=mock_invalid_response
+        )
 
-            # Test the geocoding
-            result = await geocoding_service.geocode_address("some address")
+        result = await geocoding_service.geocode_address("some address")
 
-            # Should return None for invalid response
-            assert result is None
+        # Should return None for invalid response
+        assert result is None
 
     @pytest.mark.asyncio
-    async def test_geocode_address_network_error(self, geocoding_service):
+    async def test_geocode_address_network_error(self, geocoding_service, api_response):
         """Test geocoding with network error"""
-        with patch("httpx.AsyncClient") as mock_client:
-            # Setup mock to raise network error
-            mock_context_manager = AsyncMock()
-            mock_context_manager.__aenter__.return_value.get.side_effect = (
-                httpx.RequestError("Network error")
-            )
-            mock_client.return_value = mock_context_manager
 
-            # Test the geocoding
-            result = await geocoding_service.geocode_address("some address")
+        def handler(request):
+            raise httpx.ConnectError("Network error", request=request)
+
+        api_response.handler = handler
 
-            # Should return None for network error
-            assert result is None
+        result = await geocoding_service.geocode_address("some address")
+
+        # Should return None for network error
+        assert result is None
 
     @pytest.mark.asyncio
-    async def test_geocode_address_http_error(self, geocoding_service):
+    async def test_geocode_address_http_error(self, geocoding_service, api_response):
         """Test geocoding with HTTP error (4xx/5xx)"""
-        with patch("httpx.AsyncClient") as mock_client:
-            # Setup mock response to raise HTTP error
-            mock_response = Mock()
-            mock_response.raise_for_status.side_effect = httpx.HTTPStatusError(
-                "400 Bad Request", request=Mock(), response=Mock()
-            )
-
-            mock_context_manager = AsyncMock()
-            mock_context_manager.__aenter__.return_value.get.return_value = (
-                mock_response
-            )
-            mock_client.return_value = mock_context_manager
+        api_response.handler = lambda request: httpx.Response(
+            400, json={"code": 400, "message": "Bad Request"}
+        )
 
-            # Test the geocoding
-            result = await geocoding_service.geocode_address("invalid address")
+        result = await geocoding_service.geocode_address("invalid address")
 
-            # Should return None for HTTP error
-            assert result is None
+        # Should return None for HTTP error
+        assert result is None
 
     @pytest.mark.asyncio
-    async def test_geocode_address_validation_error(self, geocoding_service):
+    async def test_geocode_address_validation_error(
+        self, geocoding_service, api_response
+    ):
         """Test geocoding with pydantic validation error"""
-        with patch("httpx.AsyncClient") as mock_client:
-            # Setup mock response with structure that fails validation
-            mock_response = Mock()
-            mock_response.json.return_value = {"features": ["invalid_feature"]}
-            mock_response.raise_for_status.return_value = None
-
-            mock_context_manager = AsyncMock()
-            mock_context_manager.__aenter__.return_value.get.return_value = (
-                mock_response
-            )
-            mock_client.return_value = mock_context_manager
+        api_response.handler = lambda request: httpx.Response(
+            200, json={"features": ["invalid_feature"]}
+        )
 
-            # Test the geocoding
-            result = await geocoding_service.geocode_address("some address")
+        result = await geocoding_service.geocode_address("some address")
 
-            # Should return None for validation error
-            assert result is None
+        # Should return None for validation error
+        assert result is None
 
     @pytest.mark.asyncio
-    async def test_geocode_address_unexpected_error(self, geocoding_service):
+    async def test_geocode_address_unexpected_error(
+        self, geocoding_service, api_response
+    ):
         """Test geocoding with unexpected error"""
-        with patch("httpx.AsyncClient") as mock_client:
-            # Setup mock to raise unexpected error
-            mock_context_manager = AsyncMock()
-            mock_context_manager.__aenter__.return_value.get.side_effect = Exception(
-                "Unexpected error"
-            )
-            mock_client.return_value = mock_context_manager
 
-            # Test the geocoding
-            result = await geocoding_service.geocode_address("some address")
+        def handler(request):
+            raise Exception("Unexpected error")
+
+        api_response.handler = handler
 
-            # Should return None for unexpected error
-            assert result is None
+        result = await geocoding_service.geocode_address("some address")
+
+        # Should return None for unexpected error
+        assert result is None
 
     @pytest.mark.asyncio
     async def test_geocode_address_empty_string(
-        self, geocoding_service, mock_empty_response
+        self, geocoding_service, api_response, mock_empty_response
     ):
         """Test geocoding with empty address string"""
+        api_response.handler = lambda request: httpx.Response(
+            200, json=mock_empty_response
+        )
+
+        result = await geocoding_service.geocode_address("")
+
+        # Should return None for empty address
+        assert result is None
+
+    @pytest.mark.asyncio
+    async def test_client_shared_across_requests(
+        self, geocoding_service, api_response, api_requests, mock_successful_response
+    ):
+        """Test that every request goes through the same long-lived client"""
+        api_response.handler = lambda request: httpx.Response(
+            200, json=mock_successful_response
+        )
+        await geocoding_service.start()
+        client = geocoding_service.client
+
+        for address in ("1 rue de Rivoli Paris", "2 rue de Rivoli Paris"):
+            assert await geocoding_service.geocode_address(address) is not None
+
+        assert geocoding_service.client is client
+        assert len(api_requests) == 2
+
+        await geocoding_service.aclose()
+        assert client.is_closed
+
+    @pytest.mark.asyncio
+    async def test_client_reopened_after_close(self, geocoding_service):
+        """Test that a closed service opens a new client when used again"""
+        client = geocoding_service.client
+        await geocoding_service.aclose()
+
+        assert geocoding_service.client is not client
+        assert not geocoding_service.client.is_closed
+        await geocoding_service.aclose()
+
+    @pytest.mark.asyncio
+    async def test_client_pool_settings(self):
+        """Test that the client is created with the configured pool limits"""
+        settings = Settings(
+            geocoding_timeout=2.5,
+            geocoding_max_connections=8,
+            geocoding_max_keepalive_connections=4,
+            geocoding_keepalive_expiry=12.0,
+        )
+        service = GeocodingService(settings=settings)
+
         with patch("httpx.AsyncClient") as mock_client:
-            # Setup mock response for empty address
-            mock_response = Mock()
-            mock_response.json.return_value = mock_empty_response
-            mock_response.raise_for_status.return_value = None
-
-            mock_context_manager = AsyncMock()
-            mock_context_manager.__aenter__.return_value.get.return_value = (
-                mock_response
-            )
-            mock_client.return_value = mock_context_manager
+            service.client
+
+        kwargs = mock_client.call_args.kwargs
+        assert kwargs["base_url"] == GeocodingService.BASE_URL
+        assert kwargs["timeout"] == 2.5
+        assert kwargs["limits"] == httpx.Limits(
+            max_connections=8, max_keepalive_connections=4, keepalive_expiry=12.0
+        )
+        assert kwargs["http2"] is False
+
+    @pytest.mark.asyncio
+    async def test_client_http2_without_h2(self):
+        """Test that HTTP/2 falls back to HTTP/1.1 when h2 is not installed"""
+        service = GeocodingService(settings=Settings(geocoding_http2=True))
+
+        with patch("importlib.util.find_spec", return_value=None), patch(
+            "httpx.AsyncClient"
+        ) as mock_client:
+            service.client
+
+        assert mock_client.call_args.kwargs["http2"] is False
+
+    @pytest.mark.asyncio
+    async def test_geocode_address_retried_when_rate_limited(
+        self, api_response, api_requests, mock_successful_response
+    ):
+        """Test that rate limited and failing requests are retried"""
+        answers = iter(
+            [
+                httpx.Response(429, headers={"Retry-After": "0"}),
+                httpx.Response(503),
+                httpx.Response(200, json=mock_successful_response),
+            ]
+        )
+        api_response.handler = lambda request: next(answers)
+        service = GeocodingService(
+            settings=Settings(geocoding_cache_path=None, geocoding_retry_backoff=0.01),
+            transport=httpx.MockTransport(api_response),
+        )
+
+        result = await service.geocode_address("157 boulevard Mac Donald 75019 Paris")
+
+        assert result == (48.8566, 2.3522)
+        assert len(api_requests) == 3
+        assert service.metrics()["requests"]["retries"] == 2
+        await service.aclose()
+
+    @pytest.mark.asyncio
+    async def test_geocode_address_cached(
+        self, geocoding_service, api_response, api_requests, mock_successful_response
+    ):
+        """Test that spelling variants of a geocoded address are answered from cache"""
+        api_response.handler = lambda request: httpx.Response(
+            200, json=mock_successful_response
+        )
+
+        first = await geocoding_service.geocode_address(
+            "157 boulevard Mac Donald 75019 Paris"
+        )
+        second = await geocoding_service.geocode_address(
+            "157 Bd  MAC-DONALD, 75019 Paris"
+        )
+
+        assert first == second == (48.8566, 2.3522)
+        assert len(api_requests) == 1
+        stats = geocoding_service.metrics()["cache"]["memory"]
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_geocode_address_coalesced(
+        self, geocoding_service, api_response, api_requests, mock_successful_response
+    ):
+        """Test that concurrent requests for one address share a single API call"""
+
+        async def handler(request):
+            await asyncio.sleep(0.01)
+            return httpx.Response(200, json=mock_successful_response)
+
+        api_response.handler = handler
+
+        results = await asyncio.gather(
+            geocoding_service.geocode_address("157 boulevard Mac Donald 75019 Paris"),
+            geocoding_service.geocode_address("157 Bd Mac-Donald 75019 Paris"),
+            geocoding_service.geocode_address("157 BOULEVARD MAC DONALD 75019 PARIS"),
+        )
+
+        assert results == [(48.8566, 2.3522)] * 3
+        assert len(api_requests) == 1
+        assert geocoding_service.metrics()["in_flight"] == {
+            "pending": 0,
+            "coalesced": 2,
+        }
+
+    @pytest.mark.asyncio
+    async def test_geocode_address_failure_not_cached(
+        self, geocoding_service, api_response, api_requests, mock_successful_response
+    ):
+        """Test that a failed geocoding is retried on the next request"""
+
+        def handler(request):
+            raise httpx.ConnectError("Network error", request=request)
+
+        api_response.handler = handler
+        assert await geocoding_service.geocode_address("some address") is None
+
+        api_response.handler = lambda request: httpx.Response(
+            200, json=mock_successful_response
+        )
+        assert await geocoding_service.geocode_address("some address") is not None
+        assert len(api_requests) == 2
+
+    @pytest.mark.asyncio
+    async def test_geocode_address_persistent_cache(
+        self, tmp_path, api_response, api_requests, mock_successful_response
+    ):
+        """Test that geocoding results survive a restart through the SQLite cache"""
+        api_response.handler = lambda request: httpx.Response(
+            200, json=mock_successful_response
+        )
+        settings = Settings(geocoding_cache_path=str(tmp_path / "cache.sqlite"))
+        address = "157 boulevard Mac Donald 75019 Paris"
+
+        service = GeocodingService(
+            settings, transport=httpx.MockTransport(api_response)
+        )
+        assert await service.geocode_address(address) == (48.8566, 2.3522)
+        await service.aclose()
+
+        restarted = GeocodingService(
+            settings, transport=httpx.MockTransport(api_response)
+        )
+        assert await restarted.geocode_address(address) == (48.8566, 2.3522)
+        await restarted.aclose()
+
+        assert len(api_requests) == 1
+
+
+class TestGeocodeMany:
+    """Unit tests for GeocodingService.geocode_many against a stand-in API"""
+
+    ADDRESSES = [
+        "157 boulevard Mac Donald 75019 Paris",
+        "5 avenue Anatole France 75007 Paris",
+        "nowhere at all",
+        "78 Le Poujol 30125 L'Estréchure",
+        "157 Bd Mac-Donald, 75019 PARIS",
+        "1 place de la Comédie 34000 Montpellier",
+    ]
+    EXPECTED = [
+        (48.8978, 2.3795),
+        (48.8584, 2.2945),
+        None,
+        (44.1001, 3.7794),
+        (48.8978, 2.3795),
+        (43.6085, 3.8796),
+    ]
+
+    @pytest.mark.asyncio
+    async def test_small_batch_single_requests(self, stand_in_api):
+        """Test that small batches are geocoded with concurrent single requests"""
+        service = batch_geocoding_service(stand_in_api)
+
+        results = await geocode_all(service, self.ADDRESSES)
+
+        assert results == self.EXPECTED
+        # Spelling variants of one address are geocoded once
+        assert len(stand_in_api.single_requests) == 5
+        assert stand_in_api.uploads == []
+
+    @pytest.mark.asyncio
+    async def test_large_batch_bulk_upload(self, stand_in_api):
+        """Test that large batches are uploaded to the bulk endpoint in chunks"""
+        service = batch_geocoding_service(
+            stand_in_api, geocoding_batch_threshold=3, geocoding_batch_size=2
+        )
+
+        results = await geocode_all(service, self.ADDRESSES)
+
+        assert results == self.EXPECTED
+        assert stand_in_api.single_requests == []
+        assert [len(rows) for rows in stand_in_api.uploads] == [2, 2, 1]
+        uploaded = [row["address"] for rows in stand_in_api.uploads for row in rows]
+        assert uploaded == [
+            a for a in self.ADDRESSES if a != "157 Bd Mac-Donald, 75019 PARIS"
+        ]
+
+    @pytest.mark.asyncio
+    async def test_bulk_results_cached(self, stand_in_api):
+        """Test that cached addresses are not uploaded, and bulk results are cached"""
+        service = batch_geocoding_service(stand_in_api, geocoding_batch_threshold=2)
+        await service.geocode_address("5 avenue Anatole France 75007 Paris")
+
+        assert await geocode_all(service, self.ADDRESSES) == self.EXPECTED
+        assert await geocode_all(service, self.ADDRESSES) == self.EXPECTED
+
+        assert [len(rows) for rows in stand_in_api.uploads] == [4]
+        # Failures are not cached: the unknown address alone is requested again
+        assert len(stand_in_api.single_requests) == 2
+
+    @pytest.mark.asyncio
+    async def test_bulk_failure_falls_back_to_single_requests(self, stand_in_api):
+        """Test that a failed upload is retried address by address"""
+        stand_in_api.csv_failure = 503
+        service = batch_geocoding_service(stand_in_api, geocoding_batch_threshold=2)
+
+        results = await geocode_all(service, self.ADDRESSES)
+
+        assert results == self.EXPECTED
+        assert len(stand_in_api.single_requests) == 5
+
+    @pytest.mark.asyncio
+    async def test_concurrent_batches_coalesced(self, stand_in_api):
+        """Test that concurrent batches geocode their common addresses once"""
+        service = batch_geocoding_service(stand_in_api)
+
+        first, second = await asyncio.gather(
+            geocode_all(service, self.ADDRESSES[:4]),
+            geocode_all(service, self.ADDRESSES[2:]),
+        )
+
+        assert first == self.EXPECTED[:4]
+        assert second == self.EXPECTED[2:]
+        requested = [r.url.params["q"] for r in stand_in_api.single_requests]
+        assert sorted(requested) == sorted(set(requested))
+        assert len(requested) == 5
+
+
+@pytest.fixture(scope="module")
+def local_index_path(tmp_path_factory):
+    """Fixture for an offline geocoding index built from the BAN sample"""
+    path = tmp_path_factory.mktemp("ban") / "addresses.idx"
+    AddressIndex.from_ban_csv(
+        Path(__file__).parent.parent / "fixtures" / "ban-sample.csv"
+    ).save(path)
+    return str(path)
+
+
+class TestLocalGeocoding:
+    """Unit tests for GeocodingService with an offline index"""
+
+    @pytest.mark.asyncio
+    async def test_local_hit_without_request(self, stand_in_api, local_index_path):
+        """Test that addresses of the index are geocoded without calling the API"""
+        service = batch_geocoding_service(
+            stand_in_api, geocoding_local_index=local_index_path
+        )
+
+        result = await service.geocode_address("157 Bd Macdonald, 75019 PARIS")
+
+        assert result == (48.897851, 2.379541)
+        assert stand_in_api.requests == []
+        assert service.metrics()["local"] == {"hits": 1, "misses": 0}
+
+    @pytest.mark.asyncio
+    async def test_local_miss_falls_back_to_api(self, stand_in_api, local_index_path):
+        """Test that addresses missing from the index are geocoded by the API"""
+        service = batch_geocoding_service(
+            stand_in_api, geocoding_local_index=local_index_path
+        )
+
+        results = await geocode_all(
+            service,
+            [
+                "5 avenue Anatole France 75007 Paris",
+                "78 Le Poujol 30125 L'Estréchure",
+                "nowhere at all",
+            ],
+        )
+
+        assert results == [(48.85837, 2.29451), (44.1001, 3.7794), None]
+        requested = [r.url.params["q"] for r in stand_in_api.single_requests]
+        assert requested == ["nowhere at all"]
+
+    @pytest.mark.asyncio
+    async def test_remote_disabled(self, stand_in_api, local_index_path):
+        """Test that an offline deployment never calls the API"""
+        service = batch_geocoding_service(
+            stand_in_api,
+            geocoding_local_index=local_index_path,
+            geocoding_remote=False,
+        )
+
+        assert await service.geocode_address("nowhere at all") is None
+        assert await geocode_all(service, ["nowhere", "1 rue de la Paix Paris"]) == [
+            None,
+            (48.86887, 2.3311),
+        ]
+        assert stand_in_api.requests == []
+
+    @pytest.mark.asyncio
+    async def test_unreadable_index(self, stand_in_api, tmp_path):
+        """Test that an unreadable index falls back to the API"""
+        service = batch_geocoding_service(
+            stand_in_api, geocoding_local_index=str(tmp_path / "missing.idx")
+        )
 
-            # Test with empty address
-            result = await geocoding_service.geocode_address("")
+        result = await service.geocode_address("157 boulevard Mac Donald 75019 Paris")
 
-            # Should return None for empty address
-            assert result is None
+        assert result == (48.8978, 2.3795)
+        assert service.local_index is None
+        assert len(stand_in_api.requests) == 1
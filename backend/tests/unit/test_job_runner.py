@@ -0,0 +1,142 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+from src.config import Settings
+from src.models.coverage import LocationCoverageData
+from src.models.jobs import JobStatus
+from src.services.job_runner import CoverageJobRunner
+from src.services.job_store import JobStore
+
+LOCATIONS = [(f"id{n}", f"{n} rue de Rivoli 75001 Paris") for n in range(5)]
+
+
+def coverage_of(locations):
+    """Coverage results naming the address they were computed for"""
+    return {
+        key: LocationCoverageData(error=address, operators={})
+        for key, address in locations.items()
+    }
+
+
+@pytest.fixture
+def coverage_service():
+    """Fixture for a coverage service mock answering every location"""
+    service = AsyncMock()
+    service.get_coverage_for_locations.side_effect = coverage_of
+    return service
+
+
+@pytest.fixture
+def runner(coverage_service, tmp_path):
+    """Fixture for a job runner processing chunks of two locations"""
+    return CoverageJobRunner(
+        coverage_service,
+        JobStore(str(tmp_path / "jobs.sqlite")),
+        Settings(jobs_chunk_size=2, jobs_concurrency=2),
+    )
+
+
+class TestCoverageJobRunner:
+    """Unit tests for CoverageJobRunner"""
+
+    async def test_runs_job_in_chunks(self, runner, coverage_service):
+        """Test that a job is processed chunk by chunk and completed"""
+        job = await runner.submit(LOCATIONS)
+        await runner.wait(job.id)
+
+        job = runner.store.get(job.id)
+        assert job.status is JobStatus.COMPLETED
+        assert job.processed == 5
+        assert coverage_service.get_coverage_for_locations.await_count == 3
+        results = dict(runner.store.results(job.id))
+        assert {key: data.error for key, data in results.items()} == dict(LOCATIONS)
+        await runner.stop()
+
+    async def test_bounds_concurrent_chunks(self, runner, coverage_service):
+        """Test that no more chunks than configured run at once, across jobs"""
+        running = 0
+        peak = 0
+
+        async def get_coverage_for_locations(locations):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return coverage_of(locations)
+
+        coverage_service.get_coverage_for_locations.side_effect = (
+            get_coverage_for_locations
+        )
+        jobs = [await runner.submit(LOCATIONS) for _ in range(3)]
+        await asyncio.gather(*(runner.wait(job.id) for job in jobs))
+
+        assert peak == 2
+        assert all(runner.store.get(job.id).processed == 5 for job in jobs)
+        await runner.stop()
+
+    async def test_failure_marks_job_failed(self, runner, coverage_service):
+        """Test that an unexpected error fails the job with its message"""
+        coverage_service.get_coverage_for_locations.side_effect = RuntimeError("boom")
+
+        job = await runner.submit(LOCATIONS)
+        await runner.wait(job.id)
+
+        job = runner.store.get(job.id)
+        assert job.status is JobStatus.FAILED
+        assert job.error == "boom"
+        await runner.stop()
+
+    async def test_resumes_interrupted_job(self, runner, coverage_service):
+        """Test that a job stopped midway resumes from its pending locations"""
+        job = runner.store.create(LOCATIONS)
+        runner.store.save_results(
+            job.id, [(0, LocationCoverageData(error="done", operators={}))]
+        )
+        runner.store.set_status(job.id, JobStatus.RUNNING)
+
+        await runner.start()
+        await runner.wait(job.id)
+
+        assert runner.store.get(job.id).status is JobStatus.COMPLETED
+        assert runner.store.get(job.id).processed == 5
+        assert coverage_service.get_coverage_for_locations.await_count == 2
+        await runner.stop()
+
+    async def test_runners_sharing_store_run_job_once(
+        self, runner, coverage_service, tmp_path
+    ):
+        """Test that two runners resuming the same jobs process each location once"""
+        other = CoverageJobRunner(
+            coverage_service,
+            JobStore(str(tmp_path / "jobs.sqlite")),
+            Settings(jobs_chunk_size=2, jobs_concurrency=2),
+        )
+        job = runner.store.create(LOCATIONS)
+        runner.store.set_status(job.id, JobStatus.RUNNING)
+
+        await asyncio.gather(runner.start(), other.start())
+        await asyncio.gather(runner.wait(job.id), other.wait(job.id))
+
+        job = runner.store.get(job.id)
+        assert job.status is JobStatus.COMPLETED
+        assert (job.total, job.processed) == (5, 5)
+        assert coverage_service.get_coverage_for_locations.await_count == 3
+        assert len(runner.store.results(job.id)) == 5
+        await asyncio.gather(runner.stop(), other.stop())
+
+    async def test_takes_over_job_with_expired_lease(self, runner, coverage_service):
+        """Test that a job whose runner stopped renewing its lease is taken over"""
+        job = runner.store.create(LOCATIONS)
+        assert runner.store.claim(job.id, "stopped runner", 60.0)
+
+        await runner.start()
+        assert runner.store.get(job.id).processed == 0
+
+        runner.store.renew(job.id, "stopped runner", -1.0)
+        await runner._resume()
+        await runner.wait(job.id)
+
+        assert runner.store.get(job.id).status is JobStatus.COMPLETED
+        assert runner.store.get(job.id).processed == 5
+        await runner.stop()
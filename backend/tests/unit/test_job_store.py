@@ -0,0 +1,138 @@
+import sqlite3
+import pytest
+from src.models.coverage import LocationCoverageData, NetworkCoverage
+from src.models.jobs import JobStatus
+from src.services.job_store import JobStore
+
+COVERED = LocationCoverageData(
+    error=None,
+    operators={
+        "orange": NetworkCoverage(network_2g=True, network_3g=False, network_4g=True)
+    },
+)
+NOT_FOUND = LocationCoverageData(
+    error="Could not geocode address: nowhere", operators={}
+)
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Fixture for a job store in a temporary database"""
+    store = JobStore(str(tmp_path / "jobs.sqlite"))
+    yield store
+    store.close()
+
+
+class TestJobStore:
+    """Unit tests for JobStore"""
+
+    def test_create(self, store):
+        """Test that a new job is queued with every location pending"""
+        job = store.create([("a", "1 rue A"), ("b", "2 rue B"), ("a", "3 rue C")])
+
+        assert job.status is JobStatus.QUEUED
+        assert (job.total, job.processed, job.failed) == (3, 0, 0)
+        assert store.pending(job.id) == [
+            (0, "a", "1 rue A"),
+            (1, "b", "2 rue B"),
+            (2, "a", "3 rue C"),
+        ]
+        assert store.get("unknown") is None
+
+    def test_save_results_updates_progress(self, store):
+        """Test that stored results count as processed and are no longer pending"""
+        job = store.create([("a", "1 rue A"), ("b", "nowhere"), ("c", "3 rue C")])
+
+        store.save_results(job.id, [(1, NOT_FOUND), (2, COVERED)])
+
+        job = store.get(job.id)
+        assert (job.processed, job.failed) == (2, 1)
+        assert store.pending(job.id) == [(0, "a", "1 rue A")]
+
+    def test_pending_in_pages(self, store):
+        """Test that pending locations are read page by page, in order"""
+        job = store.create([(f"id{n}", f"{n} rue A") for n in range(5)])
+        store.save_results(job.id, [(1, COVERED)])
+
+        first = store.pending(job.id, limit=2)
+        second = store.pending(job.id, after=first[-1][0], limit=2)
+
+        assert [position for position, _, _ in first] == [0, 2]
+        assert [position for position, _, _ in second] == [3, 4]
+        assert store.pending(job.id, after=4, limit=2) == []
+
+    def test_save_results_once(self, store):
+        """Test that results stored again are not counted or numbered twice"""
+        job = store.create([("a", "1 rue A"), ("b", "nowhere"), ("c", "3 rue C")])
+        store.save_results(job.id, [(0, COVERED), (1, NOT_FOUND)])
+
+        stored = store.save_results(job.id, [(1, NOT_FOUND), (2, COVERED)])
+
+        job = store.get(job.id)
+        assert stored == 1
+        assert (job.total, job.processed, job.failed) == (3, 3, 1)
+        assert store.results(job.id, offset=2) == [("c", COVERED)]
+
+    def test_claim(self, store):
+        """Test that a job is claimed by one runner until its lease expires"""
+        job = store.create([("a", "1 rue A")])
+
+        assert store.claim(job.id, "first", 60.0)
+        assert store.get(job.id).status is JobStatus.RUNNING
+        assert not store.claim(job.id, "second", 60.0)
+        assert store.renew(job.id, "first", -1.0)
+        assert store.claim(job.id, "second", 60.0)
+        assert not store.renew(job.id, "first", 60.0)
+
+        store.set_status(job.id, JobStatus.COMPLETED, owner="first")
+        assert store.get(job.id).status is JobStatus.RUNNING
+        store.set_status(job.id, JobStatus.COMPLETED, owner="second")
+        assert not store.claim(job.id, "first", 60.0)
+
+    def test_results_in_processing_order(self, store):
+        """Test that results are paged in the order they were stored"""
+        job = store.create([("a", "1 rue A"), ("b", "nowhere"), ("c", "3 rue C")])
+        store.save_results(job.id, [(2, COVERED)])
+        store.save_results(job.id, [(0, COVERED), (1, NOT_FOUND)])
+
+        assert store.results(job.id) == [
+            ("c", COVERED),
+            ("a", COVERED),
+            ("b", NOT_FOUND),
+        ]
+        assert store.results(job.id, offset=1, limit=1) == [("a", COVERED)]
+        assert list(store.iter_results(job.id, page_size=2)) == store.results(job.id)
+
+    def test_unfinished_survive_reopening(self, store):
+        """Test that queued and running jobs are found again after a restart"""
+        running = store.create([("a", "1 rue A")])
+        store.set_status(running.id, JobStatus.RUNNING)
+        failed = store.create([("b", "2 rue B")])
+        store.set_status(failed.id, JobStatus.FAILED, error="boom")
+        store.close()
+
+        reopened = JobStore(str(store.path))
+        try:
+            assert [job.id for job in reopened.unfinished()] == [running.id]
+            assert reopened.get(failed.id).error == "boom"
+        finally:
+            reopened.close()
+
+    def test_adds_lease_columns_to_existing_database(self, tmp_path):
+        """Test that a database created before job leases can still be claimed"""
+        path = tmp_path / "jobs.sqlite"
+        connection = sqlite3.connect(path)
+        connection.execute(
+            "CREATE TABLE jobs (id TEXT PRIMARY KEY, status TEXT NOT NULL, "
+            "total INTEGER NOT NULL, processed INTEGER NOT NULL DEFAULT 0, "
+            "failed INTEGER NOT NULL DEFAULT 0, created_at TEXT NOT NULL, "
+            "updated_at TEXT NOT NULL, error TEXT)"
+        )
+        connection.close()
+
+        store = JobStore(str(path))
+        try:
+            job = store.create([("a", "1 rue A")])
+            assert store.claim(job.id, "runner", 60.0)
+        finally:
+            store.close()
@@ -0,0 +1,192 @@
+import asyncio
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+import httpx
+import pytest
+from src.services.rate_limit import RequestScheduler, TokenBucket, _parse_retry_after
+
+
+class FakeTime:
+    """Clock whose sleeps advance time instantly, recording their durations"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def clock(self) -> float:
+        return self.now
+
+    async def sleep(self, delay: float) -> None:
+        self.sleeps.append(delay)
+        self.now += delay
+
+
+@pytest.fixture
+def fake_time():
+    """Fixture for an instantly advancing clock"""
+    return FakeTime()
+
+
+def responses(*status_codes, headers=None):
+    """Request function answering the given status codes in turn"""
+    request = httpx.Request("GET", "https://api.example/search/")
+    answers = iter(status_codes)
+
+    async def send():
+        send.calls.append(request)
+        return httpx.Response(next(answers), headers=headers, request=request)
+
+    send.calls = []
+    return send
+
+
+def scheduler(fake_time, **options):
+    """Request scheduler on the fake clock"""
+    settings = dict(
+        max_in_flight=4, rate=0, burst=1, max_retries=3, backoff=0.5, max_delay=30.0
+    )
+    settings.update(options)
+    return RequestScheduler(**settings, clock=fake_time.clock, sleep=fake_time.sleep)
+
+
+class TestTokenBucket:
+    """Unit tests for TokenBucket"""
+
+    @pytest.mark.asyncio
+    async def test_burst_then_paced(self, fake_time):
+        """Test that a burst goes through at once and later requests are paced"""
+        bucket = TokenBucket(10, 3, fake_time.clock, fake_time.sleep)
+
+        for _ in range(5):
+            await bucket.acquire()
+
+        assert fake_time.sleeps == pytest.approx([0.1, 0.1])
+        assert fake_time.now == pytest.approx(0.2)
+
+    @pytest.mark.asyncio
+    async def test_tokens_refill(self, fake_time):
+        """Test that idle time refills the bucket up to the burst"""
+        bucket = TokenBucket(10, 2, fake_time.clock, fake_time.sleep)
+        await bucket.acquire()
+        await bucket.acquire()
+
+        fake_time.now += 60
+        await bucket.acquire()
+        await bucket.acquire()
+
+        assert fake_time.sleeps == []
+
+    @pytest.mark.asyncio
+    async def test_pause(self, fake_time):
+        """Test that a paused bucket holds requests back until the pause ends"""
+        bucket = TokenBucket(10, 5, fake_time.clock, fake_time.sleep)
+        bucket.pause(2.0)
+
+        await bucket.acquire()
+
+        assert fake_time.now == pytest.approx(2.0)
+
+
+class TestRequestScheduler:
+    """Unit tests for RequestScheduler"""
+
+    @pytest.mark.asyncio
+    async def test_success_not_retried(self, fake_time):
+        """Test that successful and client error responses are returned at once"""
+        for status in (200, 404):
+            send = responses(status)
+            response = await scheduler(fake_time).send(send)
+
+            assert response.status_code == status
+            assert len(send.calls) == 1
+        assert fake_time.sleeps == []
+
+    @pytest.mark.asyncio
+    async def test_server_error_retried_with_backoff(self, fake_time):
+        """Test that 5xx responses are retried with jittered exponential backoff"""
+        send = responses(503, 502, 200)
+        requests = scheduler(fake_time, backoff=0.5)
+
+        response = await requests.send(send)
+
+        assert response.status_code == 200
+        assert len(send.calls) == 3
+        assert 0 <= fake_time.sleeps[0] <= 0.5
+        assert 0 <= fake_time.sleeps[1] <= 1.0
+        assert requests.stats.as_dict() == {
+            "requests": 3,
+            "retries": 2,
+            "rate_limited": 0,
+            "server_errors": 2,
+        }
+
+    @pytest.mark.asyncio
+    async def test_retry_after_honored(self, fake_time):
+        """Test that a 429 waits for Retry-After and pauses every request"""
+        send = responses(429, 200, headers={"Retry-After": "2"})
+        requests = scheduler(fake_time, rate=100, burst=10)
+
+        response = await requests.send(send)
+
+        assert response.status_code == 200
+        assert fake_time.sleeps == [2.0]
+        assert requests.bucket._resume_at == pytest.approx(2.0)
+        assert requests.stats.rate_limited == 1
+
+    @pytest.mark.asyncio
+    async def test_retry_after_capped(self, fake_time):
+        """Test that an excessive Retry-After is capped at the maximum delay"""
+        send = responses(429, 200, headers={"Retry-After": "3600"})
+
+        await scheduler(fake_time, max_delay=30.0).send(send)
+
+        assert fake_time.sleeps == [30.0]
+
+    @pytest.mark.asyncio
+    async def test_retries_exhausted(self, fake_time):
+        """Test that the last error response is returned once retries are exhausted"""
+        send = responses(500, 500, 500)
+
+        response = await scheduler(fake_time, max_retries=2).send(send)
+
+        assert response.status_code == 500
+        assert len(send.calls) == 3
+
+    @pytest.mark.asyncio
+    async def test_in_flight_bounded(self):
+        """Test that no more than max_in_flight requests run at once"""
+        requests = RequestScheduler(
+            max_in_flight=3, rate=0, burst=1, max_retries=0, backoff=0, max_delay=0
+        )
+        running, peak = 0, 0
+
+        async def send():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.001)
+            running -= 1
+            return httpx.Response(200)
+
+        await asyncio.gather(*(requests.send(send) for _ in range(20)))
+
+        assert peak == 3
+        assert requests.stats.requests == 20
+
+
+class TestParseRetryAfter:
+    """Unit tests for _parse_retry_after"""
+
+    def test_seconds(self):
+        """Test that a delay in seconds is parsed"""
+        assert _parse_retry_after("120") == 120.0
+        assert _parse_retry_after(None) is None
+        assert _parse_retry_after("soon") is None
+
+    def test_http_date(self):
+        """Test that an HTTP date is converted to a delay from now"""
+        retry_at = datetime.now(timezone.utc) + timedelta(seconds=60)
+
+        delay = _parse_retry_after(format_datetime(retry_at, usegmt=True))
+
+        assert 55 <= delay <= 60
@@ -0,0 +1,49 @@
+import asyncio
+import pytest
+from src.services.single_flight import SingleFlight
+
+
+class TestSingleFlight:
+    """Unit tests for SingleFlight"""
+
+    @pytest.mark.asyncio
+    async def test_followers_share_leader_result(self):
+        """Test that callers claiming a key in flight wait for the leader's result"""
+        flight = SingleFlight()
+        future, leader = flight.claim("paris")
+        followers = [flight.claim("paris") for _ in range(3)]
+
+        assert leader is True
+        assert all(f is future and not lead for f, lead in followers)
+        assert flight.coalesced == 3
+
+        waiting = asyncio.gather(*(flight.wait(f) for f, _ in followers))
+        flight.resolve("paris", (48.85, 2.35))
+
+        assert await waiting == [(48.85, 2.35)] * 3
+        assert len(flight) == 0
+
+    @pytest.mark.asyncio
+    async def test_key_released_after_resolve(self):
+        """Test that a resolved key is claimed anew by the next caller"""
+        flight = SingleFlight()
+        flight.claim("paris")
+        flight.resolve("paris", None)
+        flight.resolve("paris", None)
+
+        _, leader = flight.claim("paris")
+
+        assert leader is True
+
+    @pytest.mark.asyncio
+    async def test_cancelled_follower(self):
+        """Test that cancelling a follower does not cancel the shared work"""
+        flight = SingleFlight()
+        future, _ = flight.claim("paris")
+        follower = asyncio.ensure_future(flight.wait(future))
+        await asyncio.sleep(0)
+
+        follower.cancel()
+        flight.resolve("paris", (48.85, 2.35))
+
+        assert await future == (48.85, 2.35)
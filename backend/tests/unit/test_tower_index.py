@@ -0,0 +1,235 @@
+import pytest
+import math
+import random
+from src.data.tower_index import TowerIndex
+from src.data.tower_store import TowerStore
+from src.models.records import CoverageRecord
+from src.services.coordinate_service import (
+    EARTH_RADIUS_KM,
+    EQUIRECTANGULAR,
+    HAVERSINE,
+    PLANAR,
+    CoordinateService,
+)
+from src.services.coverage_service import NETWORK_GEN_RADIUS_KM
+
+
+@pytest.fixture
+def coordinate_service():
+    """Fixture for coordinate service instance"""
+    return CoordinateService()
+
+
+@pytest.fixture
+def random_towers():
+    """Fixture for towers scattered around Paris (Lambert93) with random generations"""
+    rng = random.Random(42)
+    towers = []
+    for _ in range(500):
+        towers.append(
+            (
+                rng.choice(["Orange", "SFR", "Bouygues", "Free"]),
+                652000 + rng.randint(-60000, 60000),
+                6862000 + rng.randint(-60000, 60000),
+                {
+                    "2G": rng.random() < 0.3,
+                    "3G": rng.random() < 0.5,
+                    "4G": rng.random() < 0.5,
+                },
+            )
+        )
+    return towers
+
+
+def build_store(towers, coordinate_service):
+    """Build a tower store from (operator, x, y, networks) towers"""
+    records = [
+        CoverageRecord(
+            operator=operator,
+            x=x,
+            y=y,
+            network_2g=int(networks["2G"]),
+            network_3g=int(networks["3G"]),
+            network_4g=int(networks["4G"]),
+        )
+        for operator, x, y, networks in towers
+    ]
+    lon, lat = coordinate_service.lambert93_to_gps_many(
+        [record.x for record in records], [record.y for record in records]
+    )
+    return TowerStore.from_records(records, lon=lon, lat=lat)
+
+
+def build_index(
+    store, coordinate_service, radii_km=NETWORK_GEN_RADIUS_KM, model=EQUIRECTANGULAR
+):
+    """Build an index over a tower store"""
+    return TowerIndex.build(
+        store,
+        radii_km,
+        coordinate_service.calculate_distances,
+        coordinate_service.gps_to_lambert93_many,
+        model,
+    )
+
+
+distance_models = pytest.mark.parametrize(
+    "model", [HAVERSINE, EQUIRECTANGULAR, PLANAR], ids=lambda model: model.name
+)
+
+
+def brute_force_coverage(store, lat, lon, coordinate_service):
+    """Reference implementation scanning every tower with the haversine distance"""
+    max_radius = max(NETWORK_GEN_RADIUS_KM.values())
+    coverage = {}
+    for record, tower_lat, tower_lon in zip(store.records(), store.lat, store.lon):
+        operator = record.operator.lower()
+        distance = coordinate_service.calculate_distance(lat, lon, tower_lat, tower_lon)
+        if distance > max_radius:
+            continue
+        flags = coverage.setdefault(operator, {"2G": False, "3G": False, "4G": False})
+        networks = {
+            "2G": record.network_2g,
+            "3G": record.network_3g,
+            "4G": record.network_4g,
+        }
+        for generation, radius in NETWORK_GEN_RADIUS_KM.items():
+            if networks[generation] == 1 and distance <= radius:
+                flags[generation] = True
+    return coverage
+
+
+def offset_point(lat, lon, distance_km, bearing):
+    """Point at roughly `distance_km` from (lat, lon) in the direction of `bearing`"""
+    angle = distance_km / EARTH_RADIUS_KM
+    return (
+        lat + math.degrees(angle * math.cos(bearing)),
+        lon + math.degrees(angle * math.sin(bearing)) / math.cos(math.radians(lat)),
+    )
+
+
+class TestTowerIndex:
+    """Unit tests for TowerIndex"""
+
+    def test_query_matches_brute_force(self, coordinate_service, random_towers):
+        """Test that index lookups return the same coverage as a full scan"""
+        store = build_store(random_towers, coordinate_service)
+        index = build_index(store, coordinate_service)
+
+        rng = random.Random(7)
+        for _ in range(200):
+            lat = 48.8566 + rng.uniform(-1.0, 1.0)
+            lon = 2.3522 + rng.uniform(-1.5, 1.5)
+            expected = brute_force_coverage(store, lat, lon, coordinate_service)
+            assert index.query(lat, lon) == expected
+
+    @distance_models
+    def test_query_near_radius_matches_brute_force(
+        self, coordinate_service, random_towers, model
+    ):
+        """Test points close to a radius limit, where approximations are not trusted"""
+        store = build_store(random_towers, coordinate_service)
+        index = build_index(store, coordinate_service, model=model)
+
+        rng = random.Random(3)
+        for _ in range(200):
+            tower = rng.randrange(len(store))
+            radius = rng.choice(list(NETWORK_GEN_RADIUS_KM.values()))
+            lat, lon = offset_point(
+                store.lat[tower],
+                store.lon[tower],
+                radius * rng.uniform(0.99, 1.01),
+                rng.uniform(0, 2 * math.pi),
+            )
+            expected = brute_force_coverage(store, lat, lon, coordinate_service)
+            assert index.query(lat, lon) == expected
+
+    @distance_models
+    def test_query_tower_on_radius_boundary(self, coordinate_service, model):
+        """Test that a tower exactly at the radius limit is considered in range"""
+        store = build_store(
+            [("Orange", 652000, 6862000, {"2G": False, "3G": True, "4G": False})],
+            coordinate_service,
+        )
+        lat, lon = offset_point(store.lat[0], store.lon[0], 5.0, 1.0)
+        exact_radius = coordinate_service.calculate_distance(
+            lat, lon, store.lat[0], store.lon[0]
+        )
+
+        index = build_index(
+            store,
+            coordinate_service,
+            {"2G": 30.0, "3G": exact_radius, "4G": 10.0},
+            model,
+        )
+
+        assert index.query(lat, lon)["orange"]["3G"] is True
+
+    def test_query_many_matches_query(self, coordinate_service, random_towers):
+        """Test that batch lookups return the same coverage as single lookups"""
+        store = build_store(random_towers, coordinate_service)
+        index = build_index(store, coordinate_service)
+
+        rng = random.Random(11)
+        lats = [48.8566 + rng.uniform(-1.0, 1.0) for _ in range(100)]
+        lons = [2.3522 + rng.uniform(-1.5, 1.5) for _ in range(100)]
+
+        assert index.query_many(lats, lons) == [
+            index.query(lat, lon) for lat, lon in zip(lats, lons)
+        ]
+
+    @distance_models
+    def test_classify_points_decided_around_point(
+        self, coordinate_service, random_towers, model
+    ):
+        """Test that points close to a decided point get the same flags"""
+        store = build_store(random_towers, coordinate_service)
+        index = build_index(store, coordinate_service, model=model)
+
+        rng = random.Random(5)
+        lats, lons = [], []
+        for _ in range(300):
+            tower = rng.randrange(len(store))
+            radius = rng.choice(list(NETWORK_GEN_RADIUS_KM.values()))
+            lat, lon = offset_point(
+                store.lat[tower],
+                store.lon[tower],
+                radius * rng.uniform(0.995, 1.005),
+                rng.uniform(0, 2 * math.pi),
+            )
+            lats.append(lat)
+            lons.append(lon)
+
+        within, undecided = index.classify_points(lats, lons, 0.05)
+
+        assert (within == index.within_many(lats, lons)).all()
+        assert undecided.any() and not undecided.all()
+        for lat, lon, flags, mixed in zip(lats, lons, within, undecided):
+            for _ in range(5):
+                near = offset_point(lat, lon, rng.uniform(0, 0.049), rng.uniform(0, 6))
+                near_flags = index.within_many([near[0]], [near[1]])[0]
+                assert (near_flags[~mixed] == flags[~mixed]).all()
+
+    def test_query_no_towers_in_range(self, coordinate_service, random_towers):
+        """Test that operators without towers in range are omitted"""
+        store = build_store(random_towers, coordinate_service)
+        index = build_index(store, coordinate_service)
+
+        # Marseille is far away from every tower around Paris
+        assert index.query(43.2965, 5.3698) == {}
+        # Points far outside the dataset extent are never projected
+        assert index.query(-21.1151, 55.5364) == {}
+
+    def test_operator_without_generation(self, coordinate_service):
+        """Test that an operator present in range reports missing generations as False"""
+        store = build_store(
+            [("SFR", 652000, 6862000, {"2G": True, "3G": False, "4G": False})],
+            coordinate_service,
+        )
+
+        index = build_index(store, coordinate_service)
+
+        assert index.query(store.lat[0], store.lon[0]) == {
+            "sfr": {"2G": True, "3G": False, "4G": False}
+        }
+        assert index.operators == ["sfr"]